@@ -0,0 +1,244 @@
+import argparse
+import glob
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from zillow import MultiPropertyZillowScraper, FIELD_GROUPS
+
+# Bump when the generated pages change, so old history entries aren't compared against new pages
+SCENARIO = 'synthetic-v2'
+DEFAULT_PAGES = 20
+# Real detail pages are several MB; the extractors' page_source scans scale with this
+FILLER_KB = 300
+
+DEFAULT_HISTORY = 'benchmark_history.jsonl'
+# Relative changes that count as a regression
+MAX_THROUGHPUT_DROP = 0.10
+MAX_LATENCY_INCREASE = 0.25
+MAX_MEMORY_INCREASE = 0.25
+# Latency changes smaller than this are noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 25.0
+
+STREETS = ['Elm St', 'Main St', 'Oak Ave', 'Maple Dr', 'Pine Rd', 'Cedar Ln']
+CITIES = [('Cambridge', '02139'), ('Somerville', '02143'), ('Newton', '02458'), ('Quincy', '02169')]
+RISKS = ['Minimal', 'Minor', 'Moderate', 'Major', 'Severe']
+RISK_KINDS = ['flood', 'fire', 'wind', 'air', 'heat']
+
+
+def synthetic_page(index, seed=0, filler_kb=FILLER_KB):
+    """A deterministic detail page with every section the extractors look for, padded to a realistic size"""
+    rng = random.Random(seed * 100003 + index)
+    city, zipcode = rng.choice(CITIES)
+    beds, baths, sqft = rng.randint(1, 6), rng.choice([1, 1.5, 2, 2.5, 3]), rng.randint(600, 4500)
+    price = rng.randint(200, 2500) * 1000
+    zpid = 10000000 + index
+    schools = ''.join(
+        f'<li><div>{name} {level.title()} School</div><div>Grades K-12</div><div>Distance: {rng.uniform(0.2, 4):.1f} mi</div></li>'
+        for name, level in (('Baldwin', 'elementary'), ('Putnam', 'middle'), ('Rindge', 'high')))
+    # Each risk in its own card, the label three levels below it as on the live page (the extractor reads ./../../..)
+    risks = ''.join(
+        f'<div class="risk-card"><div><div><div>{kind.title()} Factor</div></div></div><span>{level}</span><span>{score}/10</span></div>'
+        for kind, level, score in zip(RISK_KINDS, rng.sample(RISKS, len(RISK_KINDS)), rng.sample(range(1, 11), len(RISK_KINDS))))
+    history = ''.join(
+        f'<tr><td>{rng.randint(1, 12)}/{rng.randint(1, 28)}/{2015 + i} Listed for sale ${price - i * 10000:,}</td></tr>'
+        for i in range(4))
+    filler = ''.join(f'<div class="c{i % 97}"><span>Lorem ipsum {i}</span></div>'
+                     for i in range(filler_kb * 1024 // 48))
+    return f"""<html><head><title>{index} {STREETS[index % len(STREETS)]}</title>
+<link rel="canonical" href="https://www.zillow.com/homedetails/{index}-{city}/{zpid}_zpid/">
+<script>var hdp={{"zpid":{zpid},"bedrooms":{beds},"bathrooms":{baths},"livingArea":{sqft}}};</script></head><body>
+<div id="wrapper"><h1 data-testid="street-address">{index} {rng.choice(STREETS)}, {city}, MA {zipcode}</h1>
+<span data-testid="price">${price:,}</span>
+<img src="https://photos.zillowstatic.com/fp/{zpid:x}-cc_ft_960.jpg">
+<div data-testid="bed-bath-sqft-facts"><span>{beds}</span> <span>beds</span> <span>{baths}</span> <span>baths</span> <span>{sqft:,}</span> <span>sqft</span></div>
+<p>Built in {rng.randint(1890, 2022)}</p><p>{rng.uniform(0.05, 2):.2f} Acres Lot</p><p>${price // sqft}/sqft</p><p>Single Family Residence</p>
+<div>Est. payment<div>${price // 200:,}/mo</div></div>
+<ul><li>Hardwood floors</li><li>Granite countertops</li><li>Dishwasher</li><li>Family room</li></ul>
+<p>Electric: 200 Amp</p><p>Sewer: Public Sewer</p><p>Total spaces: {rng.randint(0, 4)}</p><p>Garage spaces: {rng.randint(0, 2)}</p>
+{filler}
+<div class="StyledScoresContainer-x hQqCYo"><div><div>Walk Score® {rng.randint(10, 99)}</div><div>Bike Score® {rng.randint(10, 99)}</div><div>Transit Score® {rng.randint(10, 99)}</div></div></div>
+<section><h2>GreatSchools rating</h2><ul>{schools}</ul></section>
+<section><h2>Climate risks</h2>{risks}</section>
+<section><h2>Price history</h2><table>{history}</table></section>
+<div><h2>Nearby cities</h2><ul><li><a href="/a">Somerville Real estate</a></li><li><a href="/b">Boston Real estate</a></li></ul></div>
+<div>Location<div>Region: {city}</div></div>
+</div></body></html>"""
+
+
+def load_pages(pages_dir=None, pages=DEFAULT_PAGES, seed=0):
+    """(scenario name, [(url, html)]): saved pages (e.g. debug captures) if given, else the synthetic set"""
+    if pages_dir:
+        paths = sorted(glob.glob(os.path.join(pages_dir, '**', '*.html'), recursive=True))[:pages]
+        loaded = []
+        for path in paths:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                loaded.append((f"https://www.zillow.com/homedetails/saved/{len(loaded)}_zpid/", f.read()))
+        return f"saved:{os.path.basename(os.path.normpath(pages_dir))}:{len(loaded)}", loaded
+    return f"{SCENARIO}:{pages}", [(f"https://www.zillow.com/homedetails/{i}/{10000000 + i}_zpid/", synthetic_page(i, seed))
+                                   for i in range(pages)]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_scenario(pages, repeat=2):
+    """Extract every page `repeat` times (after one warm-up pass); returns the measured results"""
+    page_seconds, group_seconds = [], {group: [] for group, _, _ in FIELD_GROUPS}
+    pass_seconds = []
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for attempt in range(repeat + 1):
+            started = time.perf_counter()
+            for url, html in pages:
+                page_started = time.perf_counter()
+                scraper = MultiPropertyZillowScraper.from_page_source(html, url)
+                scraper.extract_complete_property_data()
+                if attempt == 0:
+                    continue
+                page_seconds.append(time.perf_counter() - page_started)
+                for group, seconds in scraper.page_timings.items():
+                    group_seconds[group].append(seconds)
+            if attempt:
+                pass_seconds.append(time.perf_counter() - started)
+
+    per_pass = statistics.median(pass_seconds)
+    return {
+        'properties_per_hour': round(len(pages) / per_pass * 3600, 1),
+        'page_ms': {'p50': round(percentile(page_seconds, 0.5) * 1000, 2),
+                    'p95': round(percentile(page_seconds, 0.95) * 1000, 2)},
+        'extractor_ms': {group: {'p50': round(percentile(seconds, 0.5) * 1000, 2),
+                                 'p95': round(percentile(seconds, 0.95) * 1000, 2)}
+                         for group, seconds in group_seconds.items() if seconds},
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(path, entry):
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry, sort_keys=True) + "\n")
+
+
+def find_baseline(history, scenario):
+    """The most recent entry recorded as a baseline for this scenario"""
+    for entry in reversed(history):
+        if entry['scenario'] == scenario and entry.get('baseline'):
+            return entry
+    return None
+
+
+def compare(result, baseline, max_throughput_drop=MAX_THROUGHPUT_DROP, max_latency_increase=MAX_LATENCY_INCREASE,
+            max_memory_increase=MAX_MEMORY_INCREASE, min_latency_delta_ms=MIN_LATENCY_DELTA_MS):
+    """Human-readable regressions of result against baseline (empty when within thresholds)"""
+    regressions = []
+    old, new = baseline['properties_per_hour'], result['properties_per_hour']
+    if new < old * (1 - max_throughput_drop):
+        regressions.append(f"throughput {new:,.0f}/h vs baseline {old:,.0f}/h ({new / old - 1:+.0%})")
+
+    latencies = [('page', baseline['page_ms'], result['page_ms'])]
+    latencies += [(group, baseline['extractor_ms'][group], timings)
+                  for group, timings in result['extractor_ms'].items() if group in baseline['extractor_ms']]
+    for name, before, after in latencies:
+        for stat in ('p50', 'p95'):
+            if after[stat] > before[stat] * (1 + max_latency_increase) \
+                    and after[stat] - before[stat] >= min_latency_delta_ms:
+                regressions.append(f"{name} {stat} {after[stat]:.1f}ms vs baseline {before[stat]:.1f}ms "
+                                   f"({after[stat] / before[stat] - 1:+.0%})")
+
+    old, new = baseline['peak_rss_mb'], result['peak_rss_mb']
+    if new > old * (1 + max_memory_increase):
+        regressions.append(f"peak memory {new:.0f} MB vs baseline {old:.0f} MB ({new / old - 1:+.0%})")
+    return regressions
+
+
+def print_result(result):
+    print(f"  • Throughput: {result['properties_per_hour']:,.0f} properties/hour (parse stage)")
+    print(f"  • Page latency: p50 {result['page_ms']['p50']:.1f}ms, p95 {result['page_ms']['p95']:.1f}ms")
+    for group, timings in result['extractor_ms'].items():
+        print(f"    - {group:<9} p50 {timings['p50']:8.2f}ms  p95 {timings['p95']:8.2f}ms")
+    print(f"  • Peak RSS: {result['peak_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline extraction benchmark with a history file and regression gate")
+    parser.add_argument('command', choices=['run', 'baseline', 'show'])
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    parser.add_argument('--pages-dir', help="saved detail pages (*.html, e.g. debug captures) instead of synthetic ones")
+    parser.add_argument('--pages', type=int, default=DEFAULT_PAGES)
+    parser.add_argument('--repeat', type=int, default=2)
+    parser.add_argument('--max-throughput-drop', type=float, default=MAX_THROUGHPUT_DROP)
+    parser.add_argument('--max-latency-increase', type=float, default=MAX_LATENCY_INCREASE)
+    parser.add_argument('--max-memory-increase', type=float, default=MAX_MEMORY_INCREASE)
+    parser.add_argument('--min-latency-delta-ms', type=float, default=MIN_LATENCY_DELTA_MS)
+    parser.add_argument('--no-record', action='store_true', help="don't append this run to the history")
+    args = parser.parse_args()
+
+    history = read_history(args.history)
+    if args.command == 'show':
+        for entry in history:
+            marker = '★' if entry.get('baseline') else ('✗' if entry.get('regressions') else ' ')
+            print(f"{marker} {entry['recorded_at']}  {entry.get('commit') or '-':<8} {entry['scenario']:<22} "
+                  f"{entry['properties_per_hour']:>10,.0f}/h  p95 {entry['page_ms']['p95']:7.1f}ms  "
+                  f"{entry['peak_rss_mb']:5.0f} MB")
+        sys.exit(0)
+
+    scenario, pages = load_pages(args.pages_dir, args.pages)
+    if not pages:
+        parser.error(f"no *.html pages under {args.pages_dir}")
+    print(f"⏱️ Benchmark {scenario}: {len(pages)} pages x {args.repeat} passes")
+    result = run_scenario(pages, repeat=args.repeat)
+    print_result(result)
+
+    entry = dict(result, scenario=scenario, commit=git_commit(),
+                 recorded_at=datetime.now().isoformat(timespec='seconds'), python=sys.version.split()[0])
+    baseline = find_baseline(history, scenario)
+    exit_code = 0
+    if args.command == 'baseline' or baseline is None:
+        entry['baseline'] = True
+        print(f"📌 Recorded as the baseline for {scenario}")
+    else:
+        regressions = compare(result, baseline, args.max_throughput_drop, args.max_latency_increase,
+                              args.max_memory_increase, args.min_latency_delta_ms)
+        entry['regressions'] = regressions
+        if regressions:
+            print(f"\n🚨 PERFORMANCE REGRESSION against baseline {baseline.get('commit')} ({baseline['recorded_at']}):")
+            for regression in regressions:
+                print(f"  ✗ {regression}")
+            exit_code = 1
+        else:
+            print(f"✅ Within thresholds of baseline {baseline.get('commit')} ({baseline['recorded_at']})")
+
+    if not args.no_record:
+        append_history(args.history, entry)
+    sys.exit(exit_code)
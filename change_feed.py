@@ -0,0 +1,238 @@
+import glob
+import json
+import os
+import re
+from datetime import datetime
+
+from listing_identity import listing_key
+
+# Fields that differ on every run and say nothing about the listing itself
+VOLATILE_FIELDS = {'scraped_at', 'url'}
+
+# List fields collected as sets; their order carries no meaning
+UNORDERED_FIELDS = {'interior_features', 'other_rooms', 'appliances'}
+
+SNAPSHOT_STATE_FILE = "snapshot_latest.json"
+
+# Consecutive complete runs (full target, no deadline cut) a listing must be missing from before it counts as removed
+REMOVE_AFTER_MISSED_RUNS = 3
+
+
+def parse_price(value):
+    """'$525,000' -> 525000; anything unparseable -> None"""
+    if not isinstance(value, str):
+        return None
+    digits = re.sub(r'[^\d.]', '', value)
+    try:
+        return int(float(digits)) if digits else None
+    except ValueError:
+        return None
+
+
+def canonical_record(record):
+    """The record with its unordered list fields sorted, so equal data compares and serializes equal"""
+    canonical = dict(record)
+    for field in UNORDERED_FIELDS:
+        if isinstance(canonical.get(field), list):
+            canonical[field] = sorted(canonical[field], key=str)
+    return canonical
+
+
+def listing_status(record):
+    """Most recent price-history event (e.g. 'Listed for sale', 'Pending'), if any"""
+    if 'status' in record:
+        return record['status']
+    history = record.get('property_history')
+    if isinstance(history, list) and history:
+        return history[0].get('event', 'N/A')
+    return 'N/A'
+
+
+def index_records(records):
+    """Keyed index so each lookup during the diff is O(1)"""
+    index = {}
+    for record in records:
+        index[listing_key(record)] = record
+    return index
+
+
+def diff_fields(old, new):
+    """Field-level differences between two versions of the same listing"""
+    old, new = canonical_record(old), canonical_record(new)
+    changes = {}
+    for field in sorted(set(old) | set(new)):
+        if field in VOLATILE_FIELDS:
+            continue
+        old_value = old.get(field, 'N/A')
+        new_value = new.get(field, 'N/A')
+        if old_value != new_value:
+            changes[field] = {'from': old_value, 'to': new_value}
+    return changes
+
+
+def missing_listings(previous, current, gone_urls=None, missed_runs=None, complete=False,
+                     remove_after=REMOVE_AFTER_MISSED_RUNS):
+    """Previous listings absent from this run: (removed keys, key -> consecutive missed runs for the rest).
+
+    Delisted homes drop out of the search results rather than showing up as
+    dead pages, so a listing is removed once it has been missing from
+    remove_after complete runs in a row, or at once if its detail page was
+    seen gone (off-market or 404, gone_urls). A run that stopped short of
+    its target may simply not have got to a listing, so it doesn't count.
+    """
+    gone = {listing_key({'url': url}) for url in gone_urls or []}
+    missed_runs = missed_runs or {}
+    removed, still_missing = set(), {}
+    for key in previous:
+        if key in current:
+            continue
+        missed = missed_runs.get(key, 0) + (1 if complete else 0)
+        if key in gone or missed >= remove_after:
+            removed.add(key)
+        else:
+            still_missing[key] = missed
+    return removed, still_missing
+
+
+def build_change_feed(previous_records, current_records, previous_source=None, gone_urls=None, missed_runs=None,
+                      last_seen=None, complete=False, remove_after=REMOVE_AFTER_MISSED_RUNS):
+    """Compare two snapshots keyed by listing ID and describe what changed (see missing_listings for removals)"""
+    previous = index_records(previous_records)
+    current = index_records(current_records)
+    removed, still_missing = missing_listings(previous, current, gone_urls, missed_runs, complete, remove_after)
+    last_seen = last_seen or {}
+
+    changes = []
+    counts = {'new': 0, 'removed': 0, 'changed': 0, 'price_changed': 0, 'status_changed': 0, 'unchanged': 0,
+              'not_seen': 0}
+
+    for key, record in current.items():
+        old = previous.get(key)
+        if old is None:
+            counts['new'] += 1
+            changes.append({
+                'listing_id': key, 'change': 'new', 'url': record.get('url'),
+                'address': record.get('address'), 'price': record.get('price'),
+                'status': listing_status(record)
+            })
+            continue
+
+        fields = diff_fields(old, record)
+        if not fields:
+            counts['unchanged'] += 1
+            continue
+
+        counts['changed'] += 1
+        entry = {'listing_id': key, 'change': 'changed', 'url': record.get('url'),
+                 'address': record.get('address'), 'fields': fields}
+
+        if 'price' in fields:
+            counts['price_changed'] += 1
+            entry['price_change'] = dict(fields['price'])
+            old_price, new_price = parse_price(old.get('price')), parse_price(record.get('price'))
+            if old_price is not None and new_price is not None:
+                entry['price_change']['delta'] = new_price - old_price
+
+        old_status, new_status = listing_status(old), listing_status(record)
+        if old_status != new_status:
+            counts['status_changed'] += 1
+            entry['status_change'] = {'from': old_status, 'to': new_status}
+
+        changes.append(entry)
+
+    counts['not_seen'] = len(still_missing)
+    for key, old in previous.items():
+        if key not in removed:
+            continue
+        counts['removed'] += 1
+        changes.append({
+            'listing_id': key, 'change': 'removed', 'url': old.get('url'),
+            'address': old.get('address'), 'price': old.get('price'),
+            'last_seen': last_seen.get(key) or old.get('scraped_at')
+        })
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'previous_snapshot': previous_source,
+        'counts': counts,
+        'changes': changes
+    }
+
+
+def find_previous_snapshot(city_output_dir, exclude=None):
+    """The snapshot to diff against: the rolling state file, else the newest full JSON dump"""
+    state_file = os.path.join(city_output_dir, SNAPSHOT_STATE_FILE)
+    if os.path.exists(state_file):
+        return state_file
+
+    dumps = [path for path in glob.glob(os.path.join(city_output_dir, "zillow_q*.json"))
+             if not exclude or os.path.abspath(path) != os.path.abspath(exclude)]
+    if not dumps:
+        return None
+    return max(dumps, key=os.path.getmtime)
+
+
+def load_snapshot(path):
+    if not path:
+        return []
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read previous snapshot {path}: {e}")
+        return []
+
+
+def load_state(path):
+    """(records, key -> last seen, key -> consecutive missed runs); full JSON dumps and
+    older state files are plain record lists"""
+    snapshot = load_snapshot(path)
+    if isinstance(snapshot, dict):
+        return snapshot.get('listings', []), snapshot.get('last_seen', {}), snapshot.get('missed_runs', {})
+    return snapshot, {}, {}
+
+
+def roll_state(previous_records, current_records, seen_at, gone_urls=None, last_seen=None, missed_runs=None,
+               complete=False, remove_after=REMOVE_AFTER_MISSED_RUNS):
+    """Next state: this run's records plus earlier listings still missing but not yet removed"""
+    previous = index_records(previous_records)
+    current = index_records(current_records)
+    removed, still_missing = missing_listings(previous, current, gone_urls, missed_runs, complete, remove_after)
+    last_seen = last_seen or {}
+    listings = list(current.values()) + [previous[key] for key in still_missing]
+    seen = {key: seen_at for key in current}
+    seen.update({key: last_seen.get(key) or previous[key].get('scraped_at') for key in still_missing})
+    return {
+        'listings': listings,
+        'last_seen': seen,
+        'missed_runs': {key: missed for key, missed in still_missing.items() if missed},
+    }
+
+
+def write_change_feed(city_output_dir, current_records, filename_prefix, exclude=None, gone_urls=None,
+                      complete=False, remove_after=REMOVE_AFTER_MISSED_RUNS):
+    """Diff the current run against the previous snapshot, write the feed, and roll the state file forward.
+
+    complete says whether the run reached its full target without a deadline cut;
+    only such runs count towards removing listings that are no longer listed.
+    """
+    previous_path = find_previous_snapshot(city_output_dir, exclude=exclude)
+    previous_records, last_seen, missed_runs = load_state(previous_path)
+    feed = build_change_feed(previous_records, current_records, gone_urls=gone_urls, missed_runs=missed_runs,
+                             last_seen=last_seen, complete=complete, remove_after=remove_after,
+                             previous_source=os.path.basename(previous_path) if previous_path else None)
+
+    feed_file = os.path.join(city_output_dir, f"{filename_prefix}.json")
+    with open(feed_file, 'w') as f:
+        json.dump(feed, f, indent=2)
+
+    state = roll_state(previous_records, current_records, feed['generated_at'], gone_urls=gone_urls,
+                       last_seen=last_seen, missed_runs=missed_runs, complete=complete, remove_after=remove_after)
+    with open(os.path.join(city_output_dir, SNAPSHOT_STATE_FILE), 'w') as f:
+        json.dump(state, f, indent=2)
+
+    counts = feed['counts']
+    print(f"🔁 Change feed: {counts['new']} new, {counts['removed']} removed, "
+          f"{counts['price_changed']} price changes, {counts['status_changed']} status changes "
+          f"({counts['unchanged']} unchanged, {counts['not_seen']} not seen) -> {feed_file}")
+    return feed_file, feed
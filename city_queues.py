@@ -1,3 +1,6 @@
+import json
+from urllib.parse import urlsplit, urlunsplit, parse_qs, quote
+
 city_queues = {
 1: [("middlesex-county-ma", 750, "https://www.zillow.com/middlesex-county-ma/?searchQueryState=%7B%22pagination%22%3A%7B%7D%2C%22isMapVisible%22%3Atrue%2C%22mapBounds%22%3A%7B%22west%22%3A-72.11103208691407%2C%22east%22%3A-70.80777891308594%2C%22south%22%3A42.013380592861715%2C%22north%22%3A42.87776941681747%7D%2C%22regionSelection%22%3A%5B%7B%22regionId%22%3A2801%2C%22regionType%22%3A4%7D%5D%2C%22filterState%22%3A%7B%22sort%22%3A%7B%22value%22%3A%22globalrelevanceex%22%7D%7D%2C%22isListVisible%22%3Atrue%7D"),
     ("cambridge-ma", 150, "https://www.zillow.com/cambridge-ma/?searchQueryState=%7B%22pagination%22%3A%7B%7D%2C%22isMapVisible%22%3Atrue%2C%22mapBounds%22%3A%7B%22west%22%3A-71.19366682336425%2C%22east%22%3A-71.03076017663574%2C%22south%22%3A42.32428902258168%2C%22north%22%3A42.43245615625035%7D%2C%22regionSelection%22%3A%5B%7B%22regionId%22%3A3934%2C%22regionType%22%3A6%7D%5D%2C%22filterState%22%3A%7B%22sort%22%3A%7B%22value%22%3A%22globalrelevanceex%22%7D%7D%2C%22isListVisible%22%3Atrue%2C%22mapZoom%22%3A13%7D"),
@@ -44,6 +47,9 @@ city_queues = {
     ("north-adams-ma", 50, "https://www.zillow.com/north-adams-ma/?searchQueryState=%7B%22pagination%22%3A%7B%7D%2C%22isMapVisible%22%3Atrue%2C%22mapBounds%22%3A%7B%22west%22%3A-73.19974532336425%2C%22east%22%3A-73.03683867663574%2C%22south%22%3A42.629672927898845%2C%22north%22%3A42.73731294255138%7D%2C%22regionSelection%22%3A%5B%7B%22regionId%22%3A56340%2C%22regionType%22%3A6%7D%5D%2C%22filterState%22%3A%7B%22sort%22%3A%7B%22value%22%3A%22globalrelevanceex%22%7D%7D%2C%22isListVisible%22%3Atrue%2C%22mapZoom%22%3A13%7D")]
     }
 
+# Per-queue field groups (see zillow.FIELD_GROUPS), e.g. {8: "core,features,scores"}.
+# Queues not listed use the FIELDS environment variable, or every group.
+queue_fields = {}
 
 def get_queue_summary():
     """Print summary of all queues"""
@@ -61,3 +67,15 @@ def get_queue(queue_number):
 def get_all_queues():
     """Get all queues"""
     return city_queues
+
+def parse_search_state(search_url):
+    """Decode the searchQueryState JSON (mapBounds, regionSelection, ...) from a search URL"""
+    query = parse_qs(urlsplit(search_url).query)
+    raw_state = query.get('searchQueryState', ['{}'])[0]
+    return json.loads(raw_state)
+
+def with_search_state(search_url, state):
+    """Return search_url with its searchQueryState replaced by state"""
+    parts = urlsplit(search_url)
+    encoded = quote(json.dumps(state, separators=(',', ':')), safe='')
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, f"searchQueryState={encoded}", parts.fragment))
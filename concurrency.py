@@ -0,0 +1,278 @@
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from page_classifier import CHALLENGE, classify_page
+
+# Page-load outcomes fed to the controller
+OK = 'ok'
+BLOCK = 'block'
+TIMEOUT = 'timeout'
+
+# EWMA weight of the newest latency sample
+LATENCY_ALPHA = 0.2
+# Samples before latency is trusted for decisions
+WARMUP_SAMPLES = 5
+# The healthy baseline creeps up this much per sample so a slower night doesn't pin it forever
+BASELINE_DRIFT = 1.002
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease limit on concurrent page loads.
+
+    Workers hold a slot() around each page; at most `limit` run at once and
+    the rest wait. After limit * successes_per_step healthy loads in a row
+    the limit grows by one; a block page, a timeout, or smoothed latency
+    above latency_factor x the healthy baseline cuts it by decrease_factor.
+    Cuts are at most one per cooldown so one burst of blocks isn't punished
+    several times. Every change is logged (and appended to log_path as
+    JSON lines) for tuning.
+    """
+
+    def __init__(self, min_limit=1, max_limit=4, initial=None, successes_per_step=5, decrease_factor=0.5,
+                 latency_factor=1.5, cooldown=30, log_path=None):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = initial or min_limit
+        self.successes_per_step = successes_per_step
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.log_path = log_path
+
+        self.condition = threading.Condition()
+        self.active = 0
+        self.samples = 0
+        self.latency = None
+        self.baseline = None
+        self.healthy_streak = 0
+        self.last_cut = 0.0
+        self.decisions = []
+        self.stats = {'pages': 0, 'blocks': 0, 'timeouts': 0, 'increases': 0, 'decreases': 0, 'wait_seconds': 0.0}
+
+    @contextmanager
+    def slot(self):
+        started = time.time()
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active += 1
+            self.stats['wait_seconds'] += time.time() - started
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.active -= 1
+                self.condition.notify_all()
+
+    def record(self, latency=None, outcome=OK):
+        """Feed one page load: its latency in seconds and OK, BLOCK or TIMEOUT"""
+        with self.condition:
+            self.stats['pages'] += 1
+            if outcome == BLOCK:
+                self.stats['blocks'] += 1
+                self._decrease('block page')
+                return
+            if outcome == TIMEOUT:
+                self.stats['timeouts'] += 1
+                self._decrease('timeout')
+                return
+
+            if latency is not None:
+                self.samples += 1
+                self.latency = latency if self.latency is None else \
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * self.latency
+                if self.samples >= WARMUP_SAMPLES:
+                    self.baseline = self.latency if self.baseline is None else \
+                        min(self.baseline * BASELINE_DRIFT, self.latency)
+                    if self.latency > self.baseline * self.latency_factor:
+                        self._decrease(f"latency {self.latency:.1f}s vs baseline {self.baseline:.1f}s")
+                        return
+
+            self.healthy_streak += 1
+            if self.healthy_streak >= self.limit * self.successes_per_step and self.limit < self.max_limit:
+                self.limit += 1
+                self.stats['increases'] += 1
+                self._log('increase', f"{self.healthy_streak} healthy loads")
+                self.healthy_streak = 0
+                self.condition.notify_all()
+
+    def _decrease(self, reason):
+        self.healthy_streak = 0
+        now = time.time()
+        if now - self.last_cut < self.cooldown:
+            return
+        self.last_cut = now
+        new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        if new_limit == self.limit:
+            self._log('hold', reason)
+            return
+        self.limit = new_limit
+        self.stats['decreases'] += 1
+        self._log('decrease', reason)
+
+    def _log(self, action, reason):
+        decision = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'action': action,
+            'reason': reason,
+            'limit': self.limit,
+            'active': self.active,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'baseline': round(self.baseline, 3) if self.baseline is not None else None,
+        }
+        self.decisions.append(decision)
+        print(f"  🎚️ Concurrency {action} -> {self.limit} ({reason})")
+        if self.log_path:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(decision) + "\n")
+
+
+class StandInSite:
+    """Local stand-in for the listing site with injected latency and blocks.
+
+    Pages take base_latency seconds, plus overload_latency for every request
+    in flight beyond capacity; beyond block_above concurrent requests each
+    request is blocked (403 challenge page) with probability block_rate.
+    """
+
+    def __init__(self, port=0, base_latency=0.3, capacity=3, overload_latency=0.5, block_above=5, block_rate=0.3):
+        self.base_latency = base_latency
+        self.capacity = capacity
+        self.overload_latency = overload_latency
+        self.block_above = block_above
+        self.block_rate = block_rate
+        self.lock = threading.Lock()
+        self.active = 0
+        self.stats = {'requests': 0, 'blocked': 0}
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site.lock:
+                    site.active += 1
+                    in_flight = site.active
+                    site.stats['requests'] += 1
+                try:
+                    blocked = in_flight > site.block_above and random.random() < site.block_rate
+                    time.sleep(site.base_latency * random.uniform(0.8, 1.2)
+                               + site.overload_latency * max(0, in_flight - site.capacity))
+                    if blocked:
+                        with site.lock:
+                            site.stats['blocked'] += 1
+                        status, body = 403, '<html><div id="px-captcha">Press &amp; Hold</div></html>'
+                    else:
+                        status, body = 200, f'<html><span data-testid="price">$500,000</span>{self.path}</html>'
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'text/html')
+                    self.end_headers()
+                    self.wfile.write(body.encode())
+                finally:
+                    with site.lock:
+                        site.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def fetch_page(url, timeout=10):
+    """(html, status) over plain HTTP, for driving the stand-in site"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.read().decode('utf-8', 'replace'), response.status
+    except urllib.error.HTTPError as e:
+        return e.read().decode('utf-8', 'replace'), e.code
+
+
+def simulate(controller, site_url, workers, seconds):
+    """Drive the stand-in with `workers` threads through the controller; returns pages loaded"""
+    deadline = time.time() + seconds
+    loaded = [0]
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        page = 0
+        while time.time() < deadline:
+            page += 1
+            with controller.slot():
+                started = time.time()
+                try:
+                    html, status = fetch_page(f"{site_url}/homedetails/{worker_id}-{page}_zpid/")
+                except OSError:
+                    controller.record(outcome=TIMEOUT)
+                    continue
+                outcome = BLOCK if classify_page(html, status=status) == CHALLENGE else OK
+                controller.record(time.time() - started, outcome)
+            if outcome == OK:
+                with lock:
+                    loaded[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return loaded[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exercise the adaptive concurrency controller against a local stand-in site")
+    parser.add_argument('command', choices=['simulate', 'standin'])
+    parser.add_argument('--port', type=int, default=0, help="stand-in port (0 = any free port)")
+    parser.add_argument('--seconds', type=float, default=60, help="how long to simulate")
+    parser.add_argument('--max-workers', type=int, default=8)
+    parser.add_argument('--fixed', type=int, help="compare against a fixed worker count instead")
+    parser.add_argument('--latency', type=float, default=0.3, help="stand-in base page latency")
+    parser.add_argument('--capacity', type=int, default=3, help="concurrent requests before latency climbs")
+    parser.add_argument('--block-above', type=int, default=5, help="concurrent requests before blocks start")
+    parser.add_argument('--block-rate', type=float, default=0.3)
+    parser.add_argument('--cooldown', type=float, default=5)
+    parser.add_argument('--log', help="append controller decisions to this JSON-lines file")
+    args = parser.parse_args()
+
+    site = StandInSite(port=args.port, base_latency=args.latency, capacity=args.capacity,
+                       block_above=args.block_above, block_rate=args.block_rate).start()
+    try:
+        if args.command == 'standin':
+            print(f"🧪 Stand-in site on {site.url} (Ctrl+C to stop)")
+            while True:
+                time.sleep(3600)
+
+        if args.fixed:
+            controller = AIMDController(min_limit=args.fixed, max_limit=args.fixed, initial=args.fixed,
+                                        cooldown=args.cooldown)
+            workers = args.fixed
+        else:
+            controller = AIMDController(max_limit=args.max_workers, cooldown=args.cooldown, log_path=args.log)
+            workers = args.max_workers
+        loaded = simulate(controller, site.url, workers, args.seconds)
+        print(f"\n📈 {loaded} pages in {args.seconds:.0f}s ({loaded / args.seconds:.1f}/s), final limit "
+              f"{controller.limit}, stand-in {site.stats}, controller {controller.stats}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.stop()
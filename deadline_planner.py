@@ -0,0 +1,156 @@
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime
+
+from city_queues import city_queues
+from queue_planner import DEFAULT_SECONDS_PER_PROPERTY, ENTRY_OVERHEAD_SECONDS, load_timing_history
+
+# The workflow's timeout-minutes, less checkout/setup before main.py and the commit step after it
+DEFAULT_BUDGET_MINUTES = 340
+# Kept free at the end for saving, the history index and closing browsers
+DEFAULT_RESERVE_MINUTES = 10
+# Every city that fits gets at least this many listings before any city gets more
+DEFAULT_MIN_QUOTA = 10
+# How far a city may overrun its planned time before it is cut so the rest still get theirs
+SLICE_SLACK = 1.5
+# Run time the historical rates count for, so one odd city doesn't swing the whole plan
+PRIOR_WEIGHT_SECONDS = 600
+
+
+def parse_priorities(spec):
+    """'boston-ma=3,revere-ma=0.5' -> {'boston-ma': 3.0, 'revere-ma': 0.5}; unlisted cities weigh 1"""
+    priorities = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            city, weight = item.split('=', 1)
+            priorities[city.strip()] = float(weight)
+    return priorities
+
+
+def parse_deadline(value):
+    """Epoch seconds from an ISO timestamp (local time unless it carries an offset)"""
+    return datetime.fromisoformat(value).timestamp()
+
+
+class DeadlinePlanner:
+    """Fits the rest of a queue run into the time left before a wall-clock deadline.
+
+    Before each city the remaining entries are re-planned: every city that
+    fits gets its minimum quota (highest priority first), then the time left
+    is shared out by priority weight, never beyond a city's original target.
+    Seconds per property start from past run summaries and are scaled by how
+    fast this run has actually been going, so a slow night shrinks the later
+    targets instead of leaving the last cities with nothing.
+    """
+
+    def __init__(self, deadline, timings=None, priorities=None, min_quota=DEFAULT_MIN_QUOTA,
+                 reserve_seconds=DEFAULT_RESERVE_MINUTES * 60):
+        self.deadline = deadline
+        self.stop_at = deadline - reserve_seconds
+        self.timings = timings or {}
+        self.fallback = statistics.median(self.timings.values()) if self.timings else DEFAULT_SECONDS_PER_PROPERTY
+        self.priorities = priorities or {}
+        self.min_quota = min_quota
+        self.observed_seconds = 0.0
+        self.predicted_seconds = 0.0
+        self.replans = 0
+        self.cuts = []
+
+    def priority(self, city):
+        return self.priorities.get(city, 1.0)
+
+    def speed_factor(self):
+        """Observed / predicted time for the cities done so far, pulled toward 1 early on"""
+        return (self.observed_seconds + PRIOR_WEIGHT_SECONDS) / (self.predicted_seconds + PRIOR_WEIGHT_SECONDS)
+
+    def seconds_per_property(self, city):
+        return self.timings.get(city, self.fallback) * self.speed_factor()
+
+    def seconds_left(self, now=None):
+        return self.stop_at - (now or time.time())
+
+    def expired(self, now=None):
+        return self.seconds_left(now) <= 0
+
+    def observe(self, city, properties, seconds):
+        """A finished city: its properties and wall time, overhead included"""
+        self.observed_seconds += seconds
+        self.predicted_seconds += ENTRY_OVERHEAD_SECONDS + properties * self.timings.get(city, self.fallback)
+
+    def plan(self, entries, now=None):
+        """Targets for the remaining (city, max_properties, url) entries that fit before the stop time"""
+        self.replans += 1
+        budget = self.seconds_left(now)
+        costs = [self.seconds_per_property(city) for city, _, _ in entries]
+        # sorted() is stable, so equal priorities keep queue order
+        order = sorted(range(len(entries)), key=lambda i: -self.priority(entries[i][0]))
+        targets = [0] * len(entries)
+
+        for i in order:
+            quota = min(self.min_quota, entries[i][1])
+            cost = ENTRY_OVERHEAD_SECONDS + quota * costs[i]
+            if cost <= budget:
+                targets[i] = quota
+                budget -= cost
+
+        active = [i for i in order if 0 < targets[i] < entries[i][1]]
+        while active and budget > 0:
+            weights = sum(self.priority(entries[i][0]) for i in active)
+            spent = 0.0
+            for i in active:
+                share = budget * self.priority(entries[i][0]) / weights
+                extra = min(entries[i][1] - targets[i], int(share // costs[i]))
+                targets[i] += extra
+                spent += extra * costs[i]
+            if not spent:
+                break
+            budget -= spent
+            active = [i for i in active if targets[i] < entries[i][1]]
+        return targets
+
+    def city_deadline(self, city, target, now=None):
+        """When the current city must stop: its planned slice with some slack, never past the stop time"""
+        now = now or time.time()
+        planned = ENTRY_OVERHEAD_SECONDS + target * self.seconds_per_property(city)
+        return min(self.stop_at, now + planned * SLICE_SLACK)
+
+    def record_cut(self, city, target, actual):
+        self.cuts.append({'city': city, 'target': target, 'actual': actual})
+
+    def summary(self):
+        return {
+            'deadline': datetime.fromtimestamp(self.deadline).isoformat(timespec='seconds'),
+            'speed_factor': round(self.speed_factor(), 2),
+            'replans': self.replans,
+            'cities_cut': self.cuts,
+        }
+
+
+def print_allocation(planner, entries, targets):
+    minutes = planner.seconds_left() / 60
+    print(f"⏰ {minutes:.0f} min left before the stop time; running at {planner.speed_factor():.2f}x the usual pace")
+    for (city, original, _), target in zip(entries, targets):
+        note = "" if target == original else f" (planned {original})"
+        note += "" if planner.priority(city) == 1.0 else f" [priority {planner.priority(city):g}]"
+        print(f"  • {city}: {target}{note} at ~{planner.seconds_per_property(city):.0f}s/prop")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preview how a queue's targets fit into a time budget")
+    parser.add_argument('--queue', type=int, default=2)
+    parser.add_argument('--data-dir', default=os.getenv('OUTPUT_DIR', 'data'), help="where past run summaries live")
+    parser.add_argument('--budget-minutes', type=float, default=DEFAULT_BUDGET_MINUTES)
+    parser.add_argument('--reserve-minutes', type=float, default=DEFAULT_RESERVE_MINUTES)
+    parser.add_argument('--min-quota', type=int, default=DEFAULT_MIN_QUOTA)
+    parser.add_argument('--priorities', default=os.getenv('CITY_PRIORITIES'), help="e.g. boston-ma=3,revere-ma=0.5")
+    args = parser.parse_args()
+
+    entries = city_queues.get(args.queue, city_queues[1])
+    planner = DeadlinePlanner(time.time() + args.budget_minutes * 60, timings=load_timing_history(args.data_dir),
+                              priorities=parse_priorities(args.priorities), min_quota=args.min_quota,
+                              reserve_seconds=args.reserve_minutes * 60)
+    targets = planner.plan(entries)
+    print_allocation(planner, entries, targets)
+    print(f"\n{sum(targets)}/{sum(count for _, count, _ in entries)} properties fit in {args.budget_minutes:.0f} minutes")
@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+DEFAULT_MAX_ENTRIES = 25
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+class DebugCapture:
+    """Failure artifacts (screenshot, HTML, timings) kept in a bounded ring buffer.
+
+    Nothing is captured on the happy path; the scraper calls capture() when
+    an extractor raises, a block/error page comes back, or a scrape stops
+    early. Only the newest max_entries captures are kept on disk, and once
+    max_bytes have been written in this run further captures are dropped.
+    """
+
+    def __init__(self, directory, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = deque()
+        self.bytes_written = 0
+        self.sequence = 0
+        self.stats = {'captured': 0, 'evicted': 0, 'dropped': 0}
+        # Tile workers share one capture
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Earlier runs' captures count toward the ring, oldest first (names start with a timestamp)
+        for name in sorted(os.listdir(directory)):
+            if os.path.isdir(os.path.join(directory, name)):
+                self.entries.append(os.path.join(directory, name))
+
+    def capture(self, driver, reason, url=None, error=None, timings=None, html=None):
+        """Save one failure; returns its directory, or None once the run's byte budget is spent"""
+        with self.lock:
+            return self._capture(driver, reason, url, error, timings, html)
+
+    def _capture(self, driver, reason, url, error, timings, html):
+        if self.bytes_written >= self.max_bytes:
+            self.stats['dropped'] += 1
+            return None
+
+        started = time.time()
+        self.sequence += 1
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        entry_dir = os.path.join(self.directory, f"{stamp}_{self.sequence:04d}_{reason}")
+        os.makedirs(entry_dir, exist_ok=True)
+
+        artifacts = {}
+        if html is None:
+            try:
+                html = driver.page_source
+            except Exception:
+                html = None
+        if html:
+            artifacts['page.html'] = html.encode('utf-8', 'replace')
+        if driver is not None and not getattr(driver, 'is_static', False):
+            try:
+                artifacts['screenshot.png'] = driver.get_screenshot_as_png()
+            except Exception:
+                pass
+
+        size = 0
+        for name, content in artifacts.items():
+            with open(os.path.join(entry_dir, name), 'wb') as f:
+                f.write(content)
+            size += len(content)
+
+        if url is None:
+            try:
+                url = driver.current_url
+            except Exception:
+                pass
+        record = {
+            'reason': reason,
+            'url': url,
+            'captured_at': datetime.now().isoformat(),
+            'error': repr(error) if error is not None else None,
+            'traceback': ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+                         if isinstance(error, BaseException) else None,
+            'timings': {key: round(value, 3) for key, value in (timings or {}).items()},
+            'capture_seconds': round(time.time() - started, 3),
+            'artifacts': sorted(artifacts),
+        }
+        meta = json.dumps(record, indent=2).encode('utf-8')
+        with open(os.path.join(entry_dir, 'meta.json'), 'wb') as f:
+            f.write(meta)
+        size += len(meta)
+
+        self.bytes_written += size
+        self.entries.append(entry_dir)
+        self.stats['captured'] += 1
+        while len(self.entries) > self.max_entries:
+            shutil.rmtree(self.entries.popleft(), ignore_errors=True)
+            self.stats['evicted'] += 1
+
+        print(f"  🐞 Debug capture ({reason}) saved to {entry_dir}")
+        return entry_dir
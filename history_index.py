@@ -0,0 +1,360 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from change_feed import listing_status
+from listing_identity import listing_key
+from normalize import to_money, to_number
+from queue_planner import CITY_COUNTIES
+
+# Outside data/: the index is binary, changes every run and can be rebuilt from data/ by ingest
+DEFAULT_DB = os.getenv('HISTORY_DB', 'history.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    kind TEXT NOT NULL,
+    records INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    listing_id TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    queue_id INTEGER,
+    city TEXT,
+    county TEXT,
+    address TEXT,
+    price INTEGER,
+    beds REAL,
+    baths REAL,
+    sqft INTEGER,
+    status TEXT,
+    url TEXT,
+    source_file TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (listing_id, scraped_at)
+);
+CREATE INDEX IF NOT EXISTS snapshots_address ON snapshots (address);
+CREATE INDEX IF NOT EXISTS snapshots_city_date ON snapshots (city, scraped_at);
+CREATE INDEX IF NOT EXISTS snapshots_county_date ON snapshots (county, scraped_at);
+CREATE INDEX IF NOT EXISTS snapshots_price ON snapshots (price);
+CREATE TABLE IF NOT EXISTS listings (
+    listing_id TEXT PRIMARY KEY,
+    address TEXT,
+    city TEXT,
+    county TEXT,
+    price INTEGER,
+    beds REAL,
+    baths REAL,
+    sqft INTEGER,
+    status TEXT,
+    url TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS listings_address ON listings (address);
+CREATE INDEX IF NOT EXISTS listings_county_price ON listings (county, price);
+CREATE INDEX IF NOT EXISTS listings_city_price ON listings (city, price);
+CREATE TABLE IF NOT EXISTS runs (
+    summary_file TEXT PRIMARY KEY,
+    queue_id INTEGER,
+    city TEXT,
+    timestamp TEXT,
+    target_properties INTEGER,
+    actual_properties INTEGER,
+    duration_seconds REAL,
+    json_file TEXT
+);
+-- OUTPUT_MODE=store keeps unchanged listings' lines (and scraped_at) as they were,
+-- so the runs that saw them are recorded here from each run summary's seen_listings
+CREATE TABLE IF NOT EXISTS sightings (
+    listing_id TEXT NOT NULL,
+    seen_at TEXT NOT NULL,
+    PRIMARY KEY (listing_id, seen_at)
+);
+"""
+
+# Scrape output is zillow_q<N>_<city>_..._<timestamp>.json (or zillow_<city>_error_partial_...);
+# change feeds, typed CSVs and the rolling snapshot are derived from these and skipped
+OUTPUT_PATTERN = "zillow_*.json"
+SUMMARY_PATTERN = "summary_q*.json"
+# OUTPUT_MODE=store: one listing per line, rewritten in place (see snapshot_store.py)
+STORE_PATTERN = "listings.jsonl"
+
+LISTING_UPSERT = """
+INSERT INTO listings (listing_id, address, city, county, price, beds, baths, sqft, status, url, first_seen, last_seen)
+VALUES (:listing_id, :address, :city, :county, :price, :beds, :baths, :sqft, :status, :url, :scraped_at, :scraped_at)
+ON CONFLICT (listing_id) DO UPDATE SET
+    first_seen = MIN(first_seen, excluded.first_seen),
+    address = CASE WHEN excluded.last_seen >= last_seen THEN excluded.address ELSE address END,
+    city = CASE WHEN excluded.last_seen >= last_seen THEN excluded.city ELSE city END,
+    county = CASE WHEN excluded.last_seen >= last_seen THEN excluded.county ELSE county END,
+    price = CASE WHEN excluded.last_seen >= last_seen THEN excluded.price ELSE price END,
+    beds = CASE WHEN excluded.last_seen >= last_seen THEN excluded.beds ELSE beds END,
+    baths = CASE WHEN excluded.last_seen >= last_seen THEN excluded.baths ELSE baths END,
+    sqft = CASE WHEN excluded.last_seen >= last_seen THEN excluded.sqft ELSE sqft END,
+    status = CASE WHEN excluded.last_seen >= last_seen THEN excluded.status ELSE status END,
+    url = CASE WHEN excluded.last_seen >= last_seen THEN excluded.url ELSE url END,
+    last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+
+def city_from_dir(dir_name):
+    """Output directory name back to the queue slug: 'great_barrington' -> 'great-barrington-ma'"""
+    return dir_name.replace('_', '-') + '-ma'
+
+
+def county_for(city):
+    if city.endswith('-county-ma'):
+        return city
+    return CITY_COUNTIES.get(city)
+
+
+def file_timestamp(path, stat):
+    """Timestamp embedded in an output file name, else the file's mtime"""
+    stamps = re.findall(r'(\d{8}_\d{6})', os.path.basename(path))
+    if stamps:
+        return datetime.strptime(stamps[-1], "%Y%m%d_%H%M%S").isoformat()
+    return datetime.fromtimestamp(stat.st_mtime).isoformat()
+
+
+def summary_time(summary, path, stat):
+    """When the run behind a summary happened, from its timestamp field else the file name/mtime"""
+    try:
+        return datetime.strptime(summary['timestamp'], "%Y%m%d_%H%M%S").isoformat()
+    except (KeyError, TypeError, ValueError):
+        return file_timestamp(path, stat)
+
+
+def queue_from_path(path):
+    match = re.search(r'queue_(\d+)', path)
+    return int(match.group(1)) if match else None
+
+
+def _nullable(values, cast):
+    return [None if pd.isna(value) else cast(value) for value in values]
+
+
+def snapshot_rows(records, path, stat):
+    """One row per record, with the display strings parsed the same way as the typed CSV"""
+    city = city_from_dir(os.path.basename(os.path.dirname(path)))
+    fallback_time = file_timestamp(path, stat)
+    frame = pd.DataFrame({field: [record.get(field, 'N/A') for record in records]
+                          for field in ('price', 'beds', 'baths', 'sqft')}, dtype=object)
+    prices = _nullable(to_money(frame['price']), int)
+    beds = _nullable(to_number(frame['beds']), float)
+    baths = _nullable(to_number(frame['baths']), float)
+    sqft = _nullable(to_number(frame['sqft']), int)
+
+    rows = []
+    for i, record in enumerate(records):
+        address = record.get('address')
+        rows.append({
+            'listing_id': listing_key(record),
+            'scraped_at': record.get('scraped_at') or fallback_time,
+            'queue_id': queue_from_path(path),
+            'city': city,
+            'county': county_for(city),
+            'address': None if address in (None, 'N/A') else address,
+            'price': prices[i], 'beds': beds[i], 'baths': baths[i], 'sqft': sqft[i],
+            'status': listing_status(record),
+            'url': record.get('url'),
+            'source_file': path,
+            'data': json.dumps(record, sort_keys=True),
+        })
+    return rows
+
+
+class HistoryIndex:
+    """SQLite index over every run's output under data/queue_N/<city>/.
+
+    Ingest is incremental: a file is only (re)read when its path is new or
+    its size/mtime changed since the last ingest. Every record becomes a
+    snapshot keyed by (listing, scraped_at); the listings table is upserted
+    so it always holds the latest known state of each listing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def pending_files(self, data_dir):
+        known = {row['path']: (row['size'], row['mtime'])
+                 for row in self.conn.execute("SELECT path, size, mtime FROM files")}
+        found = []
+        # Summaries last: their sightings update listings the output files have just added
+        for kind, pattern in (('output', OUTPUT_PATTERN), ('store', STORE_PATTERN), ('summary', SUMMARY_PATTERN)):
+            for path in sorted(glob.glob(os.path.join(data_dir, "queue_*", "*", pattern))):
+                # Keyed relative to data_dir so absolute and relative invocations agree
+                path = os.path.relpath(path, data_dir)
+                stat = os.stat(os.path.join(data_dir, path))
+                if known.get(path) != (stat.st_size, stat.st_mtime):
+                    found.append((kind, path, stat))
+        return found
+
+    def ingest(self, data_dir):
+        """Read output and summary files added or changed since the last ingest"""
+        totals = {'files': 0, 'snapshots': 0, 'runs': 0, 'skipped': 0}
+        for kind, path, stat in self.pending_files(data_dir):
+            try:
+                with open(os.path.join(data_dir, path)) as f:
+                    if kind == 'store':
+                        payload = [json.loads(line) for line in f if line.strip()]
+                    else:
+                        payload = json.load(f)
+            except (OSError, ValueError) as e:
+                # Probably still being written; the next ingest retries it
+                print(f"⚠️ Skipping {path}: {e}")
+                totals['skipped'] += 1
+                continue
+
+            with self.conn:
+                if kind in ('output', 'store'):
+                    records = [record for record in payload if isinstance(record, dict)]
+                    rows = snapshot_rows(records, path, stat)
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO snapshots VALUES (:listing_id, :scraped_at, :queue_id, :city, :county, "
+                        ":address, :price, :beds, :baths, :sqft, :status, :url, :source_file, :data)", rows)
+                    self.conn.executemany(LISTING_UPSERT, rows)
+                    count = len(rows)
+                    totals['snapshots'] += count
+                else:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (path, payload.get('queue_id'), payload.get('city'), payload.get('timestamp'),
+                         payload.get('target_properties'), payload.get('actual_properties'),
+                         payload.get('duration_seconds'), payload.get('json_file')))
+                    count = 1
+                    totals['runs'] += 1
+                    if payload.get('seen_listings'):
+                        self.record_sightings(payload['seen_listings'], summary_time(payload, path, stat))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime, kind, count, datetime.now().isoformat()))
+            totals['files'] += 1
+        return totals
+
+    def record_sightings(self, listing_ids, seen_at):
+        rows = [(str(listing_id), seen_at) for listing_id in listing_ids]
+        self.conn.executemany("INSERT OR IGNORE INTO sightings VALUES (?, ?)", rows)
+        self.conn.executemany(
+            "UPDATE listings SET last_seen = MAX(last_seen, ?2) WHERE listing_id = ?1", rows)
+
+    def address_history(self, address):
+        """Every snapshot of listings whose address contains the given text, oldest first"""
+        return self.conn.execute(
+            "SELECT listing_id, scraped_at, city, address, price, beds, baths, sqft, status, source_file "
+            "FROM snapshots WHERE address LIKE ? ORDER BY listing_id, scraped_at",
+            (f"%{address}%",)
+        ).fetchall()
+
+    def search(self, city=None, county=None, min_price=None, max_price=None, beds=None, min_beds=None,
+               since=None, limit=100):
+        """Latest snapshot per listing among snapshots matching the filters"""
+        clauses, params = [], []
+        if city:
+            clauses.append("city LIKE ?")
+            params.append(f"%{city}%")
+        if county:
+            clauses.append("county LIKE ?")
+            params.append(f"%{county}%")
+        if min_price is not None:
+            clauses.append("price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            clauses.append("price <= ?")
+            params.append(max_price)
+        if beds is not None:
+            clauses.append("beds = ?")
+            params.append(beds)
+        if min_beds is not None:
+            clauses.append("beds >= ?")
+            params.append(min_beds)
+        if since:
+            clauses.append("scraped_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # SQLite returns the bare columns from the row holding MAX(scraped_at)
+        return self.conn.execute(
+            f"SELECT listing_id, MAX(scraped_at) AS scraped_at, city, county, address, price, beds, baths, sqft, status, url "
+            f"FROM snapshots {where} GROUP BY listing_id ORDER BY price LIMIT ?",
+            params + [limit]
+        ).fetchall()
+
+    def stats(self):
+        counts = {}
+        for table in ('files', 'snapshots', 'listings', 'runs'):
+            counts[table] = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        span = self.conn.execute("SELECT MIN(scraped_at), MAX(scraped_at) FROM snapshots").fetchone()
+        counts['first_scrape'], counts['last_scrape'] = span[0], span[1]
+        return counts
+
+
+def parse_since(value):
+    """'7d' / '12h' relative to now, or an ISO date"""
+    match = re.fullmatch(r'(\d+)([dh])', value or '')
+    if match:
+        amount = int(match.group(1))
+        delta = timedelta(days=amount) if match.group(2) == 'd' else timedelta(hours=amount)
+        return (datetime.now() - delta).isoformat()
+    return value
+
+
+def print_rows(rows):
+    if not rows:
+        print("No matches")
+        return
+    print(pd.DataFrame([dict(row) for row in rows]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental SQLite index over all scrape output")
+    parser.add_argument('command', choices=['ingest', 'address', 'search', 'sql', 'stats'])
+    parser.add_argument('query', nargs='?', help="address text (address) or a SELECT statement (sql)")
+    parser.add_argument('--data-dir', default=os.getenv('OUTPUT_DIR', 'data'), help="root of the queue_N output")
+    parser.add_argument('--db', default=DEFAULT_DB, help="index file (HISTORY_DB, default history.sqlite)")
+    parser.add_argument('--city')
+    parser.add_argument('--county', help="e.g. berkshire")
+    parser.add_argument('--min-price', type=int)
+    parser.add_argument('--max-price', type=int)
+    parser.add_argument('--beds', type=float)
+    parser.add_argument('--min-beds', type=float)
+    parser.add_argument('--since', help="7d, 12h or an ISO date")
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    index = HistoryIndex(args.db)
+    try:
+        if args.command == 'ingest':
+            totals = index.ingest(args.data_dir)
+            print(f"📥 Ingested {totals['files']} files: {totals['snapshots']} snapshots, "
+                  f"{totals['runs']} run summaries, {totals['skipped']} skipped")
+        elif args.command == 'address':
+            if not args.query:
+                parser.error("address needs the address text")
+            print_rows(index.address_history(args.query))
+        elif args.command == 'search':
+            print_rows(index.search(city=args.city, county=args.county, min_price=args.min_price,
+                                    max_price=args.max_price, beds=args.beds, min_beds=args.min_beds,
+                                    since=parse_since(args.since), limit=args.limit))
+        elif args.command == 'sql':
+            if not args.query:
+                parser.error("sql needs a query")
+            print_rows(index.conn.execute(args.query).fetchall())
+        else:
+            print(json.dumps(index.stats(), indent=2))
+    finally:
+        index.close()
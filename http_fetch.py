@@ -0,0 +1,128 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import urllib3
+
+
+class HttpPageFetcher:
+    """Fetch detail pages over pooled keep-alive HTTP, borrowing a browser session's identity.
+
+    The cookies and user agent come from an established Chrome session so the
+    requests look like they belong to it. Cookies set by responses are merged
+    back in, keeping the session current across fetches.
+    """
+
+    def __init__(self, user_agent, cookies=None, pool_size=4, timeout=15, retries=2):
+        self.user_agent = user_agent
+        self.cookies = dict(cookies or {})
+        self.pool = urllib3.PoolManager(
+            num_pools=2,
+            maxsize=pool_size,
+            block=True,
+            timeout=urllib3.Timeout(connect=5, read=timeout),
+            retries=urllib3.Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=(500, 502, 503, 504),
+                redirect=5,
+            ),
+        )
+        self.requests_made = 0
+
+    @classmethod
+    def from_driver(cls, driver, **kwargs):
+        """Build a fetcher from the live session's user agent and cookies"""
+        fetcher = cls(driver.execute_script("return navigator.userAgent;"), **kwargs)
+        fetcher.refresh_cookies(driver)
+        return fetcher
+
+    def refresh_cookies(self, driver):
+        """Re-import cookies from the browser, e.g. after it passed a challenge"""
+        for cookie in driver.get_cookies():
+            self.cookies[cookie['name']] = cookie['value']
+
+    def build_headers(self):
+        headers = {
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Connection': 'keep-alive',
+        }
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{name}={value}" for name, value in self.cookies.items())
+        return headers
+
+    def fetch(self, url):
+        """GET a page. Returns (status, html); status is None if the request itself failed."""
+        try:
+            response = self.pool.request('GET', url, headers=self.build_headers(), preload_content=True)
+        except urllib3.exceptions.HTTPError as e:
+            print(f"    ❌ HTTP fetch failed for {url}: {e}")
+            return None, ''
+
+        self.requests_made += 1
+        for set_cookie in response.headers.getlist('Set-Cookie'):
+            match = re.match(r'\s*([^=;\s]+)=([^;]*)', set_cookie)
+            if match:
+                self.cookies[match.group(1)] = match.group(2)
+
+        html = response.data.decode('utf-8', errors='replace')
+        return response.status, html
+
+    def close(self):
+        self.pool.clear()
+
+
+class StandInPages:
+    """Local stand-in for the listing site's detail pages, for exercising the HTTP fetch path.
+
+    pages maps a path to (status, body) or (status, body, headers), or to a
+    list of those served in turn (the last one repeats), e.g. two 503s then
+    a 200 to exercise retries. Bodies may be str or bytes; unknown paths get
+    a 404. Every request's path and headers are kept in `requests`, so tests
+    can check what the client sent (e.g. cookies).
+    """
+
+    def __init__(self, pages=None, port=0):
+        self.pages = dict(pages or {})
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler())
+        self.server.daemon_threads = True
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site.lock:
+                    site.requests.append({'path': self.path, 'headers': dict(self.headers)})
+                    response = site.pages.get(self.path, (404, '<html><h1>Page not found</h1></html>'))
+                    if isinstance(response, list):
+                        response = response.pop(0) if len(response) > 1 else response[0]
+                status, body, *extra = response
+                headers = extra[0] if extra else []
+                self.send_response(status)
+                if not any(name.lower() == 'content-type' for name, _ in headers):
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body if isinstance(body, bytes) else body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import urllib3
+
+INDEX_FILE = "index.json"
+
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/gif': '.gif',
+}
+
+
+class ImageDownloader:
+    """Background image stage fed with scraped image URLs.
+
+    Downloads run on a small thread pool sharing one pooled HTTP client, so
+    submit() returns immediately and page processing never waits on images.
+    Files are stored under their SHA-256, so the same picture reached via
+    different URLs is kept once, and an on-disk URL index lets later runs
+    skip URLs they already have.
+    """
+
+    def __init__(self, cache_dir, max_workers=4, max_retries=3, backoff_factor=0.5, timeout=20):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.pool = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=max_workers,
+            block=True,
+            timeout=urllib3.Timeout(connect=5, read=timeout),
+            retries=urllib3.Retry(
+                total=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=(429, 500, 502, 503, 504),
+                respect_retry_after_header=True,
+            ),
+            headers={'User-Agent': 'Mozilla/5.0 (compatible; image-cache)'},
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image")
+        self.lock = threading.Lock()
+        self.pending = {}  # url -> Future, so a URL queued twice downloads once
+        self.index = self.load_index()
+        self.stats = {'downloaded': 0, 'cached': 0, 'deduplicated': 0, 'failed': 0}
+
+    def load_index(self):
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        with self.lock:
+            snapshot = dict(self.index)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(snapshot, f, indent=2, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def submit(self, url):
+        """Queue a URL for download without blocking the caller"""
+        if not url or url == 'N/A':
+            return None
+        with self.lock:
+            if url in self.index:
+                self.stats['cached'] += 1
+                return None
+            if url in self.pending:
+                return self.pending[url]
+            future = self.executor.submit(self.download, url)
+            self.pending[url] = future
+            return future
+
+    def content_path(self, digest, extension):
+        return os.path.join(self.cache_dir, digest[:2], digest + extension)
+
+    def download(self, url):
+        try:
+            response = self.pool.request('GET', url, preload_content=True)
+            if response.status != 200:
+                raise urllib3.exceptions.HTTPError(f"HTTP {response.status}")
+
+            content = response.data
+            digest = hashlib.sha256(content).hexdigest()
+            content_type = (response.headers.get('Content-Type') or '').split(';')[0].strip()
+            extension = CONTENT_TYPE_EXTENSIONS.get(content_type) or os.path.splitext(url.split('?')[0])[1] or '.img'
+            path = self.content_path(digest, extension)
+
+            if os.path.exists(path):
+                deduplicated = True
+            else:
+                deduplicated = False
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Per-thread temp name: two workers may race on the same content
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(temp_path, path)
+
+            with self.lock:
+                self.index[url] = {
+                    'sha256': digest,
+                    'path': os.path.relpath(path, self.cache_dir),
+                    'bytes': len(content),
+                }
+                self.stats['deduplicated' if deduplicated else 'downloaded'] += 1
+                self.pending.pop(url, None)
+            return digest
+
+        except Exception as e:
+            print(f"  ⚠️ Image download failed for {url[:60]}: {e}")
+            with self.lock:
+                self.stats['failed'] += 1
+                self.pending.pop(url, None)
+            return None
+
+    def drain(self):
+        """Wait for everything queued so far and persist the URL index"""
+        with self.lock:
+            futures = list(self.pending.values())
+        for future in futures:
+            future.result()
+        self.save_index()
+        print(f"🖼️ Images: {self.stats['downloaded']} downloaded, {self.stats['deduplicated']} duplicate content, "
+              f"{self.stats['cached']} already cached, {self.stats['failed']} failed")
+
+    def close(self):
+        self.drain()
+        self.executor.shutdown(wait=True)
+        self.pool.clear()
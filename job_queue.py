@@ -0,0 +1,359 @@
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from listing_identity import listing_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    job_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated_at REAL,
+    UNIQUE (run_id, kind, job_key)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (run_id, kind, status, id);
+"""
+
+# Job kinds: a search URL or map tile to expand into property jobs, and a single homedetails page
+SEARCH = 'search'
+PROPERTY = 'property'
+
+DEFAULT_LEASE_SECONDS = 600
+
+
+class JobStore:
+    """Shared SQLite job table with leases, for splitting a run across nodes.
+
+    A node claims jobs by leasing them for lease_seconds and keeps the lease
+    alive with heartbeats. If it dies, its leases expire and the jobs go back
+    to pending for another node; after max_attempts a job is marked failed.
+    Jobs are unique per (run, kind, key), so two nodes discovering the same
+    listing create one job.
+    """
+
+    def __init__(self, path, node_id=None, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=3, clock=time.time):
+        self.path = path
+        # Lease times come from here (tests swap in a fake clock)
+        self.clock = clock
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.held = set()
+        self.lock = threading.Lock()
+        self.heartbeat_thread = None
+        self.stop_heartbeat = threading.Event()
+
+        # Rollback journal rather than WAL: WAL needs shared memory, which network volumes lack
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        with self.lock:
+            self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def add_jobs(self, run_id, kind, items):
+        """Insert (key, payload) pairs; keys already present in this run are ignored"""
+        now = self.clock()
+        with self.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (run_id, kind, job_key, payload, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, kind, key, json.dumps(payload), now) for key, payload in items]
+            )
+            return conn.total_changes - before
+
+    def _expire_leases(self, conn, run_id):
+        now = self.clock()
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', owner = NULL, error = 'lease expired too many times', updated_at = ? "
+            "WHERE run_id = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, run_id, now, self.max_attempts)
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'pending', owner = NULL, updated_at = ? "
+            "WHERE run_id = ? AND status = 'leased' AND lease_expires < ?",
+            (now, run_id, now)
+        )
+
+    def claim(self, run_id, kind, limit=1):
+        """Lease up to limit pending jobs of a kind, re-queueing expired leases first"""
+        now = self.clock()
+        with self.transaction() as conn:
+            self._expire_leases(conn, run_id)
+            rows = conn.execute(
+                "SELECT id, job_key, payload, attempts FROM jobs "
+                "WHERE run_id = ? AND kind = ? AND status = 'pending' ORDER BY id LIMIT ?",
+                (run_id, kind, limit)
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE id = ?",
+                    (self.node_id, now + self.lease_seconds, now, row[0])
+                )
+
+        jobs = [{'id': row[0], 'key': row[1], 'payload': json.loads(row[2]), 'attempts': row[3] + 1} for row in rows]
+        self.held.update(job['id'] for job in jobs)
+        return jobs
+
+    def heartbeat(self):
+        """Extend the leases this node holds; returns how many are still ours"""
+        if not self.held:
+            return 0
+        now = self.clock()
+        held = list(self.held)
+        placeholders = ','.join('?' * len(held))
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                f"WHERE id IN ({placeholders}) AND owner = ? AND status = 'leased'",
+                [now + self.lease_seconds, now] + held + [self.node_id]
+            )
+            return cursor.rowcount
+
+    def start_heartbeat(self):
+        """Background thread renewing leases every third of the lease period"""
+        def beat():
+            while not self.stop_heartbeat.wait(self.lease_seconds / 3):
+                try:
+                    self.heartbeat()
+                except sqlite3.Error as e:
+                    print(f"⚠️ Lease heartbeat failed: {e}")
+
+        self.stop_heartbeat.clear()
+        self.heartbeat_thread = threading.Thread(target=beat, name="lease-heartbeat", daemon=True)
+        self.heartbeat_thread.start()
+
+    def complete(self, job_id, result=None):
+        """Record a result; returns False if the lease was lost to another node meanwhile"""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, updated_at = ? "
+                "WHERE id = ? AND owner = ? AND status = 'leased'",
+                (json.dumps(result), self.clock(), job_id, self.node_id)
+            )
+        self.held.discard(job_id)
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, error):
+        """Give a job back: pending again while it has attempts left, failed after that"""
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner = NULL, error = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                (self.max_attempts, str(error)[:500], self.clock(), job_id, self.node_id)
+            )
+        self.held.discard(job_id)
+
+    def release_all(self):
+        """Return held jobs without consuming an attempt, e.g. on clean shutdown"""
+        held = list(self.held)
+        if held:
+            placeholders = ','.join('?' * len(held))
+            with self.transaction() as conn:
+                conn.execute(
+                    f"UPDATE jobs SET status = 'pending', owner = NULL, attempts = MAX(attempts - 1, 0), updated_at = ? "
+                    f"WHERE id IN ({placeholders}) AND owner = ? AND status = 'leased'",
+                    [self.clock()] + held + [self.node_id]
+                )
+        self.held.clear()
+
+    def status_counts(self, run_id):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT kind, status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY kind, status", (run_id,)
+            ).fetchall()
+        counts = {}
+        for kind, status, count in rows:
+            counts.setdefault(kind, {})[status] = count
+        return counts
+
+    def has_open_work(self, run_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE run_id = ? AND status IN ('pending', 'leased')", (run_id,)
+            ).fetchone()
+        return row[0] > 0
+
+    def results(self, run_id):
+        """Completed property records grouped by city, in a node-independent order"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT payload, result FROM jobs WHERE run_id = ? AND kind = ? AND status = 'done' "
+                "ORDER BY job_key",
+                (run_id, PROPERTY)
+            ).fetchall()
+        by_city = {}
+        for payload, result in rows:
+            by_city.setdefault(json.loads(payload).get('city'), []).append(json.loads(result))
+        return dict(sorted(by_city.items(), key=lambda item: item[0] or ''))
+
+    def close(self):
+        self.stop_heartbeat.set()
+        if self.heartbeat_thread is not None:
+            self.heartbeat_thread.join(timeout=5)
+        self.release_all()
+        self.conn.close()
+
+
+def seed_search_jobs(store, run_id, entries):
+    """Queue (city, max_properties, search_url) entries, or tiles of them, as search jobs"""
+    return store.add_jobs(run_id, SEARCH, [
+        (search_url, {'city': city, 'max_properties': max_properties, 'search_url': search_url})
+        for city, max_properties, search_url in entries
+    ])
+
+
+def run_node(store, run_id, scraper, poll_seconds=30):
+    """Claim and process jobs until the run has no pending or leased work left.
+
+    Search jobs come first so property jobs reach the other nodes as early as
+    possible. When nothing is claimable but other nodes still hold leases,
+    the node waits: those leases may expire and their jobs come back.
+    """
+    store.start_heartbeat()
+    processed = 0
+    try:
+        while True:
+            jobs = store.claim(run_id, SEARCH)
+            if jobs:
+                job = jobs[0]
+                payload = job['payload']
+                print(f"\n🔎 [{store.node_id}] Expanding search for {payload['city']} ({payload['max_properties']} properties)")
+                try:
+                    links = scraper.collect_property_links(payload['search_url'], max_links=payload['max_properties'])
+                    added = store.add_jobs(run_id, PROPERTY, [
+                        (listing_key({'url': url}), {'url': url, 'city': payload['city']}) for url in links
+                    ])
+                    store.complete(job['id'], {'links': len(links), 'new_jobs': added})
+                    print(f"  ✓ {added} new property jobs ({len(links) - added} already queued by another search)")
+                except Exception as e:
+                    print(f"  ❌ Search expansion failed: {e}")
+                    store.fail(job['id'], e)
+                continue
+
+            jobs = store.claim(run_id, PROPERTY)
+            if jobs:
+                job = jobs[0]
+                url = job['payload']['url']
+                print(f"\n--> [{store.node_id}] {url} (attempt {job['attempts']})")
+                try:
+                    property_data = scraper.scrape_single_property(url)
+                    if property_data:
+                        if store.complete(job['id'], property_data):
+                            processed += 1
+                            print(f"  ✅ Done ({processed} on this node)")
+                        else:
+                            print("  ⚠️ Lease was lost before completion; result discarded")
+                    else:
+                        store.fail(job['id'], 'no data extracted')
+                except Exception as e:
+                    print(f"  ❌ Failed: {e}")
+                    store.fail(job['id'], e)
+                continue
+
+            if not store.has_open_work(run_id):
+                break
+            print(f"⏳ Waiting on leases held by other nodes... {store.status_counts(run_id)}")
+            time.sleep(poll_seconds)
+    finally:
+        store.close()
+
+    print(f"\n🎉 Node {store.node_id} finished: {processed} properties scraped")
+    return processed
+
+
+def merge_outputs(store, run_id, output_dir):
+    """Write one JSON/CSV pair per city from every node's completed jobs"""
+    from zillow import MultiPropertyZillowScraper
+
+    written = []
+    for city, records in store.results(run_id).items():
+        city_name = (city or 'unknown').replace('-ma', '').replace('-', '_').lower()
+        city_output_dir = os.path.join(output_dir, city_name)
+        os.makedirs(city_output_dir, exist_ok=True)
+
+        writer = MultiPropertyZillowScraper.from_page_source('', 'about:blank')
+        writer.all_properties_data = records
+        original_cwd = os.getcwd()
+        try:
+            os.chdir(city_output_dir)
+            written.append(writer.save_all_properties(filename_prefix=f"zillow_{run_id}_{city_name}"))
+        finally:
+            os.chdir(original_cwd)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lease-based job queue for multi-node scraping")
+    parser.add_argument('command', choices=['seed', 'work', 'status', 'merge'])
+    parser.add_argument('--db', default=os.getenv('JOB_DB', 'jobs.sqlite'), help="shared SQLite job store")
+    parser.add_argument('--run-id', required=True, help="identifies one distributed run")
+    parser.add_argument('--queue', type=int, help="queue to seed (seed)")
+    parser.add_argument('--node-id', default=os.getenv('NODE_ID'), help="defaults to host-pid")
+    parser.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS, help="lease length in seconds")
+    parser.add_argument('--tile-threshold', type=int, default=0, help="tile entries this large when seeding")
+    parser.add_argument('--output-dir', default=os.getenv('OUTPUT_DIR', 'data'), help="merge destination")
+    args = parser.parse_args()
+
+    store = JobStore(args.db, node_id=args.node_id, lease_seconds=args.lease)
+    headless = os.getenv('HEADLESS', 'false').lower() == 'true'
+
+    if args.command == 'seed':
+        from city_queues import get_queue
+        entries = list(get_queue(args.queue))
+        if args.tile_threshold:
+            from zillow import MultiPropertyZillowScraper
+            from tiling import plan_tiles, browser_result_counter, tile_quotas
+            seeder = MultiPropertyZillowScraper(headless=headless)
+            tiled = []
+            for city, max_properties, search_url in entries:
+                if max_properties < args.tile_threshold:
+                    tiled.append((city, max_properties, search_url))
+                    continue
+                tiles = plan_tiles(search_url, browser_result_counter(seeder.driver))
+                tiled.extend((city, quota, tile.search_url)
+                             for tile, quota in zip(tiles, tile_quotas(tiles, max_properties)) if quota)
+            seeder.driver.quit()
+            entries = tiled
+        print(f"🌱 Seeded {seed_search_jobs(store, args.run_id, entries)} search jobs for run {args.run_id}")
+        store.close()
+
+    elif args.command == 'work':
+        from zillow import MultiPropertyZillowScraper
+        scraper = MultiPropertyZillowScraper(headless=headless, fetch_mode=os.getenv('FETCH_MODE', 'browser').lower())
+        try:
+            run_node(store, args.run_id, scraper)
+        finally:
+            scraper.driver.quit()
+
+    elif args.command == 'status':
+        print(json.dumps(store.status_counts(args.run_id), indent=2))
+        store.close()
+
+    elif args.command == 'merge':
+        for files in merge_outputs(store, args.run_id, os.path.join(args.output_dir, args.run_id)):
+            print(f"📁 {files}")
+        store.close()
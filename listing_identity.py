@@ -0,0 +1,126 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+ZILLOW_ORIGIN = "https://www.zillow.com"
+
+ZPID_IN_URL = re.compile(r'/(\d+)_zpid\b|[?&]zpid=(\d+)')
+# Canonical link first: the inline JSON also mentions the zpids of nearby homes
+ZPID_IN_PAGE = [
+    re.compile(r'<link[^>]+rel="canonical"[^>]+/(\d+)_zpid'),
+    re.compile(r'"zpid"\s*:\s*"?(\d+)'),
+]
+
+
+def zpid_from_url(url):
+    """Zillow's listing ID from a homedetails URL, whatever the slug or query string; None if absent"""
+    match = ZPID_IN_URL.search(url or '')
+    if not match:
+        return None
+    return int(match.group(1) or match.group(2))
+
+
+def zpid_from_page(html):
+    for pattern in ZPID_IN_PAGE:
+        match = pattern.search(html or '')
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def canonical_url(url):
+    """One spelling per listing: absolute https www.zillow.com URL, no query/fragment, nothing after _zpid/"""
+    if not url:
+        return url
+    parts = urlsplit(urljoin(ZILLOW_ORIGIN + "/", url.strip()))
+    path = parts.path
+    match = re.search(r'^(.*?/\d+_zpid)(/|$)', path)
+    if match:
+        path = match.group(1) + '/'
+    elif not path.endswith('/'):
+        path += '/'
+    host = parts.netloc.lower()
+    if host == 'zillow.com':
+        host = 'www.zillow.com'
+    return urlunsplit(('https', host, path, '', ''))
+
+
+def listing_id(url):
+    """zpid as an int when the URL has one, else the canonical URL"""
+    zpid = zpid_from_url(url)
+    return zpid if zpid is not None else canonical_url(url)
+
+
+def record_id(record):
+    zpid = record.get('zpid')
+    if isinstance(zpid, int) or (isinstance(zpid, str) and zpid.isdigit()):
+        return int(zpid)
+    return listing_id(record.get('url') or '')
+
+
+def listing_key(record):
+    """String form of record_id, for JSON keys, job keys and the history index"""
+    return str(record_id(record))
+
+
+class ListingIdSet:
+    """Set of seen listings stored as a sorted array of 64-bit zpids.
+
+    Accepts URLs (any slug/query variant of a listing matches) or zpids.
+    New IDs land in a small buffer merged into the array every merge_every
+    adds, so each listing costs 8 bytes instead of a URL string. The rare
+    URL without a zpid is kept by its canonical string. Safe to share
+    between the parallel tile scrapers.
+    """
+
+    def __init__(self, items=(), merge_every=1024):
+        self.ids = array('q')
+        self.buffer = set()
+        self.other = set()
+        self.merge_every = merge_every
+        self.lock = threading.Lock()
+        self.update(items)
+
+    @staticmethod
+    def _key(value):
+        return value if isinstance(value, int) else listing_id(value)
+
+    def _merge(self):
+        self.ids = array('q', sorted(set(self.ids).union(self.buffer)))
+        self.buffer = set()
+
+    def _in_ids(self, key):
+        index = bisect_left(self.ids, key)
+        return index < len(self.ids) and self.ids[index] == key
+
+    def add(self, value):
+        key = self._key(value)
+        with self.lock:
+            if isinstance(key, str):
+                self.other.add(key)
+            elif key not in self.buffer and not self._in_ids(key):
+                self.buffer.add(key)
+                if len(self.buffer) >= self.merge_every:
+                    self._merge()
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value):
+        key = self._key(value)
+        with self.lock:
+            if isinstance(key, str):
+                return key in self.other
+            return key in self.buffer or self._in_ids(key)
+
+    def __len__(self):
+        return len(self.ids) + len(self.buffer) + len(self.other)
+
+    def __iter__(self):
+        with self.lock:
+            self._merge()
+            items = list(self.ids) + sorted(self.other)
+        return iter(items)
@@ -2,16 +2,30 @@ import time
 import json
 import random
 from datetime import datetime
-from city_queues import city_queues, get_queue_summary
+from city_queues import city_queues, queue_fields, get_queue_summary
 import os
-from zillow import MultiPropertyZillowScraper
+from zillow import MultiPropertyZillowScraper, parse_field_groups
+from change_feed import REMOVE_AFTER_MISSED_RUNS, write_change_feed
+from snapshot_store import seen_listings, write_store
+from image_pipeline import ImageDownloader
+from debug_capture import DebugCapture
+from region_cache import RegionCache
+from retry_queue import RetryQueue
+from strategy_stats import DEFAULT_STATS_FILE, StrategyTuner
+from parse_pool import ParsePool
+from concurrency import AIMDController
+from run_metrics import RunMetrics
+from queue_planner import load_group_timings, load_plan, load_timing_history, shares_dedupe_scope
+from deadline_planner import DeadlinePlanner, parse_deadline, parse_priorities, print_allocation
+from history_index import DEFAULT_DB, HistoryIndex
+from listing_identity import ListingIdSet
+from tiling import plan_tiles, browser_result_counter, scrape_tiles, scrape_tiles_parallel
 
 def smart_sleep(sleep_type):
     """Smart randomized delays"""
     sleep_ranges = {
         'between_properties': (1.5, 3.0),
         'between_cities': (45, 75),        # Randomized city breaks
-        'after_error': (10, 20),           # Error recovery
         'navigation': (2, 4)               # General navigation
     }
     delay = random.uniform(*sleep_ranges.get(sleep_type, (2, 4)))
@@ -29,9 +43,38 @@ if __name__ == "__main__":
     
     headless = os.getenv('HEADLESS', 'false').lower() == 'true'
     output_base_dir = os.getenv('OUTPUT_DIR', 'data')
+    fetch_mode = os.getenv('FETCH_MODE', 'browser').lower()  # 'browser' or 'http'
+    output_mode = os.getenv('OUTPUT_MODE', 'full').lower()   # 'full', 'delta', 'both' or 'store'
+    download_images = os.getenv('DOWNLOAD_IMAGES', 'false').lower() == 'true'
+    typed_output = os.getenv('TYPED_OUTPUT', 'false').lower() == 'true'  # extra CSV with numeric columns
+    history_index = os.getenv('HISTORY_INDEX', 'false').lower() == 'true'  # ingest output into the query index
+    remove_after_missed_runs = int(os.getenv('REMOVE_AFTER_MISSED_RUNS', REMOVE_AFTER_MISSED_RUNS))  # complete runs missing before 'removed'
+    # Failure-only screenshots/HTML; kept out of data/ so the nightly commit doesn't pick them up
+    debug_dir = os.getenv('DEBUG_CAPTURE_DIR', 'debug_captures')
+    debug_enabled = os.getenv('DEBUG_CAPTURE', 'true').lower() == 'true'
+    region_cache_days = float(os.getenv('REGION_CACHE_TTL_DAYS', '7'))  # 0 disables the region cache
+    retry_attempts = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))          # per listing, first try included
+    retry_base_delay = float(os.getenv('RETRY_BASE_DELAY', '30'))       # seconds, doubled per failure
+    lazy_load_mode = os.getenv('LAZY_LOAD_MODE', 'observer').lower()     # 'observer' or 'fixed'
+    lazy_load_ceiling = float(os.getenv('LAZY_LOAD_CEILING', '15'))      # max seconds per results page
+    capture_network = os.getenv('NETWORK_CAPTURE', 'false').lower() == 'true'  # read the site's JSON API responses
+    parse_workers = int(os.getenv('PARSE_WORKERS', '0'))     # processes parsing page snapshots; 0 = parse inline
+    tile_threshold = int(os.getenv('TILE_THRESHOLD', '0'))   # entries this big get map tiling; 0 = off
+    tile_workers = int(os.getenv('TILE_WORKERS', '1'))       # browsers scraping tiles in parallel
+    browser_tabs = int(os.getenv('BROWSER_TABS', '1'))       # listing tabs loading at once in each browser
+    metrics_port = int(os.getenv('METRICS_PORT', '0'))       # Prometheus text endpoint on localhost; 0 = off
+    status_file = os.getenv('STATUS_FILE')                   # progress JSON rewritten every STATUS_INTERVAL seconds
+    adaptive_concurrency = os.getenv('ADAPTIVE_CONCURRENCY', 'false').lower() == 'true'  # TILE_WORKERS becomes a ceiling
+    run_deadline = os.getenv('RUN_DEADLINE')                  # ISO time the run must be done by
+    run_budget_minutes = float(os.getenv('RUN_BUDGET_MINUTES', '0'))  # or minutes from now; 0 = no deadline
+    field_groups = parse_field_groups(queue_fields.get(queue_id) or os.getenv('FIELDS', 'all'))
 
     # This is where 'my_queue' gets defined. It must happen before the loop.
-    my_queue = city_queues.get(queue_id, city_queues[1])
+    # A plan from queue_planner.py (QUEUE_PLAN) replaces the hand-maintained queues.
+    queue_plan_file = os.getenv('QUEUE_PLAN')
+    queue_plan = load_plan(queue_plan_file) if queue_plan_file else None
+    queues = queue_plan['queues'] if queue_plan else city_queues
+    my_queue = queues.get(queue_id, queues[1])
 
     expected_total = sum(count for city, count, _ in my_queue)
 
@@ -40,6 +83,14 @@ if __name__ == "__main__":
     print(f"  • Cities in queue: {len(my_queue)}")
     print(f"  • Expected properties: {expected_total}")
     print(f"  • Headless mode: {headless}")
+    print(f"  • Fetch mode: {fetch_mode}")
+    print(f"  • Output mode: {output_mode}")
+    print(f"  • Download images: {download_images}")
+    print(f"  • Queue plan: {queue_plan_file or 'city_queues.py'}")
+    print(f"  • Map tiling: {f'entries >= {tile_threshold}, {tile_workers} worker(s)' if tile_threshold else 'off'}")
+    print(f"  • Field groups: {', '.join(sorted(field_groups))}")
+    print(f"  • Debug capture: {debug_dir if debug_enabled else 'off'}")
+    print(f"  • Deadline: {run_deadline or (f'{run_budget_minutes:g} minutes' if run_budget_minutes else 'none')}")
     print(f"  • Output base directory: {output_base_dir}")
     print("-" * 60)
     print(f"Queue {queue_id} cities:")
@@ -50,8 +101,82 @@ if __name__ == "__main__":
     base_dir = os.path.abspath(output_base_dir)
     os.makedirs(base_dir, exist_ok=True)
 
+    image_pipeline = None
+    if download_images:
+        # Outside data/ so the nightly commit doesn't pick up binary images
+        image_cache_dir = os.getenv('IMAGE_CACHE_DIR', 'image_cache')
+        image_pipeline = ImageDownloader(image_cache_dir)
+        print(f"🖼️ Downloading images in the background to {image_cache_dir}")
+
+    debug_capture = None
+    if debug_enabled:
+        debug_capture = DebugCapture(debug_dir,
+                                     max_entries=int(os.getenv('DEBUG_CAPTURE_MAX_ENTRIES', '25')),
+                                     max_bytes=int(os.getenv('DEBUG_CAPTURE_MAX_MB', '50')) * 1024 * 1024)
+
+    region_cache = None
+    if region_cache_days > 0:
+        # Under data/ so the nightly commit carries it to the next run
+        region_cache = RegionCache(os.getenv('REGION_CACHE_FILE', os.path.join(base_dir, 'region_cache.json')),
+                                   ttl_seconds=region_cache_days * 24 * 3600)
+        print(f"🗺️ Region cache: {len(region_cache.entries)} regions known ({region_cache.path})")
+
+    # Learned selector/regex ordering; kept out of data/ because it is rewritten after every city
+    # (the workflow caches it between nightly runs, and it is relearned within a few dozen pages)
+    strategy_tuner = None
+    if os.getenv('TUNE_STRATEGIES', 'true').lower() == 'true':
+        strategy_tuner = StrategyTuner(DEFAULT_STATS_FILE)
+
+    parse_pool = None
+    if parse_workers > 0:
+        parse_pool = ParsePool(workers=parse_workers)
+        print(f"🧮 Parsing pages in {parse_workers} worker processes")
+
+    concurrency = None
+    if adaptive_concurrency and tile_workers > 1:
+        # Start with one page load at a time and let latency/block signals raise or cut it
+        concurrency = AIMDController(max_limit=tile_workers, log_path=os.getenv('CONCURRENCY_LOG'))
+        print(f"🎚️ Adaptive concurrency: 1..{tile_workers} concurrent page loads")
+
+    metrics = None
+    if metrics_port or status_file:
+        metrics = RunMetrics(queue_id, expected_total, status_path=status_file, port=metrics_port or None,
+                             interval=float(os.getenv('STATUS_INTERVAL', '30'))).start()
+
+    planner = None
+    if run_deadline or run_budget_minutes:
+        deadline = parse_deadline(run_deadline) if run_deadline else time.time() + run_budget_minutes * 60
+        planner = DeadlinePlanner(deadline, timings=load_timing_history(base_dir),
+                                  priorities=parse_priorities(os.getenv('CITY_PRIORITIES')),
+                                  min_quota=int(os.getenv('MIN_CITY_QUOTA', '10')),
+                                  reserve_seconds=float(os.getenv('DEADLINE_RESERVE_MINUTES', '10')) * 60)
+        print(f"⏰ Deadline {datetime.fromtimestamp(deadline).isoformat(timespec='minutes')}; "
+              f"targets are re-planned before each city")
+    city_deadline = None
+    city_dead_listings = []
+    group_timing_history = load_group_timings(base_dir)
+
+    def make_scraper():
+        new_scraper = MultiPropertyZillowScraper(headless=headless, fetch_mode=fetch_mode, field_groups=field_groups,
+                                                 capture_network=capture_network, tabs=browser_tabs)
+        new_scraper.image_pipeline = image_pipeline
+        new_scraper.debug_capture = debug_capture
+        new_scraper.region_cache = region_cache
+        new_scraper.strategy_tuner = strategy_tuner
+        new_scraper.lazy_load_mode = lazy_load_mode
+        new_scraper.lazy_load_ceiling = lazy_load_ceiling
+        new_scraper.parse_pool = parse_pool
+        new_scraper.concurrency = concurrency
+        new_scraper.deadline = city_deadline
+        new_scraper.group_timing_history = group_timing_history
+        # Parallel tile scrapers report dead pages into the current city's list
+        new_scraper.dead_listings = city_dead_listings
+        if metrics is not None:
+            metrics.register(new_scraper)
+        return new_scraper
+
     try:
-        scraper = MultiPropertyZillowScraper(headless=headless)
+        scraper = make_scraper()
         
     except Exception as e:
         print(f"❌ Failed to initialize scraper: {e}")
@@ -60,15 +185,49 @@ if __name__ == "__main__":
     total_properties_scraped = 0
     cities_completed = 0
     cities_failed = 0
+    cities_skipped = 0
+    stopped_early = False
+    failed_listings = []
 
     # This for loop is now correctly indented inside the if block
     for city_index, (city, max_properties_this_city, search_url) in enumerate(my_queue, 1):
+        queue_target = max_properties_this_city
+        city_started = time.time()
+        city_scraped = 0
+        if planner is not None:
+            if planner.expired():
+                print(f"\n⏰ Out of time: stopping before {city} with {len(my_queue) - city_index + 1} cities left")
+                stopped_early = True
+                break
+            # Re-plan what's left of the queue against the time left and the pace so far
+            remaining_entries = my_queue[city_index - 1:]
+            targets = planner.plan(remaining_entries)
+            print_allocation(planner, remaining_entries, targets)
+            if metrics is not None:
+                metrics.expected_total = total_properties_scraped + sum(targets)
+            max_properties_this_city = targets[0]
+            if not max_properties_this_city:
+                print(f"⏭️ Skipping {city}: not even its minimum quota fits in the time left")
+                cities_skipped += 1
+                continue
+            city_deadline = planner.city_deadline(city, max_properties_this_city)
+            scraper.deadline = city_deadline
+
         print(f"\n" + "🏙️ " * 20)
         print(f"QUEUE {queue_id} - CITY {city_index}/{len(my_queue)}: {city}")
         print(f"Target: {max_properties_this_city} properties")
         print(f"Using optimized search URL: {search_url[:60]}...")
         print(f"🏙️ " * 20)
-        
+        # Per-city state is reset before anything can fail, so a city that errors out
+        # early doesn't report (or re-add) the previous city's failures
+        scraper.skipped_groups = {}
+        city_dead_listings = []
+        scraper.dead_listings = city_dead_listings
+        scraper.region_cache_stats = {'hits': 0, 'misses': 0}
+        scraper.retry_queue = RetryQueue(max_attempts=retry_attempts, base_delay=retry_base_delay)
+        if metrics is not None:
+            metrics.start_city(city, len(my_queue), retry_queue=scraper.retry_queue)
+
         city_output_dir = "" # Initialize to avoid reference before assignment in except block
         try:
             city_dir_name = city.replace('-ma', '').replace('-', '_').lower()
@@ -78,26 +237,88 @@ if __name__ == "__main__":
             print(f"📁 Output directory: {city_output_dir}")
 
             print(f"\n🚀 Starting to scrape {max_properties_this_city} properties from {city}...")
-            all_properties = scraper.scrape_multiple_properties(search_url, max_properties=max_properties_this_city)
+            city_start_time = time.time()
+            if tile_threshold and max_properties_this_city >= tile_threshold:
+                # Split the region so no single search hits the result cap
+                print(f"🗺️ Tiling {city} map bounds...")
+                tiles = plan_tiles(search_url, browser_result_counter(scraper.driver))
+                print(f"🗺️ {len(tiles)} tiles, {sum(t.result_count or 0 for t in tiles)} reported results")
+                if tile_workers > 1:
+                    all_properties = scrape_tiles_parallel(tiles, max_properties_this_city, make_scraper,
+                                                           workers=tile_workers, shared_ids=scraper.scraped_ids,
+                                                           retry_queue=scraper.retry_queue)
+                    scraper.all_properties_data = all_properties
+                else:
+                    all_properties = scrape_tiles(scraper, tiles, max_properties_this_city)
+            else:
+                all_properties = scraper.scrape_multiple_properties(search_url, max_properties=max_properties_this_city)
+
+            city_scraped = len(all_properties)
+            if planner is not None and city_scraped < max_properties_this_city and scraper.deadline_reached():
+                print(f"⏰ {city} cut at {city_scraped}/{max_properties_this_city} to keep the rest of the queue on time")
+                planner.record_cut(city, max_properties_this_city, city_scraped)
 
             if all_properties:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 safe_city_name = city.replace('-ma', '').replace('-', '_').lower()
                 filename_prefix = f"zillow_q{queue_id}_{safe_city_name}_{max_properties_this_city}props_{timestamp}"
 
-                original_cwd = os.getcwd()
-                try:
-                    os.chdir(city_output_dir)
-                    json_file, csv_file = scraper.save_all_properties(filename_prefix=filename_prefix)
-                finally:
-                    os.chdir(original_cwd)
+                json_file, csv_file, change_file, store_file = None, None, None, None
+                if output_mode in ('full', 'both'):
+                    original_cwd = os.getcwd()
+                    try:
+                        os.chdir(city_output_dir)
+                        json_file, csv_file = scraper.save_all_properties(filename_prefix=filename_prefix,
+                                                                           typed=typed_output)
+                    finally:
+                        os.chdir(original_cwd)
+
+                if output_mode in ('delta', 'both'):
+                    change_file, _ = write_change_feed(
+                        city_output_dir, all_properties,
+                        filename_prefix=f"changes_q{queue_id}_{safe_city_name}_{timestamp}",
+                        exclude=os.path.join(city_output_dir, json_file) if json_file else None,
+                        gone_urls=[dead['url'] for dead in city_dead_listings],
+                        # Only a run that reached the queue's full target can tell that a listing left the results
+                        complete=city_scraped >= queue_target and not scraper.deadline_reached(),
+                        remove_after=remove_after_missed_runs
+                    )
+
+                if output_mode == 'store':
+                    # One sorted, in-place file per city so unchanged listings don't show up in the nightly commit
+                    store_path, _ = write_store(city_output_dir, all_properties)
+                    store_file = os.path.basename(store_path)
 
                 city_summary = {
                     "queue_id": queue_id, "city": city, "target_properties": max_properties_this_city,
                     "actual_properties": len(all_properties), "city_index": city_index, "timestamp": timestamp,
-                    "json_file": json_file, "csv_file": csv_file, "output_directory": city_output_dir,
-                    "success_rate": (len(all_properties) / max_properties_this_city) * 100
+                    "json_file": json_file, "csv_file": csv_file, "change_file": change_file,
+                    "store_file": store_file,
+                    "output_directory": city_output_dir,
+                    "success_rate": (len(all_properties) / max_properties_this_city) * 100,
+                    "duration_seconds": round(time.time() - city_start_time, 1),
+                    "field_groups": sorted(field_groups),
+                    "estimated_seconds_saved": {group: round(seconds, 1) for group, seconds
+                                                in scraper.estimated_seconds_saved().items()},
+                    "extractor_seconds": {group: round(seconds, 3) for group, seconds
+                                          in scraper.mean_extractor_seconds().items()},
+                    "region_cache": dict(scraper.region_cache_stats),
+                    "retries": dict(scraper.retry_queue.stats),
+                    "dead_listings": len(city_dead_listings),
+                    "failed_urls": scraper.retry_queue.failed_urls()
                 }
+                if store_file:
+                    city_summary["seen_listings"] = seen_listings(all_properties)
+                if planner is not None:
+                    city_summary["queue_target"] = queue_target
+                    city_summary["deadline"] = planner.summary()
+                if concurrency is not None:
+                    city_summary["concurrency"] = dict(concurrency.stats, limit=concurrency.limit,
+                                                       decisions=len(concurrency.decisions))
+                if region_cache is not None:
+                    region_cache.save()
+                if strategy_tuner is not None:
+                    strategy_tuner.save()
 
                 summary_file = os.path.join(city_output_dir, f"summary_q{queue_id}_{safe_city_name}_{timestamp}.json")
                 with open(summary_file, 'w') as f:
@@ -107,23 +328,35 @@ if __name__ == "__main__":
                 
                 total_properties_scraped += len(all_properties)
                 cities_completed += 1
+                if metrics is not None:
+                    metrics.end_city(True)
                 
                 scraper.all_properties_data = []
-                scraper.scraped_urls = set()
+                # Entries in the same overlap group (e.g. a county and its cities) share
+                # one dedupe set so their common listings are only scraped once
+                next_city = my_queue[city_index][0] if city_index < len(my_queue) else None
+                if not shares_dedupe_scope(queue_plan, city, next_city):
+                    scraper.scraped_ids = ListingIdSet()
                 
             else:
                 print(f"\n❌ {city} FAILED - No properties scraped")
                 cities_failed += 1
+                if metrics is not None:
+                    metrics.end_city(False)
                 
         except Exception as e:
             print(f"\n❌ ERROR in {city}: {e}")
             import traceback
             traceback.print_exc()
             cities_failed += 1
+            if metrics is not None:
+                metrics.end_city(False)
             
             if hasattr(scraper, 'all_properties_data') and scraper.all_properties_data:
                 try:
-                    if city_output_dir:
+                    if city_output_dir and output_mode == 'store':
+                        write_store(city_output_dir, scraper.all_properties_data)
+                    elif city_output_dir:
                         original_cwd = os.getcwd()
                         os.chdir(city_output_dir)
                         scraper.save_all_properties(filename_prefix=f"zillow_{city}_error_partial")
@@ -131,15 +364,41 @@ if __name__ == "__main__":
                     scraper.all_properties_data = []
                 except Exception as save_error:
                     print(f"⚠️ Could not save partial data: {save_error}")
-            
-            time.sleep(smart_sleep('after_error'))
+
+        failed_listings.extend(dict(failure, city=city) for failure in scraper.retry_queue.failed_urls())
         
         remaining_cities = len(my_queue) - city_index
         print(f"\n📊 QUEUE {queue_id} PROGRESS: {cities_completed}/{len(my_queue)} cities done. {remaining_cities} remaining.")
         
         if remaining_cities > 0:
             time.sleep(smart_sleep('between_cities'))
+        if planner is not None:
+            planner.observe(city, city_scraped, time.time() - city_started)
     
+    if image_pipeline is not None:
+        image_pipeline.close()
+    if parse_pool is not None:
+        parse_pool.close()
+    if metrics is not None:
+        metrics.stop()
+
+    if region_cache is not None:
+        region_cache.save()
+    if strategy_tuner is not None:
+        strategy_tuner.save()
+
+    if debug_capture is not None and debug_capture.stats['captured']:
+        print(f"🐞 Debug captures: {debug_capture.stats} ({debug_capture.bytes_written / 1e6:.1f} MB) in {debug_dir}")
+
+    if history_index:
+        try:
+            index = HistoryIndex(DEFAULT_DB)
+            totals = index.ingest(base_dir)
+            index.close()
+            print(f"📥 History index: {totals['files']} new files, {totals['snapshots']} snapshots")
+        except Exception as e:
+            print(f"⚠️ History index update failed: {e}")
+
     try:
         scraper.driver.quit()
         print("🔧 Browser closed successfully")
@@ -147,3 +406,12 @@ if __name__ == "__main__":
         print(f"⚠️ Browser cleanup warning: {e}")
     
     print(f"\n🎉 QUEUE {queue_id} COMPLETED! Total properties scraped: {total_properties_scraped}/{expected_total}")
+    if planner is not None:
+        deadline_summary = planner.summary()
+        print(f"⏰ Deadline {deadline_summary['deadline']}: {cities_skipped} cities skipped, "
+              f"{len(deadline_summary['cities_cut'])} cut short{', stopped early' if stopped_early else ''}; "
+              f"pace {deadline_summary['speed_factor']}x the usual")
+    if failed_listings:
+        print(f"\n✗ {len(failed_listings)} listing(s) failed permanently:")
+        for failure in failed_listings:
+            print(f"  • [{failure['city']}] {failure['url']} ({failure['attempts']} attempts): {failure['error']}")
@@ -0,0 +1,234 @@
+import base64
+import json
+from datetime import datetime
+
+# Background requests whose JSON carries listing data (detail-page GraphQL, search-page state)
+API_URL_MARKERS = ('/graphql', 'GetSearchPageState', 'async-create-search-page-state', 'zpid=')
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+# A group's extractor is skipped only when the payloads supplied every one of these,
+# so each list must hold every field the group's extractor writes
+GROUP_FIELDS = {
+    'image': ['image_url'],
+    'core': ['price', 'address', 'beds', 'baths', 'sqft', 'sqft_lot', 'year_built', 'property_type',
+             'price_per_sqft'],
+    'scores': ['walk_score', 'bike_score', 'transit_score'],
+    'schools': ['elementary_school', 'middle_school', 'high_school'],
+    'climate': ['flood_risk', 'fire_risk', 'wind_risk', 'air_risk', 'heat_risk'],
+    'history': ['property_history'],
+}
+
+CLIMATE_SOURCES = {
+    'flood_risk': 'floodSources', 'fire_risk': 'fireSources', 'wind_risk': 'windSources',
+    'air_risk': 'airSources', 'heat_risk': 'heatSources',
+}
+
+
+def enable_network_logging(options):
+    """Ask ChromeDriver for the DevTools performance log, which carries Network.* events"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def is_api_url(url):
+    return any(marker in url for marker in API_URL_MARKERS)
+
+
+def find_listings(payload):
+    """Every dict in a decoded response that looks like a listing (has a zpid and home facts)"""
+    found = []
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if 'zpid' in node and ('bedrooms' in node or 'livingArea' in node or 'priceHistory' in node):
+                found.append(node)
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return found
+
+
+def format_number(value):
+    return f"{value:,}" if isinstance(value, int) else f"{value:,g}"
+
+
+def listing_fields(payloads, zpid=None):
+    """Decode captured JSON payloads into property-record fields, formatted like the DOM extractors' output.
+    Only fields actually present in the payloads are returned."""
+    candidates = [listing for payload in payloads for listing in find_listings(payload)]
+    if zpid is not None:
+        candidates = [listing for listing in candidates if str(listing.get('zpid')) == str(zpid)]
+    if not candidates:
+        return {}
+    # Detail responses carry far more keys than a search-result card for the same zpid
+    listing = {}
+    for candidate in sorted(candidates, key=len):
+        listing.update({key: value for key, value in candidate.items() if value is not None})
+
+    fields = {}
+    if isinstance(listing.get('price'), (int, float)):
+        fields['price'] = f"${listing['price']:,.0f}"
+    if isinstance(listing.get('bedrooms'), (int, float)):
+        fields['beds'] = f"{listing['bedrooms']:g}"
+    if isinstance(listing.get('bathrooms'), (int, float)):
+        fields['baths'] = f"{listing['bathrooms']:g}"
+    if isinstance(listing.get('livingArea'), (int, float)):
+        fields['sqft'] = format_number(listing['livingArea'])
+    if listing.get('yearBuilt'):
+        fields['year_built'] = str(listing['yearBuilt'])
+    if listing.get('homeType'):
+        fields['property_type'] = listing['homeType'].replace('_', ' ').title()
+
+    address = listing.get('address')
+    if isinstance(address, dict) and address.get('streetAddress'):
+        fields['address'] = (f"{address['streetAddress']}, {address.get('city', '')}, "
+                             f"{address.get('state', '')} {address.get('zipcode', '')}").strip()
+
+    units = str(listing.get('lotAreaUnits') or '').lower()
+    if isinstance(listing.get('lotAreaValue'), (int, float)) and units:
+        unit = 'Acres' if 'acre' in units else 'sqft'
+        fields['sqft_lot'] = f"{format_number(listing['lotAreaValue'])} {unit}"
+    elif isinstance(listing.get('lotSize'), (int, float)):
+        fields['sqft_lot'] = f"{format_number(listing['lotSize'])} sqft"
+
+    facts = listing.get('resoFacts') or {}
+    if isinstance(facts.get('pricePerSquareFoot'), (int, float)):
+        fields['price_per_sqft'] = f"${facts['pricePerSquareFoot']:.0f}/sqft"
+
+    for key in ('hiResImageLink', 'desktopWebHdpImageLink', 'imgSrc'):
+        if listing.get(key):
+            fields['image_url'] = listing[key]
+            break
+
+    for field, key, score_key in (('walk_score', 'walkScore', 'walkscore'),
+                                  ('bike_score', 'bikeScore', 'bikescore'),
+                                  ('transit_score', 'transitScore', 'transit_score')):
+        score = listing.get(key)
+        if isinstance(score, dict) and score.get(score_key) is not None:
+            fields[field] = f"{score[score_key]}/100"
+
+    schools = listing.get('schools')
+    if isinstance(schools, list) and schools:
+        for level in ('elementary', 'middle', 'high'):
+            school = next((s for s in schools if level in str(s.get('level', '')).lower()), None)
+            if school is None:
+                fields[f'{level}_school'] = {'name': 'N/A', 'distance': 'N/A'}
+            else:
+                distance = school.get('distance')
+                fields[f'{level}_school'] = {'name': school.get('name') or 'N/A',
+                                             'distance': f"{distance} mi" if distance is not None else 'N/A'}
+
+    climate = listing.get('climate')
+    if isinstance(climate, dict):
+        for field, key in CLIMATE_SOURCES.items():
+            risk = ((climate.get(key) or {}).get('primary') or {}).get('riskScore') or {}
+            if risk.get('label') and risk.get('value') is not None:
+                fields[field] = f"{risk['label'].title()} ({risk['value']}/10)"
+
+    history = listing.get('priceHistory')
+    if isinstance(history, list):
+        events = []
+        for event in history:
+            try:
+                date = datetime.strptime(event['date'], '%Y-%m-%d').strftime('%m/%d/%Y')
+            except (KeyError, TypeError, ValueError):
+                continue
+            price = event.get('price')
+            events.append({'date': date, 'event': event.get('event', ''),
+                           'price': f"${price:,.0f}" if isinstance(price, (int, float)) else 'N/A'})
+        fields['property_history'] = events
+
+    return fields
+
+
+def tab_id(handle):
+    """ChromeDriver window handle or performance-log webview -> the DevTools target id both refer to"""
+    return str(handle).replace('CDwindow-', '').upper() if handle else None
+
+
+def covered_groups(fields):
+    return {group for group, required in GROUP_FIELDS.items() if all(field in fields for field in required)}
+
+
+class NetworkCapture:
+    """Reads the JSON responses a page loaded from the DevTools performance log.
+
+    Zillow's pages hydrate from background GraphQL/search-state responses
+    that already hold price, facts, history, schools and climate data. The
+    driver must have been started with enable_network_logging(); after a
+    page loads, collect() pulls the bodies of its API responses and
+    listing_fields() turns them into record fields, so the DOM extractors
+    only run for what the payloads did not cover.
+
+    The performance log is browser-wide, so with tabs loading in the
+    background (see tab_pool) its entries are sorted by the tab that logged
+    them and each collect() only takes the current tab's.
+    """
+
+    def __init__(self, max_body_bytes=MAX_BODY_BYTES):
+        self.max_body_bytes = max_body_bytes
+        self.pending = {}  # tab id -> log messages not collected yet
+        self.stats = {'pages': 0, 'payloads': 0, 'fields': 0, 'groups_skipped': 0, 'errors': 0}
+
+    def read_log(self, driver):
+        """Move new log entries into pending (reading the log empties it)"""
+        for entry in driver.get_log('performance'):
+            try:
+                logged = json.loads(entry['message'])
+            except (KeyError, ValueError):
+                continue
+            self.pending.setdefault(tab_id(logged.get('webview')), []).append(logged.get('message', {}))
+
+    def forget(self, handle):
+        self.pending.pop(tab_id(handle), None)
+
+    def reset(self, driver):
+        """Drop what the current tab logged so far; call it before the tab navigates"""
+        try:
+            self.read_log(driver)
+            self.forget(driver.current_window_handle)
+        except Exception:
+            pass
+        self.pending.pop(None, None)
+
+    def collect(self, driver):
+        """Decoded JSON bodies of the API responses the current tab logged since its reset"""
+        try:
+            self.read_log(driver)
+            messages = self.pending.pop(tab_id(driver.current_window_handle), []) + self.pending.pop(None, [])
+            # Tabs closed without being collected (a failed listing) leave nothing behind
+            open_tabs = {tab_id(handle) for handle in driver.window_handles}
+            self.pending = {tab: kept for tab, kept in self.pending.items() if tab in open_tabs}
+        except Exception:
+            self.stats['errors'] += 1
+            return []
+
+        responses = {}
+        finished = set()
+        for message in messages:
+            params = message.get('params', {})
+            if message.get('method') == 'Network.responseReceived':
+                response = params.get('response', {})
+                if 'json' in response.get('mimeType', '') and is_api_url(response.get('url', '')):
+                    responses[params['requestId']] = response['url']
+            elif message.get('method') == 'Network.loadingFinished':
+                if params.get('encodedDataLength', 0) <= self.max_body_bytes:
+                    finished.add(params.get('requestId'))
+
+        payloads = []
+        for request_id in responses:
+            if request_id not in finished:
+                continue
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                text = body['body']
+                if body.get('base64Encoded'):
+                    text = base64.b64decode(text).decode('utf-8', 'replace')
+                payloads.append(json.loads(text))
+            except Exception:
+                # Bodies are evicted from Chrome's buffer on navigation, or may not be JSON after all
+                self.stats['errors'] += 1
+
+        self.stats['pages'] += 1
+        self.stats['payloads'] += len(payloads)
+        return payloads
@@ -0,0 +1,266 @@
+import argparse
+import random
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+SQFT_PER_ACRE = 43560
+
+RISK_LEVELS = ['Minimal', 'Minor', 'Moderate', 'Major', 'Severe']
+RISK_COLUMNS = ['flood_risk', 'fire_risk', 'wind_risk', 'air_risk', 'heat_risk']
+SCORE_COLUMNS = ['walk_score', 'bike_score', 'transit_score']
+SCHOOL_DISTANCE_COLUMNS = ['elementary_school_distance', 'middle_school_distance', 'high_school_distance']
+
+# column -> (new column name, converter name); converters are whole-column string ops
+COLUMN_SPECS = {
+    'price': ('price_usd', 'money'),
+    'estimated_monthly_payment': ('monthly_payment_usd', 'money'),
+    'price_per_sqft': ('price_per_sqft_usd', 'money'),
+    'beds': ('beds', 'integer'),
+    'baths': ('baths', 'number'),
+    'sqft': ('sqft', 'number'),
+    'sqft_lot': ('lot_sqft', 'area'),
+    'year_built': ('year_built', 'integer'),
+    'parking_total_spaces': ('parking_total_spaces', 'integer'),
+    'parking_garage_spaces': ('parking_garage_spaces', 'integer'),
+    **{column: (column, 'score') for column in SCORE_COLUMNS},
+    **{column: (f"{column}_mi", 'miles') for column in SCHOOL_DISTANCE_COLUMNS},
+}
+
+
+def _text(series):
+    """String view of a column with the 'N/A' placeholder turned into a real missing value"""
+    series = series.astype('string')
+    return series.mask(series.str.strip().str.upper() == 'N/A')
+
+
+def _number(text):
+    return pd.to_numeric(text.str.replace(',', '', regex=False), errors='coerce')
+
+
+def per_unique(series, parse):
+    """Run a column parser once per distinct value and broadcast the result back.
+
+    Scraped columns repeat heavily (beds, scores, risk labels, distances), and
+    without pyarrow pandas string ops are per-element Python, so parsing the
+    uniques and taking by factorize codes is where the speed comes from.
+    parse gets a Series of the unique strings and returns float values.
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = parse(pd.Series(uniques, dtype=object)).to_numpy(dtype=float, na_value=np.nan)
+    # code -1 (missing) picks the trailing NaN
+    return pd.Series(np.append(parsed, np.nan)[codes], index=series.index)
+
+
+def _money(text):
+    return _number(_text(text).str.extract(r'\$?\s*([\d,]+(?:\.\d+)?)', expand=False))
+
+
+def _plain_number(text):
+    return _number(_text(text).str.extract(r'(-?[\d,]*\.?\d+)', expand=False))
+
+
+def _area_sqft(text):
+    parts = _text(text).str.extract(r'([\d,]*\.?\d+)\s*(acres?|sq\s*ft|sqft|square\s*feet)?', flags=re.I)
+    is_acres = parts[1].str.lower().str.startswith('acre').fillna(False).astype(bool)
+    return _number(parts[0]) * np.where(is_acres, SQFT_PER_ACRE, 1)
+
+
+def _score(text):
+    return _number(_text(text).str.extract(r'(\d+)\s*(?:/\s*100)?', expand=False))
+
+
+def _miles(text):
+    parts = _text(text).str.extract(r'([\d,]*\.?\d+)\s*(mi|miles?|ft|feet)?', flags=re.I)
+    is_feet = parts[1].str.lower().str.startswith('f').fillna(False).astype(bool)
+    return _number(parts[0]) / np.where(is_feet, 5280, 1)
+
+
+def to_money(series):
+    """'$525,000', '$2,871/mo', '$312/sqft' -> 525000.0, 2871.0, 312.0"""
+    return per_unique(series, _money)
+
+
+def to_number(series):
+    return per_unique(series, _plain_number)
+
+
+def to_integer(series):
+    return to_number(series).round().astype('Int64')
+
+
+def to_area_sqft(series):
+    """'0.31 Acres' and '4,373 sqft' -> square feet"""
+    return per_unique(series, _area_sqft)
+
+
+def to_score(series):
+    """'72/100' -> 72"""
+    return per_unique(series, _score).astype('Int64')
+
+
+def to_miles(series):
+    """'1.2 mi' -> 1.2; feet are converted"""
+    return per_unique(series, _miles)
+
+
+def split_risk(series):
+    """'Moderate (5/10)' -> ordered categorical level and integer score"""
+    codes, uniques = pd.factorize(series)
+    parts = _text(pd.Series(uniques, dtype=object)).str.extract(r'([A-Za-z]+)\s*\(\s*(\d+)\s*/\s*10\s*\)')
+    levels = np.append(parts[0].str.title().to_numpy(dtype=object, na_value=None), None)[codes]
+    scores = np.append(_number(parts[1]).to_numpy(dtype=float, na_value=np.nan), np.nan)[codes]
+    level = pd.Categorical(levels, categories=RISK_LEVELS, ordered=True)
+    return level, pd.Series(scores, index=series.index).astype('Int64')
+
+
+def to_property_type(series):
+    """'Single Family', 'single-family' -> 'single family' as a categorical"""
+    codes, uniques = pd.factorize(series)
+    kinds = _text(pd.Series(uniques, dtype=object)).str.lower().str.replace(r'[^a-z]+', ' ', regex=True).str.strip()
+    return pd.Categorical(np.append(kinds.to_numpy(dtype=object, na_value=None), None)[codes])
+
+
+CONVERTERS = {
+    'money': to_money,
+    'number': to_number,
+    'integer': to_integer,
+    'area': to_area_sqft,
+    'score': to_score,
+    'miles': to_miles,
+}
+
+
+def normalize_properties(df):
+    """Typed copy of flatten_property_data output: numbers as numbers, units unified.
+
+    Money is USD, areas are square feet (acres converted), distances are
+    miles, scores are integers, and each climate risk splits into an ordered
+    categorical level and a 0-10 score. Columns without a spec pass through.
+    """
+    result = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        if column in COLUMN_SPECS:
+            new_name, kind = COLUMN_SPECS[column]
+            result[new_name] = CONVERTERS[kind](df[column])
+        elif column in RISK_COLUMNS:
+            level, score = split_risk(df[column])
+            result[f"{column}_level"] = level
+            result[f"{column}_score"] = score
+        elif column == 'property_type':
+            result[column] = to_property_type(df[column])
+        else:
+            result[column] = df[column]
+    return result
+
+
+def synthetic_frame(rows, seed=0):
+    """Flattened rows shaped like real output, including 'N/A' gaps and mixed lot units"""
+    rng = random.Random(seed)
+
+    def maybe(value):
+        return 'N/A' if rng.random() < 0.08 else value
+
+    data = []
+    for _ in range(rows):
+        lot = f"{rng.uniform(0.05, 3):.2f} Acres" if rng.random() < 0.4 else f"{rng.randint(1500, 40000):,} sqft"
+        data.append({
+            'price': maybe(f"${rng.randint(150, 3500) * 1000:,}"),
+            'beds': maybe(str(rng.randint(1, 7))),
+            'baths': maybe(str(rng.choice([1, 1.5, 2, 2.5, 3, 4]))),
+            'sqft': maybe(f"{rng.randint(500, 6000):,}"),
+            'sqft_lot': maybe(lot),
+            'price_per_sqft': maybe(f"${rng.randint(150, 1200)}/sqft"),
+            'estimated_monthly_payment': maybe(f"${rng.randint(900, 15000):,}/mo"),
+            'year_built': maybe(str(rng.randint(1850, 2024))),
+            'property_type': maybe(rng.choice(['Single Family', 'condo', 'Townhouse', 'multi-family'])),
+            'walk_score': maybe(f"{rng.randint(0, 100)}/100"),
+            'bike_score': maybe(f"{rng.randint(0, 100)}/100"),
+            'transit_score': maybe(f"{rng.randint(0, 100)}/100"),
+            'flood_risk': maybe(f"{rng.choice(RISK_LEVELS)} ({rng.randint(1, 10)}/10)"),
+            'heat_risk': maybe(f"{rng.choice(RISK_LEVELS)} ({rng.randint(1, 10)}/10)"),
+            'elementary_school_distance': maybe(f"{rng.uniform(0.1, 5):.1f} mi"),
+            'high_school_distance': maybe(f"{rng.uniform(0.1, 8):.1f} mi"),
+        })
+    return pd.DataFrame(data)
+
+
+def _normalize_row_by_row(df):
+    """The per-row Python parsing downstream jobs do today; only used as the benchmark baseline"""
+    def money(value):
+        match = re.search(r'\$?\s*([\d,]+(?:\.\d+)?)', value) if value != 'N/A' else None
+        return float(match.group(1).replace(',', '')) if match else np.nan
+
+    def lot(value):
+        match = re.search(r'([\d,]*\.?\d+)\s*(acres?|sqft)?', value, re.I) if value != 'N/A' else None
+        if not match:
+            return np.nan
+        number = float(match.group(1).replace(',', ''))
+        return number * SQFT_PER_ACRE if (match.group(2) or '').lower().startswith('acre') else number
+
+    def risk(value):
+        match = re.search(r'([A-Za-z]+)\s*\(\s*(\d+)\s*/\s*10\s*\)', value) if value != 'N/A' else None
+        return (match.group(1).title(), int(match.group(2))) if match else (None, None)
+
+    rows = []
+    for record in df.to_dict('records'):
+        rows.append({
+            'price_usd': money(record['price']),
+            'monthly_payment_usd': money(record['estimated_monthly_payment']),
+            'price_per_sqft_usd': money(record['price_per_sqft']),
+            'lot_sqft': lot(record['sqft_lot']),
+            'sqft': money(record['sqft']),
+            'flood_risk': risk(record['flood_risk']),
+            'heat_risk': risk(record['heat_risk']),
+            'walk_score': money(record['walk_score'].split('/')[0] if record['walk_score'] != 'N/A' else 'N/A'),
+        })
+    return pd.DataFrame(rows)
+
+
+def run_benchmark(rows):
+    print(f"Building synthetic dataset with {rows:,} rows...")
+    df = synthetic_frame(rows)
+
+    started = time.perf_counter()
+    _normalize_row_by_row(df)
+    row_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    typed = normalize_properties(df)
+    vector_seconds = time.perf_counter() - started
+
+    print(f"  • Row-by-row (8 columns):     {row_seconds:8.2f}s  ({rows / row_seconds:,.0f} rows/s)")
+    print(f"  • Vectorized ({len(df.columns)} columns):   {vector_seconds:8.2f}s  ({rows / vector_seconds:,.0f} rows/s)")
+    print(f"  • Typed columns: {', '.join(f'{c}:{t}' for c, t in typed.dtypes.astype(str).items())}")
+    return row_seconds, vector_seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalize scraped CSV output into typed columns")
+    parser.add_argument('input', nargs='?', help="flattened CSV written by save_all_properties")
+    parser.add_argument('-o', '--output', help="typed output (.csv or .parquet); defaults to <input>_typed.csv")
+    parser.add_argument('--benchmark', type=int, metavar='ROWS', help="time vectorized vs row-by-row on synthetic data")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.benchmark)
+    elif args.input:
+        typed = normalize_properties(pd.read_csv(args.input, dtype=str, keep_default_na=False))
+        output = args.output or args.input.replace('.csv', '_typed.csv')
+        if output.endswith('.parquet'):
+            try:
+                typed.to_parquet(output, index=False)
+            except ImportError:
+                # pandas needs pyarrow or fastparquet for parquet; neither is in requirements.txt
+                output = output[:-len('.parquet')] + '.csv'
+                if output == args.input:
+                    output = args.input.replace('.csv', '_typed.csv')
+                print("⚠️ No parquet engine installed (pip install pyarrow); writing CSV instead")
+                typed.to_csv(output, index=False)
+        else:
+            typed.to_csv(output, index=False)
+        print(f"📁 {len(typed)} rows normalized -> {output}")
+    else:
+        parser.error("give an input CSV or --benchmark ROWS")
@@ -0,0 +1,135 @@
+import re
+from collections import deque
+
+# Page types
+LISTING = 'listing'
+CHALLENGE = 'challenge'
+REMOVED = 'removed'
+NOT_FOUND = 'not_found'
+ERROR = 'error'
+EMPTY = 'empty'        # looked like a listing but no core field could be extracted
+UNKNOWN = 'unknown'
+
+# Worth running the extractors on
+SCRAPABLE_PAGE_TYPES = {LISTING, UNKNOWN}
+# Permanently gone; skip without counting as a failure
+DEAD_PAGE_TYPES = {REMOVED, NOT_FOUND}
+
+# Only the start of the document is inspected; markers all live near the top
+HEAD_CHARS = 50000
+
+# Interstitial-only text and elements; the bot-detection vendor's own scripts load on normal pages too
+CHALLENGE_MARKERS = [
+    'px-captcha',
+    'press & hold',
+    'press and hold',
+    'captcha-container',
+    'access to this page has been denied',
+    'please verify you are a human',
+]
+NOT_FOUND_MARKERS = [
+    "page not found",
+    "this page doesn't exist",
+    "we can't find the page",
+    "we couldn't find this page",
+]
+ERROR_MARKERS = [
+    'something went wrong',
+    'service unavailable',
+    'internal server error',
+]
+REMOVED_MARKERS = [
+    '"homestatus":"off_market"',
+    'this home is no longer available',
+    'this listing has been removed',
+]
+# Rendered listing facts; a page showing these is a listing whatever else it loads
+STRONG_LISTING_MARKERS = [
+    'data-testid="price"',
+    'data-testid="bed-bath-sqft-facts"',
+]
+LISTING_MARKERS = STRONG_LISTING_MARKERS + [
+    '"zpid"',
+]
+
+# A record missing all of these carries no listing data
+CORE_FIELDS = ['price', 'address', 'beds', 'sqft']
+
+
+def classify_page(html, title='', status=None):
+    """Cheap classification of a fetched/rendered page before any extractor runs"""
+    if status in (403, 429):
+        return CHALLENGE
+    if status == 404 or status == 410:
+        return NOT_FOUND
+    if status is not None and status >= 500:
+        return ERROR
+
+    head = (html or '')[:HEAD_CHARS].lower()
+    title = (title or '').lower()
+
+    # An off-market page still shows its last price, so removal is checked first
+    if any(marker in head for marker in REMOVED_MARKERS):
+        return REMOVED
+    if any(marker in head for marker in STRONG_LISTING_MARKERS):
+        return LISTING
+    if any(marker in head for marker in CHALLENGE_MARKERS) or 'access denied' in title:
+        return CHALLENGE
+    if re.search(r'\b404\b', title) or any(marker in head for marker in NOT_FOUND_MARKERS):
+        return NOT_FOUND
+    if any(marker in head for marker in LISTING_MARKERS):
+        return LISTING
+    if any(marker in head for marker in ERROR_MARKERS):
+        return ERROR
+    return UNKNOWN
+
+
+def is_empty_record(property_data):
+    return all(property_data.get(field, 'N/A') == 'N/A' for field in CORE_FIELDS)
+
+
+class PageNotScrapable(Exception):
+    """Raised instead of extracting from a page that isn't a usable listing"""
+
+    def __init__(self, page_type, url):
+        super().__init__(f"{page_type} page at {url}")
+        self.page_type = page_type
+        self.url = url
+
+
+class SessionCircuitBreaker:
+    """Trips when challenge pages pile up within the last few page loads.
+
+    A tripped breaker means the session is burned: the scraper should cool
+    down (doubling each trip, capped) and start a fresh session with a new
+    user agent before retrying. After max_trips in one scrape it gives up.
+    """
+
+    def __init__(self, block_threshold=2, window=10, base_cooldown=60, max_cooldown=900, max_trips=3):
+        self.block_threshold = block_threshold
+        self.recent = deque(maxlen=window)
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.max_trips = max_trips
+        self.trips = 0
+
+    def record(self, page_type):
+        self.recent.append(page_type == CHALLENGE)
+
+    @property
+    def tripped(self):
+        return sum(self.recent) >= self.block_threshold
+
+    @property
+    def exhausted(self):
+        return self.trips >= self.max_trips
+
+    def trip(self):
+        """Register a trip and return how long to cool down before the new session"""
+        self.trips += 1
+        self.recent.clear()
+        return min(self.max_cooldown, self.base_cooldown * 2 ** (self.trips - 1))
+
+    def reset(self):
+        self.recent.clear()
+        self.trips = 0
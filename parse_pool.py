@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+# Runs in the browser before the snapshot: the scrolls and "Show more" clicks
+# the extractors would otherwise do one by one, so lazily rendered sections
+# (scores, schools, climate risks, nearby cities) are in the captured HTML.
+HYDRATE_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+(async () => {
+    const steps = 6;
+    for (let i = 1; i <= steps; i++) {
+        window.scrollTo(0, document.body.scrollHeight * i / steps);
+        await sleep(400);
+    }
+    for (const button of document.querySelectorAll('button')) {
+        if (button.textContent.includes('Show more')) {
+            try { button.click(); } catch (e) {}
+        }
+    }
+    const climate = [...document.querySelectorAll('h2, h3, h4, span, div')]
+        .find(el => el.childElementCount === 0 && el.textContent.includes('Climate risks'));
+    if (climate) {
+        climate.scrollIntoView({block: 'center'});
+        await sleep(1500);
+    }
+    window.scrollTo(0, document.body.scrollHeight);
+    await sleep(800);
+    done([document.documentElement.outerHTML, location.href, document.title]);
+})().catch(() => done(null));
+"""
+
+
+class PageSnapshot:
+    """What the browser side hands to the parse stage: rendered HTML plus a little page state"""
+
+    def __init__(self, requested_url, html, url, title, captured_at=None):
+        self.requested_url = requested_url
+        self.html = html
+        self.url = url
+        self.title = title
+        self.captured_at = captured_at or datetime.now().isoformat()
+        # Record fields decoded from the page's API responses, read while the tab was open
+        self.api_fields = {}
+
+
+def quiet_worker():
+    # Extractor progress lines from several processes would interleave with the browser log
+    sys.stdout = open(os.devnull, 'w')
+
+
+def parse_snapshot(html, url, field_groups, captured_at, api_fields=None):
+    """Worker side: run the extractors against a snapshot with a browserless scraper.
+    Returns (record or None, per-group seconds, skipped groups, per-group errors)."""
+    from zillow import MultiPropertyZillowScraper
+
+    page = MultiPropertyZillowScraper.from_page_source(html, url)
+    page.field_groups = field_groups
+    page.api_fields = api_fields or {}
+    property_data = page.extract_complete_property_data()
+    if property_data:
+        # When the page was seen, not when it was parsed
+        property_data['scraped_at'] = captured_at
+    return property_data, page.page_timings, page.skipped_groups, page.page_errors
+
+
+class ParsePool:
+    """Process pool that parses captured detail pages off the browser thread.
+
+    The browser side hydrates a listing, snapshots it and moves straight on
+    to the next one while a worker process runs the regex-heavy extractors
+    on the HTML. Each scraper keeps its own pending futures and harvests
+    finished records between listings, so page loads and parsing overlap
+    and use more than one core. Tile scrapers can share one pool.
+    """
+
+    def __init__(self, workers=2, max_pending=None):
+        self.workers = workers
+        # spawn: the parent has image/tile threads running, which fork does not mix well with
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=quiet_worker)
+        self.max_pending = max_pending or workers * 2
+        self.lock = threading.Lock()
+        self.stats = {'submitted': 0, 'parsed': 0, 'failed': 0, 'parse_seconds': 0.0, 'blocked_seconds': 0.0}
+
+    def submit(self, snapshot, field_groups):
+        with self.lock:
+            self.stats['submitted'] += 1
+        return self.executor.submit(parse_snapshot, snapshot.html, snapshot.url, list(field_groups),
+                                    snapshot.captured_at, snapshot.api_fields)
+
+    def wait_for_slot(self, futures):
+        """Back-pressure: block while a scraper already has max_pending parses in flight"""
+        in_flight = [future for future in futures if not future.done()]
+        if len(in_flight) < self.max_pending:
+            return
+        started = time.time()
+        wait(in_flight, return_when=FIRST_COMPLETED)
+        with self.lock:
+            self.stats['blocked_seconds'] += time.time() - started
+
+    def record(self, timings, ok):
+        with self.lock:
+            self.stats['parsed' if ok else 'failed'] += 1
+            self.stats['parse_seconds'] += sum(timings.values())
+
+    def close(self):
+        self.executor.shutdown(wait=True)
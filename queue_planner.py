@@ -0,0 +1,255 @@
+import argparse
+import glob
+import json
+import os
+import statistics
+
+from city_queues import city_queues, parse_search_state
+
+# Zillow regionType values used in regionSelection
+REGION_TYPE_COUNTY = 4
+REGION_TYPE_CITY = 6
+
+# mapBounds are viewport rectangles, so a county's box also covers cities in
+# neighbouring counties (Boston sits inside Middlesex's box). Known membership
+# wins over geometry; geometry is only the fallback for entries not listed here.
+CITY_COUNTIES = {
+    'cambridge-ma': 'middlesex-county-ma', 'waltham-ma': 'middlesex-county-ma',
+    'arlington-ma': 'middlesex-county-ma', 'marlborough-ma': 'middlesex-county-ma',
+    'newton-ma': 'middlesex-county-ma', 'medford-ma': 'middlesex-county-ma',
+    'lowell-ma': 'middlesex-county-ma', 'somerville-ma': 'middlesex-county-ma',
+    'fitchburg-ma': 'worcester-county-ma',
+    'boston-ma': 'suffolk-county-ma', 'revere-ma': 'suffolk-county-ma',
+    'plymouth-ma': 'plymouth-county-ma',
+    'falmouth-ma': 'barnstable-county-ma', 'bourne-ma': 'barnstable-county-ma',
+    'sandwich-ma': 'barnstable-county-ma',
+    'brookline-ma': 'norfolk-county-ma', 'weymouth-ma': 'norfolk-county-ma',
+    'quincy-ma': 'norfolk-county-ma',
+    'salem-ma': 'essex-county-ma', 'gloucester-ma': 'essex-county-ma',
+    'andover-ma': 'essex-county-ma', 'lynn-ma': 'essex-county-ma',
+    'fall-river-ma': 'bristol-county-ma', 'taunton-ma': 'bristol-county-ma',
+    'dartmouth-ma': 'bristol-county-ma', 'attleboro-ma': 'bristol-county-ma',
+    'springfield-ma': 'hampden-county-ma',
+    'pittsfield-ma': 'berkshire-county-ma', 'great-barrington-ma': 'berkshire-county-ma',
+    'becket-ma': 'berkshire-county-ma', 'north-adams-ma': 'berkshire-county-ma',
+}
+
+# Used when there is no run history to learn from
+DEFAULT_SECONDS_PER_PROPERTY = 30
+# Search page load, scrolling and the between-cities break
+ENTRY_OVERHEAD_SECONDS = 90
+# Share of a city's bounds that must sit inside a county's bounds to count as overlap
+MIN_CONTAINMENT = 0.9
+
+
+class QueueEntry:
+    def __init__(self, city, max_properties, search_url, queue_id):
+        self.city = city
+        self.max_properties = max_properties
+        self.search_url = search_url
+        self.queue_id = queue_id
+
+        state = parse_search_state(search_url)
+        self.bounds = state.get('mapBounds')
+        regions = state.get('regionSelection') or [{}]
+        self.region_id = regions[0].get('regionId')
+        self.region_type = regions[0].get('regionType')
+
+    @property
+    def is_county(self):
+        return self.region_type == REGION_TYPE_COUNTY
+
+    def as_tuple(self):
+        return (self.city, self.max_properties, self.search_url)
+
+
+def bounds_area(bounds):
+    return max(0.0, bounds['east'] - bounds['west']) * max(0.0, bounds['north'] - bounds['south'])
+
+
+def containment(inner, outer):
+    """Fraction of inner's bounding box that lies inside outer's"""
+    if not inner or not outer or bounds_area(inner) == 0:
+        return 0.0
+    overlap = {
+        'west': max(inner['west'], outer['west']), 'east': min(inner['east'], outer['east']),
+        'south': max(inner['south'], outer['south']), 'north': min(inner['north'], outer['north']),
+    }
+    return bounds_area(overlap) / bounds_area(inner)
+
+
+def entries_overlap(a, b):
+    """True if two queue entries will return (some of) the same listings"""
+    if a.city == b.city or (a.region_id is not None and a.region_id == b.region_id):
+        return True
+    if a.is_county == b.is_county:
+        # Counties partition the state; distinct cities don't share listings
+        return False
+    county, city = (a, b) if a.is_county else (b, a)
+    if city.city in CITY_COUNTIES:
+        return CITY_COUNTIES[city.city] == county.city
+    return containment(city.bounds, county.bounds) >= MIN_CONTAINMENT
+
+
+def find_overlap_groups(entries):
+    """Union-find over pairwise overlap; returns {city: group name} for every entry"""
+    parent = {entry.city: entry.city for entry in entries}
+
+    def root(city):
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    for i, a in enumerate(entries):
+        for b in entries[i + 1:]:
+            if entries_overlap(a, b):
+                ra, rb = root(a.city), root(b.city)
+                if ra != rb:
+                    # Name the group after its county when it has one
+                    county_root = ra if any(e.city == ra and e.is_county for e in entries) else rb
+                    other = rb if county_root == ra else ra
+                    parent[other] = county_root
+
+    return {entry.city: root(entry.city) for entry in entries}
+
+
+def load_timing_history(data_dir):
+    """Median seconds per scraped property, per city, from past run summaries"""
+    samples = {}
+    for path in glob.glob(os.path.join(data_dir, "queue_*", "*", "summary_q*.json")):
+        try:
+            with open(path) as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        duration = summary.get('duration_seconds')
+        actual = summary.get('actual_properties')
+        if duration and actual:
+            samples.setdefault(summary.get('city'), []).append(duration / actual)
+    return {city: statistics.median(values) for city, values in samples.items()}
+
+
+def load_group_timings(data_dir):
+    """Median seconds per page for each extractor group, from past run summaries"""
+    samples = {}
+    for path in glob.glob(os.path.join(data_dir, "queue_*", "*", "summary_q*.json")):
+        try:
+            with open(path) as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for group, seconds in (summary.get('extractor_seconds') or {}).items():
+            samples.setdefault(group, []).append(seconds)
+    return {group: statistics.median(values) for group, values in samples.items()}
+
+
+def predict_seconds(entry, timings):
+    if timings:
+        fallback = statistics.median(timings.values())
+    else:
+        fallback = DEFAULT_SECONDS_PER_PROPERTY
+    return ENTRY_OVERHEAD_SECONDS + entry.max_properties * timings.get(entry.city, fallback)
+
+
+def plan_queues(queues=None, num_queues=None, timings=None):
+    """Group overlapping entries and spread the groups over queues by predicted wall time.
+
+    Overlapping entries always land in the same queue, back to back, so the
+    runner can share one dedupe set across them. Groups are assigned longest
+    first to the currently lightest queue (LPT scheduling).
+    """
+    queues = queues or city_queues
+    timings = timings or {}
+    num_queues = num_queues or len(queues)
+
+    entries = [QueueEntry(city, count, url, queue_id)
+               for queue_id, cities in queues.items() for city, count, url in cities]
+    groups = find_overlap_groups(entries)
+
+    members = {}
+    for entry in entries:
+        members.setdefault(groups[entry.city], []).append(entry)
+    for group_entries in members.values():
+        # Counties first, then biggest targets; the shared dedupe set makes order matter little
+        group_entries.sort(key=lambda e: (not e.is_county, -e.max_properties))
+
+    group_seconds = {name: sum(predict_seconds(e, timings) for e in group_entries)
+                     for name, group_entries in members.items()}
+
+    loads = {queue_id: 0.0 for queue_id in range(1, num_queues + 1)}
+    planned = {queue_id: [] for queue_id in loads}
+    for name in sorted(group_seconds, key=group_seconds.get, reverse=True):
+        queue_id = min(loads, key=loads.get)
+        planned[queue_id].extend(members[name])
+        loads[queue_id] += group_seconds[name]
+
+    return {
+        'queues': {queue_id: [entry.as_tuple() for entry in planned[queue_id]] for queue_id in planned},
+        'overlap_groups': {city: group for city, group in groups.items()
+                           if len(members[group]) > 1},
+        'predicted_seconds': loads,
+    }
+
+
+def save_plan(plan, path):
+    serializable = dict(plan)
+    serializable['queues'] = {str(k): [list(e) for e in v] for k, v in plan['queues'].items()}
+    serializable['predicted_seconds'] = {str(k): round(v) for k, v in plan['predicted_seconds'].items()}
+    with open(path, 'w') as f:
+        json.dump(serializable, f, indent=2)
+
+
+def load_plan(path):
+    with open(path) as f:
+        plan = json.load(f)
+    plan['queues'] = {int(k): [tuple(e) for e in v] for k, v in plan['queues'].items()}
+    return plan
+
+
+def shares_dedupe_scope(plan, city, next_city):
+    """True if next_city should keep city's scraped-URL set (same overlap group)"""
+    groups = (plan or {}).get('overlap_groups', {})
+    return city in groups and groups.get(city) == groups.get(next_city)
+
+
+def print_plan(plan, timings):
+    print("=" * 80)
+    print("QUEUE PLAN")
+    print("=" * 80)
+    for queue_id, entries in plan['queues'].items():
+        hours = plan['predicted_seconds'][queue_id] / 3600
+        total = sum(count for _, count, _ in entries)
+        print(f"\nQueue {queue_id}: {total} properties, {len(entries)} locations, ~{hours:.1f} h predicted")
+        for city, count, _ in entries:
+            group = plan['overlap_groups'].get(city)
+            rate = timings.get(city)
+            rate_note = f"{rate:.0f}s/prop" if rate else "default rate"
+            group_note = f"  [shares dedupe with {group}]" if group and group != city else ""
+            print(f"  • {city}: {count} properties ({rate_note}){group_note}")
+
+    groups = {}
+    for city, group in plan['overlap_groups'].items():
+        groups.setdefault(group, []).append(city)
+    print(f"\nOverlap groups: {len(groups)}")
+    for group, cities in sorted(groups.items()):
+        print(f"  • {group}: {', '.join(c for c in cities if c != group)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dedupe overlapping queue entries and rebalance queues by predicted runtime")
+    parser.add_argument('--data-dir', default=os.getenv('OUTPUT_DIR', 'data'), help="where past run summaries live")
+    parser.add_argument('--queues', type=int, default=None, help="number of queues to plan (default: current count)")
+    parser.add_argument('--output', default='queue_plan.json', help="plan file for main.py (QUEUE_PLAN)")
+    parser.add_argument('--dry-run', action='store_true', help="print the plan without writing it")
+    args = parser.parse_args()
+
+    timings = load_timing_history(args.data_dir)
+    plan = plan_queues(num_queues=args.queues, timings=timings)
+    print_plan(plan, timings)
+
+    if args.dry_run:
+        print("\n(dry run - no plan file written)")
+    else:
+        save_plan(plan, args.output)
+        print(f"\n📁 Plan written to {args.output}; run with QUEUE_PLAN={args.output}")
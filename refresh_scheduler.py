@@ -0,0 +1,181 @@
+import argparse
+import json
+import math
+import os
+from datetime import datetime
+
+from history_index import DEFAULT_DB, HistoryIndex
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Listings seen for the first time this recently are re-checked twice a day
+NEW_LISTING_SECONDS = 3 * DAY
+MIN_INTERVAL = 12 * HOUR
+MAX_INTERVAL = 30 * DAY
+# A listing unchanged for N days is next checked after N * this (so 4 quiet weeks -> weekly)
+STABILITY_FACTOR = 0.25
+# Changes inside this window mark a listing as volatile
+RECENT_WINDOW = 30 * DAY
+
+# Used until the history has run summaries to measure seconds per listing from
+DEFAULT_SECONDS_PER_LISTING = 30.0
+
+# Status from the latest price-history event; off-market listings rarely change again
+STATUS_WEIGHTS = [
+    ('sold', 0.2), ('removed', 0.2), ('off market', 0.2), ('pending', 0.6), ('contingent', 0.6),
+]
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value).timestamp()
+
+
+def listing_profiles(index, city=None):
+    """Change history per listing from the index's snapshots: first/last seen and every
+    price or status change, with the latest URL, city, price and status"""
+    query = "SELECT listing_id, scraped_at, city, price, status, url FROM snapshots"
+    params = []
+    if city:
+        query += " WHERE city LIKE ?"
+        params.append(f"%{city}%")
+    query += " ORDER BY listing_id, scraped_at"
+
+    profiles = []
+    profile = None
+    for row in index.conn.execute(query, params):
+        seen = parse_time(row['scraped_at'])
+        if profile is None or profile['listing_id'] != row['listing_id']:
+            profile = {'listing_id': row['listing_id'], 'first_seen': seen, 'last_seen': seen, 'snapshots': 0,
+                       'price_changes': [], 'status_changes': [], 'price': row['price'], 'status': row['status'],
+                       'url': row['url'], 'city': row['city']}
+            profiles.append(profile)
+        else:
+            if row['price'] is not None and profile['price'] is not None and row['price'] != profile['price']:
+                profile['price_changes'].append(seen)
+            if row['status'] not in (None, 'N/A') and profile['status'] not in (None, 'N/A') \
+                    and row['status'] != profile['status']:
+                profile['status_changes'].append(seen)
+            profile['last_seen'] = seen
+        profile['snapshots'] += 1
+        for field in ('price', 'status', 'url', 'city'):
+            if row[field] not in (None, 'N/A'):
+                profile[field] = row[field]
+
+    # In the store layout an unchanged listing gets no new snapshot; its sightings say when it was last seen
+    sightings = {row[0]: parse_time(row[1]) for row in
+                 index.conn.execute("SELECT listing_id, MAX(seen_at) FROM sightings GROUP BY listing_id")}
+    for profile in profiles:
+        seen = sightings.get(profile['listing_id'])
+        if seen is not None and seen > profile['last_seen']:
+            profile['last_seen'] = seen
+    return profiles
+
+
+def refresh_interval(profile, now):
+    """Seconds between checks: short for new or recently changed listings, growing with quiet time"""
+    if now - profile['first_seen'] < NEW_LISTING_SECONDS:
+        return MIN_INTERVAL
+    changes = profile['price_changes'] + profile['status_changes']
+    last_change = max(changes) if changes else profile['first_seen']
+    interval = (now - last_change) * STABILITY_FACTOR
+    if sum(1 for changed in changes if now - changed < RECENT_WINDOW) >= 2:
+        interval /= 2
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, interval))
+
+
+def listing_value(profile, now):
+    """Relative worth of a fresh copy: active and volatile listings first, pricier ones slightly ahead"""
+    status = str(profile['status'] or '').lower()
+    value = next((weight for marker, weight in STATUS_WEIGHTS if marker in status), 1.0)
+    recent = sum(1 for changed in profile['price_changes'] + profile['status_changes'] if now - changed < RECENT_WINDOW)
+    value *= 1 + recent
+    if profile['price']:
+        value *= 1 + 0.1 * math.log10(max(profile['price'], 100000) / 100000)
+    return value
+
+
+def schedule(profiles, now=None):
+    """Profiles with next_due, overdue ratio and priority; only listings already due, highest priority first"""
+    now = now or datetime.now().timestamp()
+    due = []
+    for profile in profiles:
+        if not profile['url']:
+            continue
+        interval = refresh_interval(profile, now)
+        next_due = profile['last_seen'] + interval
+        if next_due > now:
+            continue
+        overdue = (now - next_due) / interval
+        due.append(dict(profile, interval=interval, next_due=next_due, overdue=overdue,
+                        priority=(1 + overdue) * listing_value(profile, now)))
+    due.sort(key=lambda profile: profile['priority'], reverse=True)
+    return due
+
+
+def seconds_per_listing(index):
+    """Average seconds per scraped listing across recorded runs"""
+    row = index.conn.execute(
+        "SELECT SUM(duration_seconds), SUM(actual_properties) FROM runs WHERE actual_properties > 0"
+    ).fetchone()
+    if not row or not row[1]:
+        return DEFAULT_SECONDS_PER_LISTING
+    return row[0] / row[1]
+
+
+def plan_refresh(index, budget_seconds, city=None, now=None, per_listing=None):
+    """The due listings that fit in budget_seconds, most overdue/valuable first"""
+    per_listing = per_listing or seconds_per_listing(index)
+    capacity = int(budget_seconds // per_listing)
+    return schedule(listing_profiles(index, city=city), now=now)[:capacity], per_listing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick previously scraped listings due for a refresh")
+    parser.add_argument('command', choices=['plan', 'seed'])
+    parser.add_argument('--data-dir', default=os.getenv('OUTPUT_DIR', 'data'))
+    parser.add_argument('--db', default=DEFAULT_DB, help="history index (HISTORY_DB, default history.sqlite)")
+    parser.add_argument('--budget-minutes', type=float, default=60, help="scrape time to fill")
+    parser.add_argument('--seconds-per-listing', type=float, help="default: measured from past runs")
+    parser.add_argument('--city')
+    parser.add_argument('--output', help="write the planned URLs to this file (plan)")
+    parser.add_argument('--job-db', default=os.getenv('JOB_DB', 'jobs.sqlite'), help="job store to seed (seed)")
+    parser.add_argument('--run-id', help="job run to add the listings to (seed); "
+                                         "use a queue_* name so merged output is picked up by the history index")
+    args = parser.parse_args()
+
+    index = HistoryIndex(args.db)
+    try:
+        # Brings the index up to date (or rebuilds it on a fresh checkout) from the committed output
+        totals = index.ingest(args.data_dir)
+        if totals['files']:
+            print(f"📥 History index: {totals['files']} new files, {totals['snapshots']} snapshots")
+        planned, per_listing = plan_refresh(index, args.budget_minutes * 60, city=args.city,
+                                            per_listing=args.seconds_per_listing)
+    finally:
+        index.close()
+
+    print(f"🗓️ {len(planned)} listings fit in {args.budget_minutes:.0f} minutes at ~{per_listing:.0f}s each")
+    for profile in planned[:20]:
+        print(f"  {profile['priority']:6.2f}  every {profile['interval'] / DAY:4.1f}d, "
+              f"{profile['overdue']:5.1f}x overdue  {profile['status'] or 'N/A':<20} {profile['url']}")
+
+    if args.command == 'plan':
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump([{'url': p['url'], 'city': p['city'], 'priority': round(p['priority'], 3)}
+                           for p in planned], f, indent=2)
+            print(f"📁 Plan written to {args.output}")
+    else:
+        if not args.run_id:
+            parser.error("seed needs --run-id")
+        from job_queue import JobStore, PROPERTY
+        from listing_identity import listing_key
+        store = JobStore(args.job_db)
+        try:
+            added = store.add_jobs(args.run_id, PROPERTY, [
+                (listing_key({'url': p['url']}), {'url': p['url'], 'city': p['city']}) for p in planned
+            ])
+        finally:
+            store.close()
+        print(f"🌱 Seeded {added} refresh jobs for run {args.run_id}")
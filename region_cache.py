@@ -0,0 +1,74 @@
+import json
+import os
+import re
+import threading
+import time
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+# Only the region-level fields; scores and schools depend on the exact address
+REGION_FIELDS = ['region', 'nearby_cities']
+
+
+def region_key(address):
+    """Cache key for a listing's region: its ZIP code, else 'city, ST' from the address"""
+    if not address or address == 'N/A':
+        return None
+    match = re.search(r'\b([A-Z]{2})\s+(\d{5})(?:-\d{4})?\s*$', address.strip())
+    if match:
+        return f"zip:{match.group(2)}"
+    parts = [part.strip() for part in address.split(',')]
+    if len(parts) >= 3 and re.fullmatch(r'[A-Z]{2}', parts[-1][:2]):
+        return f"city:{parts[-2].lower()}, {parts[-1][:2]}"
+    return None
+
+
+class RegionCache:
+    """Persisted TTL cache of region-level listing fields (nearby cities, region name).
+
+    These are the same for every listing in a ZIP code, so after the first
+    listing in a region the scroll-and-wait extraction can be skipped.
+    Entries older than ttl_seconds are treated as missing and re-extracted.
+    """
+
+    def __init__(self, path, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.entries = self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        with self.lock:
+            now = time.time()
+            snapshot = {key: entry for key, entry in self.entries.items()
+                        if now - entry['stored_at'] < self.ttl_seconds}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".tmp", 'w') as f:
+            json.dump(snapshot, f, indent=2, sort_keys=True)
+        os.replace(self.path + ".tmp", self.path)
+
+    def get(self, key):
+        """Cached fields for key, or None if unknown or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None or time.time() - entry['stored_at'] >= self.ttl_seconds:
+            return None
+        # Copies, so records never share a nearby_cities list
+        return json.loads(json.dumps({field: entry['values'][field] for field in REGION_FIELDS
+                                      if field in entry['values']}))
+
+    def put(self, key, values):
+        with self.lock:
+            self.entries[key] = {
+                'values': json.loads(json.dumps({field: values[field] for field in REGION_FIELDS if field in values})),
+                'stored_at': time.time(),
+            }
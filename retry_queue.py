@@ -0,0 +1,86 @@
+import heapq
+import random
+import time
+
+
+class RetryQueue:
+    """Failed listings waiting for another attempt, with exponential backoff.
+
+    A URL that fails is scheduled base_delay * 2^(attempt-1) seconds out
+    (jittered, capped at max_delay) instead of being dropped; once it has
+    failed max_attempts times, counting the first try, it is recorded as
+    permanently failed. The scraper interleaves due retries with new links
+    and drains whatever is left at the end of the city.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=30, max_delay=300):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.heap = []
+        self.sequence = 0
+        self.attempts = {}
+        self.errors = {}
+        self.failed = {}
+        self.stats = {'queued': 0, 'recovered': 0, 'failed': 0}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def add(self, url, error):
+        """Record a failed attempt; returns the backoff delay, or None if the URL is out of attempts"""
+        attempts = self.attempts.get(url, 0) + 1
+        self.attempts[url] = attempts
+        self.errors[url] = str(error)
+        if attempts >= self.max_attempts:
+            self.failed[url] = {'url': url, 'attempts': attempts, 'error': str(error)}
+            self.stats['failed'] += 1
+            return None
+
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+        self.sequence += 1
+        heapq.heappush(self.heap, (time.time() + delay, self.sequence, url))
+        self.stats['queued'] += 1
+        return delay
+
+    def pop_ready(self):
+        """Next URL whose backoff has expired, or None"""
+        if self.heap and self.heap[0][0] <= time.time():
+            return heapq.heappop(self.heap)[2]
+        return None
+
+    def next_ready_in(self):
+        """Seconds until the next retry is due; None when nothing is queued"""
+        if not self.heap:
+            return None
+        return max(0.0, self.heap[0][0] - time.time())
+
+    def succeeded(self, url):
+        if url in self.attempts:
+            self.stats['recovered'] += 1
+
+    def abandon(self, reason):
+        """Give up on everything still queued (e.g. the scrape stopped early)"""
+        while self.heap:
+            _, _, url = heapq.heappop(self.heap)
+            self.failed[url] = {'url': url, 'attempts': self.attempts[url],
+                                'error': f"{self.errors[url]} (not retried: {reason})"}
+            self.stats['failed'] += 1
+
+    def fork(self):
+        """An empty queue with the same settings, for a worker scraping with its own browser"""
+        return RetryQueue(max_attempts=self.max_attempts, base_delay=self.base_delay, max_delay=self.max_delay)
+
+    def merge(self, other):
+        """Fold a forked queue back in once its worker is done"""
+        self.attempts.update(other.attempts)
+        self.errors.update(other.errors)
+        self.failed.update(other.failed)
+        for key, value in other.stats.items():
+            self.stats[key] += value
+        for due, _, url in other.heap:
+            self.sequence += 1
+            heapq.heappush(self.heap, (due, self.sequence, url))
+
+    def failed_urls(self):
+        return list(self.failed.values())
@@ -0,0 +1,271 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from page_classifier import CHALLENGE
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def process_tree_rss(pid):
+    """Resident bytes of a process and all its descendants (Linux /proc); None where unavailable"""
+    if not pid or not os.path.isdir('/proc'):
+        return None
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name is parenthesised and may contain spaces
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f'/proc/{current}/statm') as f:
+                total += int(f.read().split()[1]) * PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            pass
+        stack.extend(children.get(current, []))
+    return total
+
+
+def driver_pid(driver):
+    """PID at the root of the browser's process tree (chromedriver service, else Chrome itself)"""
+    service = getattr(driver, 'service', None)
+    process = getattr(service, 'process', None)
+    if process is not None:
+        return process.pid
+    return getattr(driver, 'browser_pid', None)
+
+
+class RunMetrics:
+    """Live progress for a long queue run: a Prometheus text endpoint and a status JSON file.
+
+    Scrapers register themselves and report each kept listing and session
+    rotation; extractor latency, page types and fetch fallbacks are read
+    from the registered scrapers when a snapshot is taken. Retry counts come
+    from the current city's queue plus the cities already finished, since
+    the queue is replaced for every city. The status file
+    is rewritten every `interval` seconds with throughput and an ETA
+    projected against the queue's expected total.
+    """
+
+    def __init__(self, queue_id, expected_total, status_path=None, port=None, interval=30):
+        self.queue_id = queue_id
+        self.expected_total = expected_total
+        self.status_path = status_path
+        self.port = port
+        self.interval = interval
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.scrapers = []
+        self.properties = 0
+        self.last_property_at = None
+        self.city = None
+        self.cities_done = 0
+        self.cities_failed = 0
+        self.cities_total = 0
+        self.retry_queue = None
+        self.retries = {'queued': 0, 'recovered': 0, 'failed': 0}
+        self.rotations = 0
+        self.released = set()
+        self.server = None
+        self.stopped = threading.Event()
+
+    def register(self, scraper):
+        with self.lock:
+            self.scrapers.append(scraper)
+        scraper.metrics = self
+
+    def release(self, scraper):
+        """The scraper's browser has quit; its counters still count, its (possibly reused) PID no longer does"""
+        with self.lock:
+            self.released.add(id(scraper))
+
+    def record_rotation(self):
+        with self.lock:
+            self.rotations += 1
+
+    def record_property(self):
+        with self.lock:
+            self.properties += 1
+            self.last_property_at = time.time()
+
+    def start_city(self, city, total, retry_queue=None):
+        with self.lock:
+            self.city = city
+            self.cities_total = total
+            self.retry_queue = retry_queue
+
+    def end_city(self, ok):
+        with self.lock:
+            if self.retry_queue is not None:
+                for key in self.retries:
+                    self.retries[key] += self.retry_queue.stats[key]
+                self.retry_queue = None
+            if ok:
+                self.cities_done += 1
+            else:
+                self.cities_failed += 1
+
+    def snapshot(self):
+        now = time.time()
+        with self.lock:
+            scrapers = list(self.scrapers)
+            released = set(self.released)
+            retries = dict(self.retries)
+            if self.retry_queue is not None:
+                # Parallel tile workers retry in forks that are merged into it when the tiles finish
+                for key in retries:
+                    retries[key] += self.retry_queue.stats[key]
+            rotations = self.rotations
+            properties = self.properties
+            last_property_at = self.last_property_at
+            status = {
+                'queue_id': self.queue_id,
+                'updated_at': datetime.now().isoformat(timespec='seconds'),
+                'started_at': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+                'city': self.city,
+                'cities_done': self.cities_done,
+                'cities_failed': self.cities_failed,
+                'cities_total': self.cities_total,
+            }
+
+        elapsed = now - self.started
+        rate = properties / (elapsed / 3600) if elapsed > 0 else 0.0
+        remaining = max(0, self.expected_total - properties)
+        eta_seconds = remaining / rate * 3600 if rate > 0 else None
+
+        extractors, page_types = {}, {}
+        counters = {'retries_queued': retries['queued'], 'retries_recovered': retries['recovered'],
+                    'failed_permanently': retries['failed'], 'session_rotations': rotations,
+                    'http_fetches': 0, 'browser_fallbacks': 0}
+        rss = 0
+        for scraper in scrapers:
+            for group, timings in list(scraper.extractor_timings.items()):
+                timings = list(timings)
+                totals = extractors.setdefault(group, {'count': 0, 'seconds': 0.0})
+                totals['count'] += len(timings)
+                totals['seconds'] += sum(timings)
+            for page_type, count in list(scraper.page_stats.items()):
+                page_types[page_type] = page_types.get(page_type, 0) + count
+            counters['http_fetches'] += scraper.fetch_stats['http']
+            counters['browser_fallbacks'] += scraper.fetch_stats['browser_fallback']
+            if id(scraper) not in released and not getattr(scraper.driver, 'is_static', False):
+                rss += process_tree_rss(driver_pid(scraper.driver)) or 0
+
+        status.update({
+            'elapsed_seconds': round(elapsed),
+            'properties_scraped': properties,
+            'expected_total': self.expected_total,
+            'properties_per_hour': round(rate, 1),
+            'eta_seconds': round(eta_seconds) if eta_seconds is not None else None,
+            'projected_finish': datetime.fromtimestamp(now + eta_seconds).isoformat(timespec='seconds')
+                                if eta_seconds is not None else None,
+            'seconds_since_last_property': round(now - last_property_at) if last_property_at else None,
+            'blocks': page_types.get(CHALLENGE, 0),
+            'page_types': page_types,
+            'extractor_mean_seconds': {group: round(totals['seconds'] / totals['count'], 3)
+                                       for group, totals in extractors.items() if totals['count']},
+            'driver_rss_bytes': rss or None,
+        })
+        status.update(counters)
+        return status, extractors
+
+    def prometheus(self):
+        status, extractors = self.snapshot()
+        labels = f'queue="{self.queue_id}"'
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for extra, value in samples:
+                if value is not None:
+                    lines.append(f"{name}{{{labels}{extra}}} {value}")
+
+        metric('zillow_properties_scraped_total', 'counter', 'Listings kept so far', [('', status['properties_scraped'])])
+        metric('zillow_properties_expected', 'gauge', 'Listings the queue is expected to produce',
+               [('', status['expected_total'])])
+        metric('zillow_properties_per_hour', 'gauge', 'Average throughput since the run started',
+               [('', status['properties_per_hour'])])
+        metric('zillow_eta_seconds', 'gauge', 'Projected seconds until the expected total is reached',
+               [('', status['eta_seconds'])])
+        metric('zillow_seconds_since_last_property', 'gauge', 'Time since a listing was last kept',
+               [('', status['seconds_since_last_property'])])
+        metric('zillow_cities_done', 'gauge', 'Cities finished in this queue', [('', status['cities_done'])])
+        metric('zillow_cities_failed', 'gauge', 'Cities that produced nothing', [('', status['cities_failed'])])
+        metric('zillow_pages_total', 'counter', 'Detail pages by classified type',
+               [(f',type="{page_type}"', count) for page_type, count in sorted(status['page_types'].items())])
+        metric('zillow_extractor_seconds', 'summary', 'Time spent per extractor group',
+               [])
+        for group, totals in sorted(extractors.items()):
+            lines.append(f'zillow_extractor_seconds_sum{{{labels},group="{group}"}} {totals["seconds"]:.3f}')
+            lines.append(f'zillow_extractor_seconds_count{{{labels},group="{group}"}} {totals["count"]}')
+        for name in ('retries_queued', 'retries_recovered', 'failed_permanently', 'session_rotations',
+                     'http_fetches', 'browser_fallbacks'):
+            metric(f'zillow_{name}_total', 'counter', name.replace('_', ' ').capitalize(), [('', status[name])])
+        metric('zillow_driver_rss_bytes', 'gauge', 'Resident memory of the browser process trees',
+               [('', status['driver_rss_bytes'])])
+        return "\n".join(lines) + "\n"
+
+    def write_status(self):
+        if not self.status_path:
+            return
+        status, _ = self.snapshot()
+        with open(self.status_path + ".tmp", 'w') as f:
+            json.dump(status, f, indent=2)
+        os.replace(self.status_path + ".tmp", self.status_path)
+
+    def start(self):
+        if self.port:
+            metrics = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] != '/metrics':
+                        self.send_error(404)
+                        return
+                    body = metrics.prometheus().encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            # Localhost only: the run's numbers are nobody else's business
+            self.server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            print(f"📊 Metrics on http://127.0.0.1:{self.port}/metrics")
+
+        if self.status_path:
+            def rewrite():
+                while not self.stopped.wait(self.interval):
+                    try:
+                        self.write_status()
+                    except Exception as e:
+                        print(f"⚠️ Status file update failed: {e}")
+            threading.Thread(target=rewrite, daemon=True).start()
+            print(f"📊 Status file {self.status_path} (every {self.interval:g}s)")
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        try:
+            self.write_status()
+        except Exception:
+            pass
+        if self.server is not None:
+            self.server.shutdown()
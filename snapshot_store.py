@@ -0,0 +1,271 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from change_feed import UNORDERED_FIELDS, canonical_record, diff_fields
+from listing_identity import listing_key
+
+# One per city directory, rewritten in place every run
+STORE_FILE = "listings.jsonl"
+
+
+def serialize(record):
+    """One line per listing: sorted keys and no padding, so the same data always gives the same bytes"""
+    return json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def store_order(key):
+    """zpids numerically, then the odd URL-keyed listing"""
+    return (0, int(key), '') if key.isdigit() else (1, 0, key)
+
+
+def read_store(path):
+    """listing key -> (record, stored line); empty if the store doesn't exist yet"""
+    stored = {}
+    if not os.path.exists(path):
+        return stored
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line:
+                record = canonical_record(json.loads(line))
+                stored[listing_key(record)] = (record, line)
+    return stored
+
+
+def seen_listings(records):
+    """This run's listing keys in store order, for the run summary (the store itself only changes on edits)"""
+    return sorted({listing_key(record) for record in records}, key=store_order)
+
+
+def load_store(path):
+    return [record for record, _ in read_store(path).values()]
+
+
+def write_store(city_output_dir, records):
+    """Merge a run's listings into the city's store file.
+
+    Listings whose content didn't change keep their stored line byte for
+    byte (scraped_at and url included, see change_feed.VOLATILE_FIELDS), so
+    they add nothing to the nightly diff; scraped_at in the store therefore
+    means "last changed". When a listing was last seen comes from the run
+    summaries' seen_listings (see history_index's sightings table).
+    Listings not seen this run are kept as they were.
+    The file is only rewritten when something changed.
+    """
+    path = os.path.join(city_output_dir, STORE_FILE)
+    stored = read_store(path)
+    lines = {key: line for key, (_, line) in stored.items()}
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'not_seen': 0}
+
+    current = {listing_key(record): canonical_record(record) for record in records}
+    for key, record in current.items():
+        old = stored.get(key)
+        if old is None:
+            counts['new'] += 1
+        elif diff_fields(old[0], record):
+            counts['changed'] += 1
+        else:
+            counts['unchanged'] += 1
+            continue
+        lines[key] = serialize(record)
+    counts['not_seen'] = len(set(stored) - set(current))
+
+    if counts['new'] or counts['changed'] or not os.path.exists(path):
+        with open(path + ".tmp", 'w', encoding='utf-8', newline='\n') as f:
+            for key in sorted(lines, key=store_order):
+                f.write(lines[key] + "\n")
+        os.replace(path + ".tmp", path)
+
+    print(f"🗄️ Store: {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged, "
+          f"{counts['not_seen']} not seen this run -> {path}")
+    return path, counts
+
+
+def migrate(data_dir):
+    """Fold every city's timestamped JSON dumps, oldest first, into its store file"""
+    cities = 0
+    for city_dir in sorted(glob.glob(os.path.join(data_dir, "queue_*", "*"))):
+        dumps = sorted(glob.glob(os.path.join(city_dir, "zillow_*.json")), key=os.path.getmtime)
+        if not dumps:
+            continue
+        print(f"\n📦 {city_dir}: {len(dumps)} dumps")
+        for dump in dumps:
+            try:
+                with open(dump) as f:
+                    records = [record for record in json.load(f) if isinstance(record, dict)]
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Skipping {dump}: {e}")
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_store(city_dir, records)
+        cities += 1
+    return cities
+
+
+def sample_records(source=None, templates=4):
+    """Listing records to benchmark with: a real output dump, else extracted from synthetic pages"""
+    if source:
+        with open(source) as f:
+            return [record for record in json.load(f) if isinstance(record, dict)]
+    from benchmark import synthetic_page
+    from zillow import MultiPropertyZillowScraper
+    records = []
+    for index in range(templates):
+        url = f"https://www.zillow.com/homedetails/{index}-Main-St/{10000000 + index}_zpid/"
+        scraper = MultiPropertyZillowScraper.from_page_source(synthetic_page(index, filler_kb=8), url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            records.append(scraper.extract_complete_property_data())
+    return records
+
+
+def simulate_nights(templates, listings, nights, churn, turnover, seed=0):
+    """Night-by-night scrape results: a few price changes, a few listings come and go,
+    every record re-stamped, list fields and the scrape order shuffled each night"""
+    rng = random.Random(seed)
+    next_id = [20000000]
+
+    def new_listing():
+        next_id[0] += 1
+        record = json.loads(json.dumps(rng.choice(templates)))
+        record['zpid'] = str(next_id[0])
+        record['url'] = f"https://www.zillow.com/homedetails/{next_id[0]}-Elm-St/{next_id[0]}_zpid/"
+        record['address'] = f"{rng.randint(1, 999)} Elm St Unit {next_id[0] % 1000}, Boston, MA 02118"
+        record['price'] = f"${rng.randint(200, 2500) * 1000:,}"
+        return record
+
+    current = [new_listing() for _ in range(listings)]
+    started = datetime(2025, 1, 1, 3, 0)
+    for night in range(nights):
+        scraped_at = (started + timedelta(days=night)).isoformat()
+        if night:
+            for record in current:
+                if rng.random() < churn:
+                    price = f"${rng.randint(200, 2500) * 1000:,}"
+                    record['property_history'] = [{'date': scraped_at[:10], 'event': 'Price change', 'price': price}] \
+                        + list(record.get('property_history') or [])
+                    record['price'] = price
+            gone = int(len(current) * turnover)
+            current = current[gone:] + [new_listing() for _ in range(gone)]
+        run = [dict(record, scraped_at=scraped_at) for record in current]
+        for record in run:
+            # Older extractors listed these straight out of a set, in a different order every process
+            for field in UNORDERED_FIELDS:
+                if isinstance(record.get(field), list):
+                    record[field] = rng.sample(record[field], len(record[field]))
+        rng.shuffle(run)
+        yield run
+
+
+def git(directory, *args):
+    return subprocess.run(['git', '-C', directory, *args], check=True, capture_output=True, text=True).stdout
+
+
+def directory_bytes(path, exclude=None):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        if exclude in dirs:
+            dirs.remove(exclude)
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def write_full_layout(directory, records, night):
+    """What OUTPUT_MODE=full writes today: timestamped indent=4 JSON plus the flattened CSV"""
+    from zillow import MultiPropertyZillowScraper
+    scraper = MultiPropertyZillowScraper.from_page_source("<html></html>", "about:blank")
+    scraper.all_properties_data = records
+    original_cwd = os.getcwd()
+    try:
+        os.chdir(directory)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.save_all_properties(filename_prefix=f"zillow_q0_bench_night{night:03d}")
+    finally:
+        os.chdir(original_cwd)
+
+
+def write_store_layout(directory, records, night):
+    with contextlib.redirect_stdout(io.StringIO()):
+        write_store(directory, records)
+
+
+def benchmark(records, listings, nights, churn, turnover, seed=0):
+    """Write the same simulated nights in both layouts into throwaway git repositories"""
+    use_git = shutil.which('git') is not None
+    results = {}
+    for name, writer in (('full', write_full_layout), ('store', write_store_layout)):
+        root = tempfile.mkdtemp(prefix=f"store_bench_{name}_")
+        try:
+            city_dir = os.path.join(root, "queue_0", "bench")
+            os.makedirs(city_dir)
+            if use_git:
+                git(root, 'init', '-q')
+                git(root, 'config', 'user.email', 'bench@example.com')
+                git(root, 'config', 'user.name', 'bench')
+                git(root, 'config', 'commit.gpgsign', 'false')
+            write_seconds, changed_lines = [], []
+            for night, run in enumerate(simulate_nights(records, listings, nights, churn, turnover, seed)):
+                started = time.perf_counter()
+                writer(city_dir, run, night)
+                write_seconds.append(time.perf_counter() - started)
+                if use_git:
+                    git(root, 'add', '-A')
+                    numstat = git(root, 'diff', '--cached', '--numstat')
+                    changed_lines.append(sum(int(added) + int(removed) for added, removed, _ in
+                                             (line.split('\t', 2) for line in numstat.splitlines())
+                                             if added != '-'))
+                    git(root, 'commit', '-q', '--allow-empty', '-m', f"night {night}")
+            result = {
+                'write_seconds_per_night': round(sum(write_seconds) / len(write_seconds), 3),
+                'tree_bytes': directory_bytes(root, exclude='.git'),
+                'files': sum(len(files) for _, _, files in os.walk(city_dir)),
+            }
+            if use_git:
+                git(root, 'gc', '-q')
+                result['changed_lines_per_night'] = round(sum(changed_lines[1:]) / max(1, len(changed_lines) - 1))
+                result['repo_bytes'] = directory_bytes(os.path.join(root, '.git'))
+            results[name] = result
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def print_benchmark(results, listings, nights):
+    print(f"\n📏 {nights} nights of {listings} listings")
+    columns = [('write_seconds_per_night', "write s/night"), ('files', "files"), ('tree_bytes', "tree bytes"),
+               ('changed_lines_per_night', "diff lines/night"), ('repo_bytes', "repo bytes (gc)")]
+    print(f"  {'layout':<8}" + ''.join(f"{label:>18}" for _, label in columns))
+    for name, result in results.items():
+        print(f"  {name:<8}" + ''.join(f"{result.get(key, 'n/a'):>18}" for key, _ in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic per-city listing store (OUTPUT_MODE=store)")
+    parser.add_argument('command', choices=['migrate', 'benchmark'])
+    parser.add_argument('--data-dir', default=os.getenv('OUTPUT_DIR', 'data'), help="tree to migrate (migrate)")
+    parser.add_argument('--source', help="real output JSON to draw listings from (benchmark)")
+    parser.add_argument('--listings', type=int, default=300)
+    parser.add_argument('--nights', type=int, default=7)
+    parser.add_argument('--churn', type=float, default=0.03, help="share of listings with a price change per night")
+    parser.add_argument('--turnover', type=float, default=0.02, help="share of listings replaced per night")
+    parser.add_argument('--output', help="also write the results to this JSON file (benchmark)")
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        cities = migrate(args.data_dir)
+        print(f"\n🗄️ {cities} city stores written; the timestamped dumps were left in place")
+    else:
+        results = benchmark(sample_records(args.source), args.listings, args.nights, args.churn, args.turnover)
+        print_benchmark(results, args.listings, args.nights)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
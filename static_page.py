@@ -0,0 +1,340 @@
+import re
+from html.parser import HTMLParser
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+# Elements that never have a closing tag
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr'
+}
+
+# Content that is never part of the rendered text
+HIDDEN_TAGS = {'script', 'style', 'template', 'noscript', 'head', 'title'}
+
+# Tags that start a new line in rendered text
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+    'table', 'tr', 'td', 'th', 'ul'
+}
+
+
+class StaticElement:
+    """A parsed HTML element that answers the WebElement calls our extractors make."""
+
+    def __init__(self, tag, attrs, parent=None):
+        self.tag_name = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []  # Mix of StaticElement and str
+        self._text = None
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    @property
+    def classes(self):
+        return (self.attrs.get('class') or '').split()
+
+    @property
+    def text(self):
+        """Rendered text: hidden content dropped, whitespace collapsed, block tags on their own lines"""
+        if self._text is None:
+            parts = []
+            self._collect_text(parts)
+            text = ''.join(parts)
+            lines = [re.sub(r'[ \t\r\f\v]+', ' ', line).strip() for line in text.split('\n')]
+            self._text = '\n'.join(line for line in lines if line)
+        return self._text
+
+    def _collect_text(self, parts):
+        if self.tag_name in HIDDEN_TAGS:
+            return
+        if self.tag_name in BLOCK_TAGS:
+            parts.append('\n')
+        for child in self.children:
+            if isinstance(child, str):
+                parts.append(child)
+            else:
+                child._collect_text(parts)
+        if self.tag_name in BLOCK_TAGS:
+            parts.append('\n')
+
+    def own_text(self):
+        """Text of direct text-node children, which is what XPath text() compares against"""
+        return ' '.join(child.strip() for child in self.children if isinstance(child, str) and child.strip())
+
+    def element_children(self):
+        return [child for child in self.children if isinstance(child, StaticElement)]
+
+    def iter_descendants(self):
+        stack = list(reversed(self.element_children()))
+        while stack:
+            element = stack.pop()
+            yield element
+            stack.extend(reversed(element.element_children()))
+
+    def find_elements(self, by, selector):
+        try:
+            if by == By.CSS_SELECTOR:
+                return select_css(self, selector)
+            if by == By.XPATH:
+                return select_xpath(self, selector)
+            if by == By.TAG_NAME:
+                return [e for e in self.iter_descendants() if e.tag_name == selector.lower()]
+        except ValueError:
+            # Selector outside the supported subset; behave like "no match"
+            return []
+        return []
+
+    def find_element(self, by, selector):
+        matches = self.find_elements(by, selector)
+        if not matches:
+            raise NoSuchElementException(f"No static match for {by}: {selector}")
+        return matches[0]
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = StaticElement('#document', {})
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = StaticElement(tag, {name: (value or '') for name, value in attrs}, self.stack[-1])
+        self.stack[-1].children.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        element = StaticElement(tag, {name: (value or '') for name, value in attrs}, self.stack[-1])
+        self.stack[-1].children.append(element)
+
+    def handle_endtag(self, tag):
+        # Pop back to the matching open tag; stray closing tags are ignored
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag_name == tag:
+                del self.stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def parse_html(html):
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+# ---------------------------------------------------------------------------
+# CSS subset: tag, #id, .class, [attr], [attr=v], [attr*=v], [attr^=v],
+# [attr$=v], :first-child, :nth-child(n), joined by descendant or '>' combinators
+# ---------------------------------------------------------------------------
+
+_CSS_TOKEN = re.compile(
+    r'\s*(>)\s*'
+    r'|\s+'
+    r'|([a-zA-Z][\w-]*|\*)'
+    r'|#([\w-]+)'
+    r'|\.([\w-]+)'
+    r'|\[\s*([\w-]+)\s*(?:([*^$]?=)\s*(?:"([^"]*)"|\'([^\']*)\'|([^\]\s]+)))?\s*\]'
+    r'|:first-child'
+    r'|:nth-child\(\s*(\d+)\s*\)'
+)
+
+
+def _parse_css(selector):
+    """Split a selector into [(combinator, compound), ...] where compound is a list of tests"""
+    steps = []
+    compound = []
+    combinator = ' '
+    pos = 0
+    selector = selector.strip()
+    while pos < len(selector):
+        match = _CSS_TOKEN.match(selector, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unsupported CSS selector: {selector}")
+        token = match.group(0)
+        pos = match.end()
+        if match.group(1) or not token.strip():
+            # Combinator: close the current compound; '>' wins over plain whitespace
+            if compound:
+                steps.append((combinator, compound))
+                compound = []
+                combinator = ' '
+            if match.group(1):
+                combinator = '>'
+            continue
+        if match.group(2):
+            compound.append(('tag', match.group(2).lower()))
+        elif match.group(3):
+            compound.append(('attr', 'id', '=', match.group(3)))
+        elif match.group(4):
+            compound.append(('class', match.group(4)))
+        elif match.group(5):
+            value = next((v for v in match.group(7, 8, 9) if v is not None), None)
+            compound.append(('attr', match.group(5), match.group(6), value))
+        elif token.strip() == ':first-child':
+            compound.append(('nth', 1))
+        elif match.group(10):
+            compound.append(('nth', int(match.group(10))))
+    if compound:
+        steps.append((combinator, compound))
+    if not steps:
+        raise ValueError(f"Empty CSS selector: {selector}")
+    return steps
+
+
+def _matches_compound(element, compound):
+    for test in compound:
+        kind = test[0]
+        if kind == 'tag':
+            if test[1] != '*' and element.tag_name != test[1]:
+                return False
+        elif kind == 'class':
+            if test[1] not in element.classes:
+                return False
+        elif kind == 'attr':
+            _, name, operator, expected = test
+            actual = element.attrs.get(name)
+            if actual is None:
+                return False
+            if operator == '=' and actual != expected:
+                return False
+            if operator == '*=' and expected not in actual:
+                return False
+            if operator == '^=' and not actual.startswith(expected):
+                return False
+            if operator == '$=' and not actual.endswith(expected):
+                return False
+        elif kind == 'nth':
+            siblings = element.parent.element_children() if element.parent else [element]
+            if test[1] > len(siblings) or siblings[test[1] - 1] is not element:
+                return False
+    return True
+
+
+def _matches_steps(element, steps, scope):
+    """Right-to-left match of the remaining steps, never climbing above scope"""
+    combinator, compound = steps[-1]
+    if not _matches_compound(element, compound):
+        return False
+    if len(steps) == 1:
+        return True
+    ancestor = element.parent
+    if combinator == '>':
+        return ancestor is not None and ancestor is not scope and _matches_steps(ancestor, steps[:-1], scope)
+    while ancestor is not None and ancestor is not scope:
+        if _matches_steps(ancestor, steps[:-1], scope):
+            return True
+        ancestor = ancestor.parent
+    return False
+
+
+def select_css(scope, selector):
+    steps = _parse_css(selector)
+    return [element for element in scope.iter_descendants() if _matches_steps(element, steps, scope)]
+
+
+# ---------------------------------------------------------------------------
+# XPath subset: //tag[pred], .//tag[pred], ./.. parent chains. Predicates are
+# contains(text()|@attr|translate(text(), ...), 'x'), @attr='x', joined by and/or
+# ---------------------------------------------------------------------------
+
+_XPATH_STEP = re.compile(r'^(\.?//)([\w*-]+)(?:\[(.*)\])?$', re.S)
+_XPATH_CONTAINS = re.compile(
+    r"contains\(\s*(text\(\)|@[\w-]+|translate\(\s*text\(\)\s*,\s*'[A-Z]+'\s*,\s*'[a-z]+'\s*\))\s*,\s*'([^']*)'\s*\)"
+)
+_XPATH_EQUALS = re.compile(r"@([\w-]+)\s*=\s*'([^']*)'")
+
+
+def _xpath_predicate(predicate):
+    """Compile an and/or predicate into a callable over elements"""
+    if predicate is None:
+        return lambda element: True
+    alternatives = []
+    for alternative in re.split(r'\s+or\s+', predicate):
+        tests = []
+        for clause in re.split(r'\s+and\s+', alternative):
+            clause = clause.strip()
+            contains = _XPATH_CONTAINS.fullmatch(clause)
+            equals = _XPATH_EQUALS.fullmatch(clause)
+            if contains:
+                source, needle = contains.groups()
+                if source == 'text()':
+                    tests.append(lambda e, n=needle: n in e.own_text())
+                elif source.startswith('@'):
+                    tests.append(lambda e, a=source[1:], n=needle: n in (e.attrs.get(a) or ''))
+                else:
+                    tests.append(lambda e, n=needle: n in e.own_text().lower())
+            elif equals:
+                tests.append(lambda e, a=equals.group(1), v=equals.group(2): e.attrs.get(a) == v)
+            else:
+                raise ValueError(f"Unsupported XPath predicate: {clause}")
+        alternatives.append(tests)
+    return lambda element: any(all(test(element) for test in tests) for tests in alternatives)
+
+
+def select_xpath(scope, selector):
+    selector = selector.strip()
+
+    # Parent chains such as "./..", ".//..", "./../../.."
+    if re.fullmatch(r'\.?(?:/?/\.\.)+', selector):
+        element = scope
+        for _ in range(selector.count('..')):
+            element = element.parent
+            if element is None or element.tag_name == '#document':
+                return []
+        return [element]
+
+    match = _XPATH_STEP.match(selector)
+    if not match:
+        raise ValueError(f"Unsupported XPath: {selector}")
+    axis, tag, predicate = match.groups()
+    if axis == '//':
+        while scope.parent is not None:
+            scope = scope.parent
+    test = _xpath_predicate(predicate)
+    tag = tag.lower()
+    return [e for e in scope.iter_descendants() if (tag == '*' or e.tag_name == tag) and test(e)]
+
+
+class StaticPageDriver:
+    """Read-only stand-in for a WebDriver over an already-fetched HTML document.
+
+    Lets the existing extract_* methods run against HTML retrieved without a
+    browser. Scrolling and scripts are no-ops, and selectors outside the
+    supported CSS/XPath subset simply find nothing, so extractors fall back to
+    their page-source strategies.
+    """
+
+    is_static = True
+
+    def __init__(self, html, url):
+        self.page_source = html
+        self.current_url = url
+        self._document = None
+
+    @property
+    def document(self):
+        # Parse lazily: page-source-only extractors never pay for the tree
+        if self._document is None:
+            self._document = parse_html(self.page_source)
+        return self._document
+
+    def find_elements(self, by, selector):
+        return self.document.find_elements(by, selector)
+
+    def find_element(self, by, selector):
+        return self.document.find_element(by, selector)
+
+    def execute_script(self, script, *args):
+        return None
+
+    def save_screenshot(self, filename):
+        return False
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import threading
+
+# Older observations fade so a layout change is picked up within a few dozen pages
+DECAY = 0.98
+# A strategy needs this many (decayed) tries before it can be called dead
+MIN_TRIALS = 20
+# ... and a hit rate below this
+DEAD_HIT_RATE = 0.02
+# Cost assumed for a strategy that has never been timed
+DEFAULT_SECONDS = 0.05
+# Outside data/, so the nightly commit doesn't carry a rewrite of it every run
+DEFAULT_STATS_FILE = os.getenv('STRATEGY_STATS_FILE', 'strategy_stats.json')
+
+
+def strategy_key(strategy):
+    return strategy if isinstance(strategy, str) else ':'.join(str(part) for part in strategy)
+
+
+class StrategyTuner:
+    """Per-chain hit rates and latencies for selector/regex fallback chains, persisted across runs.
+
+    order() puts the strategy with the lowest expected cost per success
+    (mean seconds / hit rate, Laplace-smoothed) first and demotes strategies
+    that have stopped matching to the end, where they still run as a last
+    resort. The last generic_tail strategies of a chain are broad fallbacks
+    that can also match the wrong element; they are only ever tried after
+    the specific ones, in their authored order.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.chains = self.load()
+
+    def load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            snapshot = json.loads(json.dumps(self.chains))
+        with open(self.path + ".tmp", 'w') as f:
+            json.dump(snapshot, f, indent=2, sort_keys=True)
+        os.replace(self.path + ".tmp", self.path)
+
+    def record(self, chain, strategy, hit, seconds):
+        with self.lock:
+            stats = self.chains.setdefault(chain, {}).setdefault(
+                strategy_key(strategy), {'trials': 0.0, 'hits': 0.0, 'seconds': 0.0})
+            stats['trials'] = stats['trials'] * DECAY + 1
+            stats['hits'] = stats['hits'] * DECAY + (1 if hit else 0)
+            stats['seconds'] = stats['seconds'] * DECAY + seconds
+
+    def is_dead(self, stats):
+        return bool(stats) and stats['trials'] >= MIN_TRIALS and stats['hits'] / stats['trials'] < DEAD_HIT_RATE
+
+    def expected_cost(self, stats):
+        if not stats or not stats['trials']:
+            return DEFAULT_SECONDS / 0.5
+        mean_seconds = stats['seconds'] / stats['trials']
+        hit_rate = (stats['hits'] + 1) / (stats['trials'] + 2)
+        return mean_seconds / hit_rate
+
+    def order(self, chain, strategies, generic_tail=0):
+        with self.lock:
+            chain_stats = {key: dict(value) for key, value in self.chains.get(chain, {}).items()}
+        split = len(strategies) - generic_tail
+        specific, generic, dead = [], [], []
+        for position, strategy in enumerate(strategies):
+            if self.is_dead(chain_stats.get(strategy_key(strategy))):
+                dead.append(strategy)
+            else:
+                (specific if position < split else generic).append(strategy)
+        # sorted() is stable, so untried strategies keep their authored order
+        specific = sorted(specific, key=lambda s: self.expected_cost(chain_stats.get(strategy_key(s))))
+        return specific + generic + dead
+
+    def report(self):
+        """(chain, strategy, hit rate, mean ms, dead) rows"""
+        rows = []
+        with self.lock:
+            for chain, strategies in sorted(self.chains.items()):
+                for key, stats in strategies.items():
+                    trials = stats['trials'] or 1
+                    rows.append((chain, key, stats['hits'] / trials, 1000 * stats['seconds'] / trials,
+                                 self.is_dead(stats)))
+        return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show learned selector/regex strategy statistics")
+    parser.add_argument('path', nargs='?', default=DEFAULT_STATS_FILE)
+    args = parser.parse_args()
+
+    tuner = StrategyTuner(args.path)
+    for chain, key, hit_rate, mean_ms, dead in tuner.report():
+        print(f"{chain:<16} {hit_rate:6.1%} {mean_ms:8.1f}ms {'DEAD ' if dead else '     '}{key[:90]}")
@@ -0,0 +1,127 @@
+import random
+import time
+
+# Chrome throttles timers and rendering in background tabs, which would stall the pages loading ahead
+BACKGROUND_TAB_FLAGS = [
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+]
+
+# Navigation start to load event of the current page, once it has fired
+NAVIGATION_LOAD_SECONDS = """
+var nav = performance.getEntriesByType('navigation')[0];
+return nav && nav.loadEventEnd > 0 ? (nav.loadEventEnd - nav.startTime) / 1000 : null;
+"""
+
+
+class TabPool:
+    """Detail pages loading ahead in background tabs of the one browser.
+
+    WebDriver commands are serialized, but page loads are not: while the
+    scraper extracts one listing, the next size-1 listings are already
+    navigating in their own tabs, so their load and hydration time overlaps
+    extraction instead of adding to it. At most two new tabs are opened per
+    prefetch() call, and consecutive opens are spaced by open_gap seconds
+    (the same 3-6s the scraper waits before a foreground page), so the
+    lookahead fills up over a few listings rather than in one burst of
+    requests. take() reports the page's own load time from the Navigation
+    Timing API, not how long the tab then sat waiting to be used.
+    """
+
+    def __init__(self, driver, size, ready_timeout=20, opens_per_call=2, open_gap=(3, 6), network_capture=None):
+        self.driver = driver
+        self.size = size
+        self.ready_timeout = ready_timeout
+        self.opens_per_call = opens_per_call
+        self.open_gap = open_gap
+        self.network_capture = network_capture
+        self.next_open = 0.0
+        self.tabs = {}  # url -> (window handle, navigation start)
+        self.stats = {'prefetched': 0, 'taken': 0, 'discarded': 0, 'overlap_seconds': 0.0,
+                      'heap_samples': 0, 'heap_bytes': 0.0}
+
+    def prefetch(self, urls, home_window):
+        """Start loading the next listings that aren't open yet, while tabs are free"""
+        opened = 0
+        for url in urls:
+            if len(self.tabs) >= self.size or opened >= self.opens_per_call:
+                return
+            if url in self.tabs:
+                continue
+            wait = self.next_open - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self.driver.switch_to.new_window('tab')
+                if self.network_capture is not None:
+                    self.network_capture.reset(self.driver)
+                # Assigning location returns at once; driver.get() would block until the load finishes
+                self.driver.execute_script("window.location.href = arguments[0];", url)
+                self.tabs[url] = (self.driver.current_window_handle, time.time())
+                self.stats['prefetched'] += 1
+            finally:
+                self.next_open = time.time() + random.uniform(*self.open_gap)
+                self.driver.switch_to.window(home_window)
+            opened += 1
+
+    def __contains__(self, url):
+        return url in self.tabs
+
+    def take(self, url):
+        """Switch to the tab already loading url and wait for its load event.
+
+        Returns the page's load time in seconds (navigation start to load
+        event, as the tab itself measured it), or None if it wasn't
+        prefetched or didn't finish loading within ready_timeout.
+        """
+        entry = self.tabs.pop(url, None)
+        if entry is None:
+            return None
+        handle, started = entry
+        self.driver.switch_to.window(handle)
+        self.stats['taken'] += 1
+        self.stats['overlap_seconds'] += time.time() - started
+        waited = time.time()
+        while time.time() - waited < self.ready_timeout:
+            try:
+                load_seconds = self.driver.execute_script(NAVIGATION_LOAD_SECONDS)
+                if load_seconds is not None:
+                    return load_seconds
+            except Exception:
+                pass
+            time.sleep(0.25)
+        return None
+
+    def sample_memory(self):
+        """Record the current tab's JS heap size (Chrome DevTools Performance metrics)"""
+        try:
+            self.driver.execute_cdp_cmd('Performance.enable', {})
+            metrics = self.driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+        except Exception:
+            return None
+        heap = next((metric['value'] for metric in metrics if metric['name'] == 'JSHeapUsedSize'), None)
+        if heap is not None:
+            self.stats['heap_samples'] += 1
+            self.stats['heap_bytes'] += heap
+        return heap
+
+    def mean_tab_memory(self):
+        return self.stats['heap_bytes'] / self.stats['heap_samples'] if self.stats['heap_samples'] else None
+
+    def discard(self, home_window):
+        """Close tabs that were prefetched but won't be used (page of results done, scrape stopped)"""
+        for handle, _ in self.tabs.values():
+            if self.network_capture is not None:
+                self.network_capture.forget(handle)
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+                self.stats['discarded'] += 1
+            except Exception:
+                pass
+        self.tabs = {}
+        try:
+            self.driver.switch_to.window(home_window)
+        except Exception:
+            pass
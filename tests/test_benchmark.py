@@ -0,0 +1,24 @@
+import contextlib
+import io
+import re
+
+import pytest
+
+from benchmark import RISK_KINDS, synthetic_page
+from zillow import MultiPropertyZillowScraper
+
+
+@pytest.mark.parametrize('index', range(3))
+def test_synthetic_climate_risks_parse_per_card(index):
+    html = synthetic_page(index, filler_kb=8)
+    expected = {f"{kind.lower()}_risk": f"{level} ({score}/10)" for kind, level, score in
+                re.findall(r'<div>(\w+) Factor</div></div></div><span>(\w+)</span><span>(\d+)/10</span>', html)}
+    assert sorted(expected) == sorted(f"{kind}_risk" for kind in RISK_KINDS)
+    assert len(set(expected.values())) == len(RISK_KINDS)
+
+    scraper = MultiPropertyZillowScraper.from_page_source(html, f"https://www.zillow.com/homedetails/{index}/{10000000 + index}_zpid/")
+    scraper.pause = lambda *args: None
+    with contextlib.redirect_stdout(io.StringIO()):
+        record = scraper.extract_complete_property_data()
+
+    assert {key: record[key] for key in expected} == expected
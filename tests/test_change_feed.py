@@ -0,0 +1,52 @@
+import json
+import os
+
+from change_feed import SNAPSHOT_STATE_FILE, build_change_feed, write_change_feed
+
+
+def listing(zpid, price='$500,000', **fields):
+    return dict({'zpid': str(zpid), 'url': f"https://www.zillow.com/homedetails/{zpid}_zpid/", 'price': price,
+                 'address': f"{zpid} Main St", 'scraped_at': '2025-01-01T03:00:00'}, **fields)
+
+
+def changes_by_key(feed):
+    return {change['listing_id']: change for change in feed['changes']}
+
+
+def test_new_changed_removed_and_not_seen_are_keyed_by_listing():
+    previous = [listing(1), listing(2), listing(3), listing(4, interior_features=['a', 'b'])]
+    current = [listing(5), listing(1, price='$450,000'), listing(4, interior_features=['b', 'a'],
+                                                                scraped_at='2025-01-02T03:00:00')]
+    feed = build_change_feed(previous, current, gone_urls=[listing(2)['url']])
+
+    changes = changes_by_key(feed)
+    assert changes['5']['change'] == 'new'
+    assert changes['1']['change'] == 'changed'
+    assert changes['1']['price_change'] == {'from': '$500,000', 'to': '$450,000', 'delta': -50000}
+    assert changes['2']['change'] == 'removed'
+    assert '3' not in changes and '4' not in changes
+    assert feed['counts'] == {'new': 1, 'removed': 1, 'changed': 1, 'price_changed': 1, 'status_changed': 0,
+                              'unchanged': 1, 'not_seen': 1}
+
+
+def test_missing_listings_are_removed_after_consecutive_complete_runs(tmp_path):
+    city_dir = str(tmp_path)
+    write_change_feed(city_dir, [listing(1), listing(2)], 'night0', complete=True)
+
+    def night(name, complete):
+        _, feed = write_change_feed(city_dir, [listing(1)], name, complete=complete, remove_after=2)
+        with open(os.path.join(city_dir, SNAPSHOT_STATE_FILE)) as f:
+            return feed, json.load(f)
+
+    feed, state = night('night1', complete=True)
+    assert feed['counts']['not_seen'] == 1 and state['missed_runs'] == {'2': 1}
+    assert state['last_seen']['2'] < state['last_seen']['1']
+
+    # A run cut short doesn't count towards removal
+    feed, state = night('night2', complete=False)
+    assert feed['counts']['not_seen'] == 1 and state['missed_runs'] == {'2': 1}
+
+    feed, state = night('night3', complete=True)
+    assert changes_by_key(feed)['2']['change'] == 'removed'
+    assert [record['zpid'] for record in state['listings']] == ['1']
+    assert state['missed_runs'] == {}
@@ -0,0 +1,52 @@
+import pytest
+
+from concurrency import AIMDController, StandInSite, simulate
+
+
+@pytest.fixture
+def standin():
+    sites = []
+
+    def start(**settings):
+        sites.append(StandInSite(**settings).start())
+        return sites[-1]
+
+    yield start
+    for site in sites:
+        site.stop()
+
+
+def test_healthy_loads_raise_the_limit(standin):
+    site = standin(base_latency=0.05, capacity=10, block_above=10)
+    # Latency cuts are out of the picture here: only healthy loads come back
+    controller = AIMDController(max_limit=4, successes_per_step=2, latency_factor=10)
+
+    loaded = simulate(controller, site.url, workers=4, seconds=2)
+
+    assert loaded > 0 and site.stats['blocked'] == 0
+    assert controller.stats['increases'] >= 2
+    assert controller.limit > 1 and controller.stats['decreases'] == 0
+
+
+def test_blocks_above_the_threshold_cut_the_limit(standin):
+    site = standin(base_latency=0.05, capacity=10, block_above=2, block_rate=1.0)
+    controller = AIMDController(max_limit=4, initial=4, successes_per_step=500, latency_factor=10, cooldown=0.5)
+
+    simulate(controller, site.url, workers=4, seconds=2)
+
+    assert site.stats['blocked'] > 0
+    cuts = [decision for decision in controller.decisions if decision['action'] == 'decrease']
+    assert cuts and all(decision['reason'] == 'block page' for decision in cuts)
+    # Two in flight never gets blocked, so the limit settles at or below it
+    assert controller.limit <= 2
+
+
+def test_cooldown_prevents_repeated_cuts(standin):
+    site = standin(base_latency=0.05, capacity=10, block_above=1, block_rate=1.0)
+    controller = AIMDController(max_limit=8, initial=8, successes_per_step=50, latency_factor=10, cooldown=60)
+
+    simulate(controller, site.url, workers=8, seconds=1)
+
+    assert controller.stats['blocks'] > 1
+    assert controller.stats['decreases'] == 1
+    assert controller.limit == 4
@@ -0,0 +1,75 @@
+import pytest
+
+from benchmark import synthetic_page
+from http_fetch import HttpPageFetcher, StandInPages
+from zillow import MultiPropertyZillowScraper
+
+LISTING_PATH = '/homedetails/1-Main-St/10000000_zpid/'
+CHALLENGE_HTML = '<html><div id="px-captcha">Press &amp; Hold to confirm you are a human</div></html>'
+# Looks like a listing to the classifier, but has no price or address to extract
+NO_CORE_FIELDS_HTML = ('<html><head><title>Listing</title></head><body>'
+                       '<div data-testid="bed-bath-sqft-facts">3 bd</div><a href="/homedetails/x/1_zpid/">"zpid"</a>'
+                       '</body></html>')
+
+
+@pytest.fixture
+def site():
+    site = StandInPages({
+        LISTING_PATH: (200, synthetic_page(0, filler_kb=8), [('Set-Cookie', 'zguid=fresh; Path=/')]),
+        '/challenge/': (200, CHALLENGE_HTML),
+        '/forbidden/': (403, '<html>Forbidden</html>'),
+        '/no-core/': (200, NO_CORE_FIELDS_HTML),
+    }).start()
+    yield site
+    site.stop()
+
+
+@pytest.fixture
+def scraper():
+    scraper = MultiPropertyZillowScraper.from_page_source('<html></html>', 'about:blank')
+    scraper.http_fetcher = HttpPageFetcher('stand-in-agent', cookies={'session': 'abc'}, retries=0)
+    yield scraper
+    scraper.http_fetcher.close()
+
+
+def test_listing_is_parsed_without_the_browser(site, scraper):
+    data = scraper.scrape_property_via_http(site.url(LISTING_PATH))
+
+    assert data is not None
+    assert data['price'] != 'N/A' and data['address'] != 'N/A'
+    assert scraper.fetch_stats['http'] == 1
+    assert scraper.fetch_stats['browser_fallback'] == 0
+
+
+def test_skips_and_timings_are_reported_on_the_scraper(site, scraper):
+    scraper.field_groups = {'core', 'image'}
+    scraper.group_timing_history = {'climate': 2.0}
+    scraper.scrape_property_via_http(site.url(LISTING_PATH))
+
+    assert scraper.skipped_groups['climate'] == 1
+    assert set(scraper.extractor_timings) == {'core', 'image'}
+    assert scraper.estimated_seconds_saved()['climate'] == 2.0
+
+
+def test_session_identity_and_new_cookies_are_carried_over(site, scraper):
+    scraper.scrape_property_via_http(site.url(LISTING_PATH))
+    scraper.scrape_property_via_http(site.url(LISTING_PATH))
+
+    first, second = site.requests
+    assert first['headers']['User-Agent'] == 'stand-in-agent'
+    assert first['headers']['Cookie'] == 'session=abc'
+    assert 'zguid=fresh' in second['headers']['Cookie']
+    assert 'session=abc' in second['headers']['Cookie']
+
+
+@pytest.mark.parametrize('path', ['/challenge/', '/forbidden/', '/no-core/', '/missing/'])
+def test_falls_back_to_the_browser(site, scraper, path):
+    assert scraper.scrape_property_via_http(site.url(path)) is None
+    assert scraper.fetch_stats['browser_fallback'] == 1
+    assert scraper.fetch_stats['http'] == 0
+
+
+def test_unreachable_site_falls_back(scraper):
+    # Nothing listens on port 9 (discard) here; the request itself fails
+    assert scraper.scrape_property_via_http('http://127.0.0.1:9/homedetails/x/1_zpid/') is None
+    assert scraper.fetch_stats['browser_fallback'] == 1
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from http_fetch import StandInPages
+from image_pipeline import INDEX_FILE, ImageDownloader
+
+JPEG = b'\xff\xd8\xff\xe0' + b'stand-in jpeg' * 50
+PNG = b'\x89PNG\r\n\x1a\n' + b'stand-in png' * 50
+
+
+@pytest.fixture
+def site():
+    site = StandInPages({
+        '/a.jpg': (200, JPEG, [('Content-Type', 'image/jpeg')]),
+        '/same-as-a.jpg': (200, JPEG, [('Content-Type', 'image/jpeg')]),
+        '/flaky.png': [(503, 'busy'), (503, 'busy'), (200, PNG, [('Content-Type', 'image/png')])],
+        '/down.png': (503, 'busy'),
+    }).start()
+    yield site
+    site.stop()
+
+
+def downloader(cache_dir, **kwargs):
+    return ImageDownloader(str(cache_dir), max_workers=2, backoff_factor=0, **kwargs)
+
+
+def stored_files(cache_dir):
+    return sorted(name for _, _, files in os.walk(cache_dir) for name in files if name != INDEX_FILE)
+
+
+def test_same_content_is_stored_once(site, tmp_path):
+    images = downloader(tmp_path)
+    images.submit(site.url('/a.jpg')).result()
+    images.submit(site.url('/same-as-a.jpg')).result()
+    images.close()
+
+    assert images.stats['downloaded'] == 1 and images.stats['deduplicated'] == 1
+    assert len(stored_files(tmp_path)) == 1
+    entries = [images.index[site.url(path)] for path in ('/a.jpg', '/same-as-a.jpg')]
+    assert entries[0]['sha256'] == entries[1]['sha256']
+    assert entries[0]['path'].endswith('.jpg')
+
+
+def test_transient_errors_are_retried(site, tmp_path):
+    images = downloader(tmp_path, max_retries=3)
+    assert images.submit(site.url('/flaky.png')).result() is not None
+    images.close()
+
+    assert images.stats['downloaded'] == 1
+    assert [r['path'] for r in site.requests] == ['/flaky.png'] * 3
+
+
+def test_persistent_errors_give_up(site, tmp_path):
+    images = downloader(tmp_path, max_retries=1)
+    assert images.submit(site.url('/down.png')).result() is None
+    images.submit(site.url('/missing.png')).result()
+    images.close()
+
+    assert images.stats['failed'] == 2
+    assert stored_files(tmp_path) == []
+
+
+def test_index_skips_urls_from_earlier_runs(site, tmp_path):
+    first = downloader(tmp_path)
+    first.submit(site.url('/a.jpg')).result()
+    first.close()
+    requests_before = len(site.requests)
+
+    second = downloader(tmp_path)
+    assert second.submit(site.url('/a.jpg')) is None
+    second.close()
+
+    assert second.stats['cached'] == 1
+    assert len(site.requests) == requests_before
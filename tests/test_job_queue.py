@@ -0,0 +1,106 @@
+import pytest
+
+from job_queue import PROPERTY, JobStore
+
+RUN = 'run-1'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def nodes(tmp_path, clock):
+    path = str(tmp_path / 'jobs.sqlite')
+    stores = []
+
+    def node(name, max_attempts=3):
+        stores.append(JobStore(path, node_id=name, lease_seconds=60, max_attempts=max_attempts, clock=clock))
+        return stores[-1]
+
+    yield node
+    for store in stores:
+        store.close()
+
+
+def add_listing(store, key='1_zpid'):
+    store.add_jobs(RUN, PROPERTY, [(key, {'url': f"https://www.zillow.com/homedetails/{key}/", 'city': 'boston'})])
+
+
+def test_expired_lease_goes_back_to_pending(nodes, clock):
+    a, b = nodes('a'), nodes('b')
+    add_listing(a)
+    assert len(a.claim(RUN, PROPERTY)) == 1
+
+    clock.advance(59)
+    assert b.claim(RUN, PROPERTY) == []
+
+    clock.advance(2)
+    jobs = b.claim(RUN, PROPERTY)
+    assert [job['attempts'] for job in jobs] == [2]
+
+
+def test_heartbeat_keeps_the_lease(nodes, clock):
+    a, b = nodes('a'), nodes('b')
+    add_listing(a)
+    a.claim(RUN, PROPERTY)
+
+    clock.advance(50)
+    assert a.heartbeat() == 1
+    clock.advance(50)
+    assert b.claim(RUN, PROPERTY) == []
+
+
+def test_complete_is_rejected_after_the_lease_was_lost(nodes, clock):
+    a, b = nodes('a'), nodes('b')
+    add_listing(a)
+    [job] = a.claim(RUN, PROPERTY)
+
+    clock.advance(61)
+    [taken] = b.claim(RUN, PROPERTY)
+    assert taken['id'] == job['id']
+
+    assert a.complete(job['id'], {'zpid': '1'}) is False
+    assert b.complete(job['id'], {'zpid': '1'}) is True
+    assert a.status_counts(RUN) == {PROPERTY: {'done': 1}}
+    assert list(a.results(RUN)) == ['boston']
+
+
+def test_jobs_fail_after_max_attempts(nodes, clock):
+    a = nodes('a', max_attempts=2)
+    add_listing(a, '1_zpid')
+    add_listing(a, '2_zpid')
+
+    # Lease expiry uses up attempts too
+    a.claim(RUN, PROPERTY, limit=2)
+    clock.advance(61)
+    jobs = a.claim(RUN, PROPERTY, limit=2)
+    assert [job['attempts'] for job in jobs] == [2, 2]
+
+    a.fail(jobs[0]['id'], 'extractor crashed')
+    clock.advance(61)
+    assert a.claim(RUN, PROPERTY, limit=2) == []
+    assert a.status_counts(RUN) == {PROPERTY: {'failed': 2}}
+    assert not a.has_open_work(RUN)
+
+
+def test_failed_job_is_retried_while_it_has_attempts_left(nodes):
+    a = nodes('a', max_attempts=3)
+    add_listing(a)
+    [job] = a.claim(RUN, PROPERTY)
+    a.fail(job['id'], 'timeout')
+
+    [again] = a.claim(RUN, PROPERTY)
+    assert again['id'] == job['id'] and again['attempts'] == 2
@@ -0,0 +1,29 @@
+from page_classifier import CHALLENGE, LISTING, NOT_FOUND, REMOVED, UNKNOWN, classify_page
+
+SENSOR = '<script src="https://client.perimeterx.net/PXabc123/main.min.js"></script>'
+
+
+def test_listing_with_bot_sensor_script_is_still_a_listing():
+    html = f'<html><head>{SENSOR}</head><body><span data-testid="price">$525,000</span></body></html>'
+    assert classify_page(html) == LISTING
+
+
+def test_interstitials_are_challenges():
+    assert classify_page(f'<html>{SENSOR}<div id="px-captcha"></div>Press &amp; Hold</html>') == CHALLENGE
+    assert classify_page('<h1>Access to this page has been denied</h1>') == CHALLENGE
+    assert classify_page('', status=403) == CHALLENGE
+
+
+def test_search_results_links_do_not_make_a_listing():
+    html = '<ul><li><a href="/homedetails/1-Main-St/1_zpid/">1 Main St</a></li></ul>'
+    assert classify_page(html) == UNKNOWN
+
+
+def test_dead_pages():
+    assert classify_page('<h1>This home is no longer available</h1>') == REMOVED
+    assert classify_page('', status=404) == NOT_FOUND
+
+
+def test_off_market_page_showing_its_last_price_is_removed():
+    html = '<script>{"homeStatus":"OFF_MARKET"}</script><span data-testid="price">$525,000</span>'
+    assert classify_page(html) == REMOVED
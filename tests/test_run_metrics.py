@@ -0,0 +1,39 @@
+import os
+from types import SimpleNamespace
+
+from retry_queue import RetryQueue
+from run_metrics import RunMetrics
+
+
+def fake_scraper(pid):
+    return SimpleNamespace(extractor_timings={}, page_stats={}, fetch_stats={'http': 0, 'browser_fallback': 0},
+                           driver=SimpleNamespace(browser_pid=pid))
+
+
+def test_run_totals_survive_per_city_resets():
+    metrics = RunMetrics(queue_id=1, expected_total=10)
+    metrics.register(fake_scraper(None))
+
+    for city in ('a', 'b'):
+        queue = RetryQueue(max_attempts=2)
+        metrics.start_city(city, 2, retry_queue=queue)
+        queue.add(f"https://example.com/{city}", 'boom')
+        queue.add(f"https://example.com/{city}", 'boom')
+        metrics.record_rotation()
+        status, _ = metrics.snapshot()
+        metrics.end_city(True)
+
+    assert status['retries_queued'] == 2
+    assert status['failed_permanently'] == 2
+    assert status['session_rotations'] == 2
+    assert metrics.snapshot()[0]['failed_permanently'] == 2
+
+
+def test_released_scrapers_are_not_sampled_for_memory():
+    metrics = RunMetrics(queue_id=1, expected_total=10)
+    scraper = fake_scraper(os.getpid())
+    metrics.register(scraper)
+    assert metrics.snapshot()[0]['driver_rss_bytes']
+
+    metrics.release(scraper)
+    assert metrics.snapshot()[0]['driver_rss_bytes'] is None
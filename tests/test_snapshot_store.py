@@ -0,0 +1,59 @@
+import os
+import random
+
+from change_feed import UNORDERED_FIELDS
+from snapshot_store import STORE_FILE, write_store
+
+
+def listings(scraped_at):
+    return [{'zpid': str(zpid), 'url': f"https://www.zillow.com/homedetails/{zpid}_zpid/",
+             'price': f"${zpid * 1000:,}", 'address': f"{zpid} Main St", 'scraped_at': scraped_at,
+             'interior_features': ['Hardwood floors', 'Fireplace', 'Skylights'],
+             'appliances': ['Dishwasher', 'Range', 'Refrigerator'], 'other_rooms': ['Den', 'Office']}
+            for zpid in (300, 12, 4500, 7)]
+
+
+def reshuffled(records, seed):
+    rng = random.Random(seed)
+    records = [dict(record) for record in records]
+    for record in records:
+        for field in UNORDERED_FIELDS:
+            record[field] = rng.sample(record[field], len(record[field]))
+    rng.shuffle(records)
+    return records
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_rewriting_unchanged_listings_leaves_the_file_untouched(tmp_path):
+    path = os.path.join(tmp_path, STORE_FILE)
+    write_store(str(tmp_path), listings('2025-01-01T03:00:00'))
+    before = read(path)
+    # Far in the past, so any rewrite would show up in the mtime
+    os.utime(path, (1_000_000_000, 1_000_000_000))
+
+    _, counts = write_store(str(tmp_path), reshuffled(listings('2025-01-02T03:00:00'), seed=1))
+
+    assert counts == {'new': 0, 'changed': 0, 'unchanged': 4, 'not_seen': 0}
+    assert read(path) == before
+    assert os.path.getmtime(path) == 1_000_000_000
+
+
+def test_a_price_change_rewrites_exactly_one_line(tmp_path):
+    path = os.path.join(tmp_path, STORE_FILE)
+    write_store(str(tmp_path), listings('2025-01-01T03:00:00'))
+    before = read(path).splitlines()
+
+    records = reshuffled(listings('2025-01-02T03:00:00'), seed=2)
+    next(record for record in records if record['zpid'] == '4500')['price'] = '$4,400,000'
+    _, counts = write_store(str(tmp_path), records)
+
+    after = read(path).splitlines()
+    assert counts['changed'] == 1 and counts['unchanged'] == 3
+    assert len(after) == len(before)
+    changed = [(old, new) for old, new in zip(before, after) if old != new]
+    assert len(changed) == 1
+    assert b'"zpid":"4500"' in changed[0][1] and b'$4,400,000' in changed[0][1]
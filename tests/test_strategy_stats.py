@@ -0,0 +1,19 @@
+from strategy_stats import MIN_TRIALS, StrategyTuner
+
+CHAIN = ['slow', 'fast', 'broken', 'generic-a', 'generic-b']
+
+
+def test_specific_strategies_sort_by_cost_and_generic_tail_stays_last():
+    tuner = StrategyTuner()
+    for _ in range(MIN_TRIALS * 2):
+        tuner.record('price', 'slow', True, 0.5)
+        tuner.record('price', 'fast', True, 0.01)
+        tuner.record('price', 'broken', False, 0.01)
+        tuner.record('price', 'generic-b', True, 0.001)
+
+    assert tuner.order('price', CHAIN, generic_tail=2) == ['fast', 'slow', 'generic-a', 'generic-b', 'broken']
+    assert tuner.order('price', CHAIN)[0] == 'generic-b'
+
+
+def test_untried_chains_keep_their_authored_order():
+    assert StrategyTuner().order('image', CHAIN, generic_tail=2) == CHAIN
@@ -0,0 +1,262 @@
+import math
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.webdriver.common.by import By
+
+from city_queues import parse_search_state, with_search_state
+from listing_identity import ListingIdSet, record_id
+
+# Zillow stops paging after 20 pages of ~40 cards; stay safely below that
+RESULT_CAP = 800
+MAX_TILE_DEPTH = 6
+
+
+class Tile:
+    """One rectangle of a search region, small enough to page through completely"""
+
+    def __init__(self, bounds, search_url, result_count=None, depth=0):
+        self.bounds = bounds
+        self.search_url = search_url
+        self.result_count = result_count
+        self.depth = depth
+
+    def to_dict(self):
+        return {'bounds': self.bounds, 'search_url': self.search_url,
+                'result_count': self.result_count, 'depth': self.depth}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['bounds'], data['search_url'], data.get('result_count'), data.get('depth', 0))
+
+
+def split_bounds(bounds):
+    """Quadtree split of a mapBounds rectangle into NW, NE, SW, SE children"""
+    mid_lng = (bounds['west'] + bounds['east']) / 2
+    mid_lat = (bounds['south'] + bounds['north']) / 2
+    return [
+        {'west': bounds['west'], 'east': mid_lng, 'south': mid_lat, 'north': bounds['north']},
+        {'west': mid_lng, 'east': bounds['east'], 'south': mid_lat, 'north': bounds['north']},
+        {'west': bounds['west'], 'east': mid_lng, 'south': bounds['south'], 'north': mid_lat},
+        {'west': mid_lng, 'east': bounds['east'], 'south': bounds['south'], 'north': mid_lat},
+    ]
+
+
+def tile_url(search_url, bounds):
+    """search_url restricted to bounds; the region filter is kept so tiles don't leak into neighbours"""
+    state = parse_search_state(search_url)
+    state['mapBounds'] = bounds
+    state['isMapVisible'] = True
+    state['pagination'] = {}
+    state.pop('mapZoom', None)
+    return with_search_state(search_url, state)
+
+
+def read_result_count(driver):
+    """The total result count a loaded search page reports, or None if it can't be found"""
+    try:
+        text = driver.find_element(By.CSS_SELECTOR, '.result-count').text
+        match = re.search(r'([\d,]+)', text)
+        if match:
+            return int(match.group(1).replace(',', ''))
+    except Exception:
+        pass
+
+    page_source = driver.page_source
+    for pattern in [r'"totalResultCount"\s*:\s*(\d+)', r'([\d,]+)\s+results']:
+        match = re.search(pattern, page_source)
+        if match:
+            return int(match.group(1).replace(',', ''))
+    return None
+
+
+def browser_result_counter(driver):
+    """count_results callable that loads each tile URL in the given browser"""
+    def count_results(url):
+        driver.get(url)
+        time.sleep(random.uniform(3, 4.5))
+        return read_result_count(driver)
+    return count_results
+
+
+def plan_tiles(search_url, count_results, cap=RESULT_CAP, max_depth=MAX_TILE_DEPTH):
+    """Recursively split the entry's mapBounds until every tile reports fewer than cap results.
+
+    count_results(url) returns the reported total for a search URL (None if
+    unknown). Empty tiles are dropped; tiles still over the cap at max_depth
+    are kept as they are.
+    """
+    bounds = parse_search_state(search_url).get('mapBounds')
+    if not bounds:
+        return [Tile(None, search_url, count_results(search_url))]
+
+    tiles = []
+    pending = [(bounds, 0)]
+    while pending:
+        tile_bounds, depth = pending.pop()
+        url = tile_url(search_url, tile_bounds)
+        count = count_results(url)
+        print(f"  🗺️ Tile depth {depth}: {count if count is not None else '?'} results")
+
+        if count == 0:
+            continue
+        if count is not None and count >= cap and depth < max_depth:
+            pending.extend((child, depth + 1) for child in split_bounds(tile_bounds))
+            continue
+        tiles.append(Tile(tile_bounds, url, count, depth))
+
+    return tiles
+
+
+def tile_quotas(tiles, max_properties):
+    """Split a property target across tiles in proportion to their result counts.
+
+    Tiles whose count couldn't be read share whatever the counted tiles
+    can't cover, evenly (all of it if no count was readable).
+    """
+    counted = [tile.result_count for tile in tiles if tile.result_count is not None]
+    total = max(1, sum(counted))
+    quotas = [min(tile.result_count, math.ceil(max_properties * tile.result_count / total))
+              if tile.result_count is not None else None for tile in tiles]
+
+    uncounted = [i for i, quota in enumerate(quotas) if quota is None]
+    if uncounted:
+        remainder = max(0, max_properties - sum(quota for quota in quotas if quota is not None))
+        share, extra = divmod(remainder, len(uncounted))
+        for n, i in enumerate(uncounted):
+            quotas[i] = share + (1 if n < extra else 0)
+    return quotas
+
+
+class TileQuotas:
+    """Hands out tile targets and passes any tile's shortfall on to the tiles after it.
+
+    A tile comes up short when dedupe against earlier tiles or its own
+    listings run out. The missing count is added to the next tile handed
+    out; once every tile has run, whatever is still missing goes to tiles
+    that filled their quota and may have more (top-up passes). Safe to
+    share between the parallel tile workers.
+    """
+
+    def __init__(self, tiles, max_properties):
+        self.tiles = tiles
+        self.quotas = tile_quotas(tiles, max_properties)
+        self.pending = list(range(len(tiles)))
+        self.scraped = [0] * len(tiles)
+        self.refillable = []
+        self.spare = 0
+        self.lock = threading.Lock()
+
+    def next(self):
+        """(tile index, quota) to scrape next, or None when nothing is left worth running"""
+        with self.lock:
+            while self.pending:
+                index = self.pending.pop(0)
+                quota, self.spare = self.quotas[index] + self.spare, 0
+                if quota > 0:
+                    return index, quota
+            if self.spare > 0 and self.refillable:
+                quota, self.spare = self.spare, 0
+                return self.refillable.pop(0), quota
+            return None
+
+    def done(self, index, quota, scraped):
+        with self.lock:
+            self.scraped[index] += scraped
+            if scraped < quota:
+                self.spare += quota - scraped
+            elif self.tiles[index].result_count is None or self.scraped[index] < self.tiles[index].result_count:
+                self.refillable.append(index)
+
+
+def merge_unique(records):
+    """Drop listings that were scraped from more than one tile (border duplicates)"""
+    seen = ListingIdSet()
+    unique = []
+    for record in records:
+        key = record_id(record)
+        if key not in seen:
+            seen.add(key)
+            unique.append(record)
+    return unique
+
+
+def scrape_tiles(scraper, tiles, max_properties):
+    """Scrape tiles one after another with one browser and one shared dedupe set"""
+    collected = []
+    quotas = TileQuotas(tiles, max_properties)
+    while len(collected) < max_properties and not scraper.deadline_reached():
+        job = quotas.next()
+        if job is None:
+            break
+        index, quota = job
+        quota = min(quota, max_properties - len(collected))
+        tile = tiles[index]
+        print(f"\n🗺️ Tile {index + 1}/{len(tiles)} ({tile.result_count} results, quota {quota})")
+        scraper.all_properties_data = []
+        before = len(collected)
+        collected.extend(scraper.scrape_multiple_properties(tile.search_url, max_properties=quota))
+        collected = merge_unique(collected)
+        quotas.done(index, quota, len(collected) - before)
+    scraper.all_properties_data = collected[:max_properties]
+    return scraper.all_properties_data
+
+
+def scrape_tiles_parallel(tiles, max_properties, scraper_factory, workers=2, shared_ids=None, retry_queue=None):
+    """Scrape tiles concurrently, one browser per worker, all sharing one dedupe set.
+
+    scraper_factory() must return a new MultiPropertyZillowScraper. Results
+    are merged in tile order, so the output doesn't depend on which worker
+    finished first. With a retry_queue, each worker retries its failures in
+    a fork of it and the failures are merged back into it at the end.
+    """
+    shared_ids = shared_ids if shared_ids is not None else ListingIdSet()
+    lock = threading.Lock()
+    results = {}
+    scrapers = []
+    quotas = TileQuotas(tiles, max_properties)
+
+    def worker():
+        scraper = scraper_factory()
+        scraper.scraped_ids = shared_ids
+        if retry_queue is not None:
+            scraper.retry_queue = retry_queue.fork()
+        with lock:
+            scrapers.append(scraper)
+        while not scraper.deadline_reached():
+            job = quotas.next()
+            if job is None:
+                return
+            index, quota = job
+            scraper.all_properties_data = []
+            try:
+                scraped = list(scraper.scrape_multiple_properties(tiles[index].search_url, max_properties=quota))
+            except Exception as e:
+                print(f"❌ Tile {index + 1} failed: {e}")
+                scraped = list(scraper.all_properties_data)
+            with lock:
+                results.setdefault(index, []).extend(scraped)
+            quotas.done(index, quota, len(scraped))
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(worker) for _ in range(min(workers, len(tiles)))]:
+                future.result()
+    finally:
+        for scraper in scrapers:
+            if retry_queue is not None:
+                retry_queue.merge(scraper.retry_queue)
+            try:
+                scraper.driver.quit()
+            except Exception:
+                pass
+            if getattr(scraper, 'metrics', None) is not None:
+                scraper.metrics.release(scraper)
+
+    merged = []
+    for index in range(len(tiles)):
+        merged.extend(results.get(index, []))
+    return merge_unique(merged)[:max_properties]
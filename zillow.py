@@ -24,6 +24,21 @@ import random
 import re
 import os
 import undetected_chromedriver as uc
+from contextlib import nullcontext
+
+from http_fetch import HttpPageFetcher
+from static_page import StaticPageDriver
+from normalize import normalize_properties
+from region_cache import region_key
+from retry_queue import RetryQueue
+from parse_pool import HYDRATE_SCRIPT, PageSnapshot
+from concurrency import OK, BLOCK, TIMEOUT
+from tab_pool import TabPool, BACKGROUND_TAB_FLAGS
+from run_metrics import process_tree_rss, driver_pid
+from network_capture import NetworkCapture, enable_network_logging, listing_fields, covered_groups
+from listing_identity import ListingIdSet, canonical_url, zpid_from_url, zpid_from_page
+from page_classifier import (classify_page, is_empty_record, PageNotScrapable, SessionCircuitBreaker,
+                             CHALLENGE, EMPTY, SCRAPABLE_PAGE_TYPES, DEAD_PAGE_TYPES)
 
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
@@ -33,12 +48,203 @@ USER_AGENTS = [
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Safari/605.1.15',
 ]
 
+# Extractors grouped by the fields they fill, in extraction order: (group, method, log line)
+FIELD_GROUPS = [
+    ('image', 'extract_property_image_url', '- Property Image URL Scraping done'),
+    ('core', 'extract_price_and_basic_info', '- Basic Information Scraping Done'),
+    ('features', 'extract_property_features_detailed', '- Property Features Scraping done'),
+    ('scores', 'extract_neighborhood_scores_detailed', '- Neighbourhood Features Scraping done'),
+    ('schools', 'extract_schools_detailed', '- School Features Scraping done'),
+    ('climate', 'extract_environmental_risks', '- Environmental Features Scraping done'),
+    ('history', 'extract_market_data_detailed', '- Market Features Scraping done'),
+    ('nearby', 'extract_nearby_cities', '- Nearby Cities Features Scraping done'),
+]
+ALL_FIELD_GROUPS = [group for group, _, _ in FIELD_GROUPS]
+
+# Typical seconds per group (built-in waits plus WebDriver calls), used to
+# estimate savings until the run has measured the group itself
+DEFAULT_GROUP_SECONDS = {
+    'image': 0.5, 'core': 1.5, 'features': 2.5, 'scores': 2.5,
+    'schools': 1.5, 'climate': 6.5, 'history': 0.5, 'nearby': 4.5,
+}
+
+def parse_field_groups(spec):
+    """'core,features,scores' -> set of groups; empty/'all' means everything. 'core' is always kept."""
+    if not spec or spec.strip().lower() == 'all':
+        return set(ALL_FIELD_GROUPS)
+    groups = {group.strip().lower() for group in spec.split(',') if group.strip()}
+    unknown = groups - set(ALL_FIELD_GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown field group(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(ALL_FIELD_GROUPS)}")
+    # Price and address drive dedupe, empty-page detection and HTTP fallback
+    groups.add('core')
+    return groups
+
+# An HTTP-fetched page missing any of these is re-scraped in the browser
+HTTP_REQUIRED_FIELDS = ['price', 'address']
+
+# Outcomes of one attempt at a listing
+SCRAPED = 'scraped'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+PARSING = 'parsing'  # snapshot handed to the parse pool; counted once its record comes back
+
+RESULTS_LIST_XPATH = '/html/body/div[1]/div/div[2]/div/div/div[1]/div[1]/ul'
+
+# Runs inside the search page (execute_async_script). Walks the result list
+# toward the first card still missing its homedetails link (or the last card),
+# a MutationObserver notes every change to the list and an IntersectionObserver
+# reports when the last card is on screen. Resolves once the last card is
+# visible, every listing card has its link and nothing changed for quietMs;
+# resolves anyway at ceilingMs.
+LAZY_LOAD_SCRIPT = """
+const [listXPath, ceilingMs, quietMs] = arguments;
+const done = arguments[arguments.length - 1];
+const started = performance.now();
+const list = document.evaluate(listXPath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (!list) { done({status: 'no_list', count: 0, pending: 0, ms: 0}); return; }
+
+let lastChange = performance.now();
+let lastVisible = false;
+let finished = false;
+let watchedCard = null;
+
+const cards = () => Array.from(list.children);
+const pendingCards = () => cards().filter(li => li.querySelector('article, [data-test="property-card"]')
+                                              && !li.querySelector('a[href*="/homedetails/"]'));
+
+const intersections = new IntersectionObserver(entries => {
+    entries.forEach(entry => { if (entry.target === watchedCard) lastVisible = entry.isIntersecting; });
+});
+const watchLastCard = () => {
+    const last = list.lastElementChild;
+    if (last && last !== watchedCard) {
+        if (watchedCard) intersections.unobserve(watchedCard);
+        watchedCard = last;
+        lastVisible = false;
+        intersections.observe(last);
+    }
+};
+const mutations = new MutationObserver(() => { lastChange = performance.now(); watchLastCard(); });
+mutations.observe(list, {childList: true, subtree: true, attributes: true, attributeFilter: ['href']});
+watchLastCard();
+
+const finish = status => {
+    if (finished) return;
+    finished = true;
+    mutations.disconnect();
+    intersections.disconnect();
+    window.scrollTo(0, 0);
+    done({status: status, count: list.children.length, pending: pendingCards().length,
+          ms: Math.round(performance.now() - started)});
+};
+
+const tick = () => {
+    if (finished) return;
+    const now = performance.now();
+    const pending = pendingCards();
+    if (pending.length === 0 && lastVisible && now - lastChange >= quietMs) { finish('complete'); return; }
+    if (now - started >= ceilingMs) { finish('ceiling'); return; }
+    const target = pending.length ? pending[0] : list.lastElementChild;
+    if (target) target.scrollIntoView({block: 'center'});
+    setTimeout(tick, 150);
+};
+tick();
+"""
+
 class MultiPropertyZillowScraper:
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, fetch_mode='browser', driver=None, field_groups=None, capture_network=False,
+                 tabs=1):
         self.all_properties_data = []
-        self.scraped_urls = set()
+        # Listings already scraped, keyed by zpid so slug/query variants of a URL still match
+        self.scraped_ids = ListingIdSet()
         self.last_scraped_url = None  # Track last scraped URL to avoid duplicates
-        self.setup_driver(headless)        
+        self.headless = headless
+
+        # 'browser' renders every detail page in Chrome; 'http' fetches it with the
+        # session's cookies and only falls back to Chrome when that doesn't work
+        self.fetch_mode = fetch_mode
+        self.http_fetcher = None
+        self.fetch_stats = {'http': 0, 'browser_fallback': 0}
+
+        # Field-group projection: extractors outside field_groups are skipped
+        self.field_groups = set(field_groups) if field_groups else set(ALL_FIELD_GROUPS)
+        self.skipped_groups = {}
+        self.extractor_timings = {}
+        # Group -> seconds per page measured in past runs, for groups this run skips (see main.py)
+        self.group_timing_history = {}
+
+        # Fields decoded from the page's own JSON API responses; DOM extraction only fills the rest.
+        # api_fields may be preset (e.g. by the parse pool) when the payloads were read elsewhere.
+        self.network_capture = NetworkCapture() if capture_network else None
+        self.api_fields = None
+        self.api_groups = {}
+
+        # Optional background stage (e.g. ImageDownloader) fed from scraped records
+        self.image_pipeline = None
+        # Optional DebugCapture; only used when something goes wrong
+        self.debug_capture = None
+        self.page_timings = {}
+        self.page_errors = {}
+        # Optional RegionCache: nearby cities/region are shared by a whole ZIP code
+        self.region_cache = None
+        self.region_cache_stats = {'hits': 0, 'misses': 0}
+
+        # 'observer' waits in-page until the result cards have hydrated; 'fixed' is the old five-step scroll
+        self.lazy_load_mode = 'observer'
+        self.lazy_load_ceiling = 15
+        self.lazy_load_stats = {'complete': 0, 'ceiling': 0, 'fallback': 0, 'seconds': 0.0}
+        self.results_settled = False
+
+        # Failed listings are retried later with backoff instead of being dropped
+        self.retry_queue = RetryQueue()
+        self.max_consecutive_failures = 5
+
+        # Optional StrategyTuner: reorders selector/regex fallback chains by measured hit rate and cost
+        self.strategy_tuner = None
+
+        # Optional ParsePool: pages are snapshotted here and parsed in worker processes
+        self.parse_pool = None
+        self.pending_parses = []
+
+        # Optional AIMDController shared by parallel scrapers: caps concurrent page loads
+        # and adapts the cap to load latency, block pages and timeouts
+        self.concurrency = None
+
+        # Optional RunMetrics: live progress endpoint/status file for the whole queue run
+        self.metrics = None
+
+        # Epoch seconds after which the current scrape stops cleanly (set per city by the deadline planner)
+        self.deadline = None
+
+        # tabs > 1: the next listings load in background tabs of the same browser while one is extracted
+        self.tab_count = tabs
+        self.tab_pool = None
+
+        # Block/dead-page handling: pages are classified before extraction, and
+        # repeated challenge pages trip the breaker into a session rotation
+        self.circuit_breaker = SessionCircuitBreaker()
+        self.page_stats = {}
+        # Detail pages found off-market or 404 (the change feed reports these listings as removed)
+        self.dead_listings = []
+        self.home_window = None
+        self.last_search_url = None
+
+        if driver is not None:
+            self.driver = driver
+        else:
+            self.setup_driver(headless)
+
+    @classmethod
+    def from_page_source(cls, html, url):
+        """A browserless scraper whose extractors run against already-fetched HTML"""
+        return cls(driver=StaticPageDriver(html, url))
+
+    def pause(self, low, high=None):
+        """Randomized wait for page content; skipped when there is no live page to wait on"""
+        if getattr(self.driver, 'is_static', False):
+            return
+        time.sleep(random.uniform(low, high) if high is not None else low)
            
     def setup_driver(self, headless):
         try:
@@ -51,6 +257,11 @@ class MultiPropertyZillowScraper:
             options.add_argument(f'--user-agent={random.choice(USER_AGENTS)}')
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
+            if self.network_capture is not None:
+                enable_network_logging(options)
+            if self.tab_count > 1:
+                for flag in BACKGROUND_TAB_FLAGS:
+                    options.add_argument(flag)
 
             self.driver = uc.Chrome(options=options, version_main=None)
             
@@ -63,6 +274,11 @@ class MultiPropertyZillowScraper:
             
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
+            if self.network_capture is not None:
+                enable_network_logging(options)
+            if self.tab_count > 1:
+                for flag in BACKGROUND_TAB_FLAGS:
+                    options.add_argument(flag)
             
             service = Service(ChromeDriverManager().install())
             self.driver = webdriver.Chrome(service=service, options=options)
@@ -82,6 +298,8 @@ class MultiPropertyZillowScraper:
         """Switched to a tab-based model for faster, more stable scraping."""
         print(f"Starting to scrape {max_properties} properties from search results...")
         
+        self.last_search_url = search_url
+        self.circuit_breaker.reset()
         self.driver.get(search_url)
         time.sleep(random.uniform(3.5, 5.5))
         
@@ -89,8 +307,6 @@ class MultiPropertyZillowScraper:
         current_page = 1
         consecutive_failures = 0
 
-        self.driver.save_screenshot("data/screenshot_start.png")
-        
         while properties_scraped < max_properties:
             print(f"\n=== PROCESSING PAGE {current_page} ===")
             
@@ -99,17 +315,17 @@ class MultiPropertyZillowScraper:
                 WebDriverWait(self.driver, 15).until(
                     EC.presence_of_element_located((By.XPATH, '/html/body/div[1]/div/div[2]/div/div/div[1]/div[1]/ul'))
                 )
-                self.driver.save_screenshot("data/screenshot_start.png")
                 print("--------------------Search results loaded----------------------")
             except:
                 print("❌ Search results failed to load. Stopping.")
+                self.capture_debug('search_results_timeout', url=search_url)
                 break
             
             # Step 1: Scroll to ensure all list items are in the DOM
             print("Loading all properties on page...")
-            self.driver.save_screenshot("data/screenshot_start.png")
             self.scroll_to_load_all_properties()
-            time.sleep(random.uniform(2,4))
+            if not self.results_settled:
+                time.sleep(random.uniform(2,4))
 
             # Step 2: Get the count and collect all property URLs from the page first
             property_count = self.get_property_count()
@@ -117,68 +333,66 @@ class MultiPropertyZillowScraper:
             print(f"Found {property_count} list items. Collected {len(all_links_on_page)} unique property links to process.")
 
             # Step 3: Get the handle of our main "home base" tab
-            original_window = self.driver.current_window_handle
+            self.home_window = self.driver.current_window_handle
+            if self.tab_count > 1 and self.fetch_mode == 'browser' and self.tab_pool is None:
+                self.tab_pool = TabPool(self.driver, self.tab_count, network_capture=self.network_capture)
 
             # Step 4: Loop through the collected links
             for i, property_url in enumerate(all_links_on_page):
                 
-                # Stop if we've reached our target
+                # Stop if we've reached our target (in-flight parses count once they land)
+                if properties_scraped + self.parses_pending() >= max_properties:
+                    properties_scraped += self.collect_parsed(wait=True)
                 if properties_scraped >= max_properties:
                     print(f"✅ Reached target of {max_properties} properties.")
                     break
+                if self.deadline_reached():
+                    print(f"⏰ Out of time for this search with {properties_scraped} properties. Stopping.")
+                    break
                 
                 print(f"\n--> Processing link {i + 1} / {len(all_links_on_page)} (Total Scraped: {properties_scraped})")
                 
                 # Efficiency check: skip if we have already scraped this URL from a previous page
-                if property_url in self.scraped_urls:
+                if property_url in self.scraped_ids:
                     print(f"  - Skipping duplicate URL found on a previous page: {property_url}")
                     continue
 
-                try:
-                    # Open a new tab
-                    time.sleep(random.uniform(3,6)) # Wait for the new page to load
-                    self.driver.switch_to.new_window('tab')
-                    
-                    # Navigate to the property URL in the new tab
-                    self.driver.get(property_url)
-                    time.sleep(1)
-
-                    # Scrape all the data from the new tab
-                    property_data = self.extract_complete_property_data()
-
-                    if property_data:
-                        self.all_properties_data.append(property_data)
-                        self.scraped_urls.add(property_url) # Add to our set of scraped URLs
-                        properties_scraped += 1
-                        consecutive_failures = 0
-                        print(f"  ✅ Successfully scraped property {properties_scraped}")
-                        
-                        # Save a checkpoint every 5 properties
-                        self.save_progress_checkpoint("current_scrape", properties_scraped)
-                
-                except Exception as e:
-                    print(f"  ❌ An error occurred while scraping {property_url}: {e}")
+                if self.tab_pool is not None:
+                    # Keep the following listings loading while this one is extracted
+                    self.tab_pool.prefetch([url for url in all_links_on_page[i + 1:] if url not in self.scraped_ids],
+                                           self.home_window)
+
+                outcome = self.attempt_property(property_url)
+                if outcome == SCRAPED:
+                    properties_scraped += 1
+                    consecutive_failures = 0
+                    print(f"  ✅ Successfully scraped property {properties_scraped}")
+
+                    # Save a checkpoint every 5 properties
+                    self.save_progress_checkpoint("current_scrape", properties_scraped)
+                elif outcome == PARSING:
+                    consecutive_failures = 0
+                elif outcome == FAILED:
                     consecutive_failures += 1
-                    if consecutive_failures >= 5:
+                    if consecutive_failures >= self.max_consecutive_failures:
                         print("  🚨 Too many consecutive failures. Stopping scrape.")
+                        self.capture_debug('consecutive_failures')
                         # This break will exit the for loop
-                        break 
-                
-                finally:
-                    # CRITICAL: This block will run whether the 'try' succeeds or fails.
-                    # It ensures we always clean up our tabs.
-                    
-                    # Close the current (property) tab
-                    self.driver.close()
-                    
-                    # Switch focus back to the original "home base" tab
-                    self.driver.switch_to.window(original_window)
-                    
-                    # A brief pause to ensure stability
-                    time.sleep(random.uniform(0.5, 1.5))
-            
+                        break
+
+                # Finished parses and retries whose backoff has expired go in between new links
+                parsed = self.collect_parsed()
+                if parsed:
+                    properties_scraped += parsed
+                    self.save_progress_checkpoint("current_scrape", properties_scraped)
+                properties_scraped += self.run_due_retries(max_properties - properties_scraped - self.parses_pending())
+
+            if self.tab_pool is not None:
+                self.tab_pool.discard(self.home_window)
+
             # Check if we need to stop due to reaching the max properties or too many failures
-            if properties_scraped >= max_properties or consecutive_failures >= 5:
+            if properties_scraped >= max_properties or consecutive_failures >= self.max_consecutive_failures \
+                    or self.deadline_reached():
                 break
             
             # Step 5: After processing all links on this page, go to the next page
@@ -195,9 +409,453 @@ class MultiPropertyZillowScraper:
                 print(f"❌ Page navigation failed: {e}")
                 break
         
+        properties_scraped += self.collect_parsed(wait=True)
+        if consecutive_failures >= self.max_consecutive_failures:
+            self.retry_queue.abandon("scrape stopped after consecutive failures")
+        elif self.deadline_reached():
+            self.retry_queue.abandon("deadline reached")
+        elif properties_scraped < max_properties:
+            properties_scraped += self.drain_retries(max_properties - properties_scraped)
+        else:
+            self.retry_queue.abandon("target reached")
+
         print(f"\n🎉 Scraping completed! Total properties successfully scraped: {properties_scraped}")
+        if self.retry_queue.stats['queued']:
+            print(f"   • Retries: {self.retry_queue.stats['recovered']} recovered, "
+                  f"{self.retry_queue.stats['failed']} permanently failed")
+            for failure in self.retry_queue.failed_urls():
+                print(f"     ✗ {failure['url']} ({failure['attempts']} attempts): {failure['error']}")
+        if self.fetch_mode == 'http':
+            print(f"   • Fetched over HTTP: {self.fetch_stats['http']}, browser fallbacks: {self.fetch_stats['browser_fallback']}")
+        if self.page_stats:
+            print(f"   • Page types seen: {self.page_stats}, session rotations: {self.circuit_breaker.trips}")
+        if self.lazy_load_stats['complete'] or self.lazy_load_stats['ceiling']:
+            print(f"   • Result pages hydrated early: {self.lazy_load_stats['complete']}, hit the ceiling: "
+                  f"{self.lazy_load_stats['ceiling']}, fixed-scroll fallbacks: {self.lazy_load_stats['fallback']} "
+                  f"({self.lazy_load_stats['seconds']:.0f}s waiting)")
+        if self.tab_pool is not None:
+            stats = self.tab_pool.stats
+            heap = self.tab_pool.mean_tab_memory()
+            rss = process_tree_rss(driver_pid(self.driver))
+            print(f"   • Tabs: {stats['taken']} of {stats['prefetched']} prefetched listings used, "
+                  f"{stats['overlap_seconds']:.0f}s of loading overlapped with extraction"
+                  + (f", ~{heap / 1e6:.0f} MB JS heap per tab" if heap else "")
+                  + (f", browser RSS {rss / 1e6:.0f} MB" if rss else ""))
+        if self.network_capture is not None:
+            stats = self.network_capture.stats
+            print(f"   • API responses: {stats['payloads']} decoded on {stats['pages']} pages, "
+                  f"{stats['fields']} fields filled, extractor groups skipped: {self.api_groups}")
+        if self.parse_pool is not None:
+            stats = self.parse_pool.stats
+            print(f"   • Parse pool: {stats['parsed']} parsed, {stats['failed']} empty, {stats['parse_seconds']:.0f}s of "
+                  f"parsing off the browser thread, {stats['blocked_seconds']:.0f}s waiting for a free worker")
+        if self.region_cache is not None:
+            print(f"   • Region cache: {self.region_cache_stats['hits']} hits, {self.region_cache_stats['misses']} misses")
+        saved = self.estimated_seconds_saved()
+        if saved:
+            details = ', '.join(f"{group} ~{seconds:.0f}s" for group, seconds in saved.items())
+            print(f"   • Skipped field groups saved an estimated {sum(saved.values()):.0f}s ({details})")
         return self.all_properties_data
 
+    def attempt_property(self, property_url):
+        """One attempt at a listing: HTTP fast path when enabled, else a browser tab.
+
+        Returns SCRAPED, SKIPPED (dead page), FAILED or PARSING (snapshot
+        queued on the parse pool); a failed URL goes to the retry queue
+        instead of being lost.
+        """
+        # Browserless fast path: only open a tab if the HTTP fetch can't be used
+        if self.fetch_mode == 'http':
+            property_data = self.scrape_property_via_http(property_url)
+            if property_data:
+                self.on_property_scraped(property_url, property_data)
+                time.sleep(random.uniform(1, 2))
+                return SCRAPED
+
+        try:
+            property_data = self.scrape_property_guarded(property_url)
+        except Exception as e:
+            delay = self.retry_queue.add(property_url, e)
+            retry_note = f"retrying in ~{delay:.0f}s" if delay is not None else "giving up on it"
+            print(f"  ❌ An error occurred while scraping {property_url}: {e} ({retry_note})")
+            return FAILED
+
+        if not property_data:
+            return SKIPPED
+        if isinstance(property_data, PageSnapshot):
+            self.queue_parse(property_data)
+            return PARSING
+        self.on_property_scraped(property_url, property_data)
+        return SCRAPED
+
+    def retry_property(self, property_url):
+        if property_url in self.scraped_ids:
+            return SKIPPED
+        attempt = self.retry_queue.attempts.get(property_url, 0) + 1
+        print(f"\n--> Retrying {property_url} (attempt {attempt}/{self.retry_queue.max_attempts})")
+        outcome = self.attempt_property(property_url)
+        if outcome == SCRAPED:
+            print("  ✅ Recovered on retry")
+        return outcome
+
+    def run_due_retries(self, budget):
+        """Retry queued URLs whose backoff has expired; returns how many were scraped"""
+        scraped = 0
+        while scraped < budget:
+            property_url = self.retry_queue.pop_ready()
+            if property_url is None:
+                break
+            if self.retry_property(property_url) == SCRAPED:
+                scraped += 1
+        return scraped
+
+    def drain_retries(self, budget):
+        """End of the city: wait out the backoffs and retry everything still queued"""
+        scraped = 0
+        while scraped < budget and (len(self.retry_queue) or self.parses_pending()):
+            wait = self.retry_queue.next_ready_in()
+            if wait and self.deadline is not None and time.time() + wait >= self.deadline:
+                # The backoff would outlast the time left; let in-flight parses land and give up the rest
+                scraped += self.collect_parsed(wait=True)
+                break
+            if wait:
+                print(f"\n⏳ {len(self.retry_queue)} failed listing(s) queued; next retry in {wait:.0f}s")
+                time.sleep(wait)
+            scraped += self.run_due_retries(budget - scraped - self.parses_pending())
+            # Retried snapshots may parse empty again and requeue themselves
+            scraped += self.collect_parsed(wait=not len(self.retry_queue))
+        if len(self.retry_queue):
+            self.retry_queue.abandon("deadline reached" if self.deadline_reached() else "target reached")
+        return scraped
+
+    def deadline_reached(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def estimated_seconds_saved(self):
+        """Per skipped group: skips x its seconds per page in past runs (a skipped group is never
+        timed in this one), or the typical seconds when no run has measured it"""
+        saved = {}
+        for group, skips in self.skipped_groups.items():
+            per_page = self.group_timing_history.get(group, DEFAULT_GROUP_SECONDS.get(group, 1.0))
+            saved[group] = skips * per_page
+        return saved
+
+    def mean_extractor_seconds(self):
+        return {group: sum(timings) / len(timings) for group, timings in self.extractor_timings.items() if timings}
+
+    def tuned(self, chain, strategies, generic_tail=0):
+        """A fallback chain in the order the strategy tuner recommends (as written without one);
+        the last generic_tail strategies stay last"""
+        if self.strategy_tuner is None:
+            return list(strategies)
+        return self.strategy_tuner.order(chain, strategies, generic_tail=generic_tail)
+
+    def record_strategy(self, chain, strategy, hit, started):
+        if self.strategy_tuner is not None:
+            self.strategy_tuner.record(chain, strategy, hit, time.time() - started)
+
+    def capture_debug(self, reason, url=None, error=None, html=None, driver=None):
+        """Hand the current page (or another driver's) to the debug capture, if one is attached; never raises"""
+        if self.debug_capture is None:
+            return None
+        try:
+            return self.debug_capture.capture(driver or self.driver, reason, url=url, error=error,
+                                              timings=self.page_timings, html=html)
+        except Exception as e:
+            print(f"  ⚠️ Debug capture failed: {e}")
+            return None
+
+    def classify_current_page(self):
+        """Classify the loaded page from its title and the start of its HTML, without a full page_source pull"""
+        try:
+            title, head = self.driver.execute_script(
+                "return [document.title, document.documentElement.outerHTML.slice(0, 50000)];"
+            )
+        except Exception:
+            title, head = '', self.driver.page_source
+        page_type = classify_page(head, title=title)
+        self.page_stats[page_type] = self.page_stats.get(page_type, 0) + 1
+        return page_type
+
+    def scrape_property_guarded(self, property_url):
+        """Scrape a property in a tab; dead pages are skipped (None) and a tripped
+        circuit breaker pauses, rotates the session and retries the same URL"""
+        while True:
+            try:
+                with self.concurrency.slot() if self.concurrency is not None else nullcontext():
+                    return self.scrape_property_in_tab(property_url, self.home_window)
+            except PageNotScrapable as e:
+                if e.page_type in DEAD_PAGE_TYPES:
+                    print(f"  ⏭️ Skipping {e.page_type} listing: {property_url}")
+                    self.dead_listings.append({'url': property_url, 'page_type': e.page_type})
+                    return None
+                if e.page_type != CHALLENGE or not self.circuit_breaker.tripped:
+                    raise
+                if self.circuit_breaker.exhausted:
+                    print("  🚨 Circuit breaker exhausted its session rotations")
+                    raise
+                self.rotate_session(self.circuit_breaker.trip())
+
+    def rotate_session(self, cooldown):
+        """Pause, then replace the browser (new user agent, fresh cookies) and reopen the search page"""
+        try:
+            self.driver.switch_to.window(self.home_window)
+            resume_url = self.driver.current_url
+        except Exception:
+            resume_url = self.last_search_url
+
+        print(f"  🔌 Circuit breaker tripped: cooling down {cooldown:.0f}s, then starting a new session")
+        if self.metrics is not None:
+            self.metrics.record_rotation()
+        time.sleep(cooldown)
+
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.setup_driver(self.headless)
+        self.http_fetcher = None  # Its cookies belong to the burned session
+        self.tab_pool = None  # Its tabs died with the old browser
+
+        self.driver.get(resume_url)
+        time.sleep(random.uniform(3.5, 5.5))
+        self.home_window = self.driver.current_window_handle
+
+    def scrape_property_in_tab(self, property_url, original_window):
+        """Open a property in a new tab, extract it, and always return to the search tab"""
+        try:
+            if self.tab_pool is not None and property_url in self.tab_pool:
+                # Loaded in the background while earlier listings were extracted (the pool
+                # spaced its tab opens). Only the page's own load time goes to the
+                # concurrency controller, None if it never finished
+                load_seconds = self.tab_pool.take(property_url)
+            else:
+                # Open a new tab
+                time.sleep(random.uniform(3,6)) # Wait for the new page to load
+                self.driver.switch_to.new_window('tab')
+
+                # Navigate to the property URL in the new tab
+                if self.network_capture is not None:
+                    self.network_capture.reset(self.driver)
+                load_started = time.time()
+                self.driver.get(property_url)
+                load_seconds = time.time() - load_started
+                time.sleep(1)
+            if self.tab_pool is not None:
+                self.tab_pool.sample_memory()
+
+            # Don't spend ~20s of extractor scrolls on a challenge, 404 or removed page
+            page_type = self.classify_current_page()
+            self.circuit_breaker.record(page_type)
+            if self.concurrency is not None:
+                self.concurrency.record(load_seconds, BLOCK if page_type == CHALLENGE else OK)
+            if page_type not in SCRAPABLE_PAGE_TYPES:
+                raise PageNotScrapable(page_type, property_url)
+
+            if self.parse_pool is not None:
+                # Parsing happens in a worker process; the tab only has to render
+                snapshot = self.capture_snapshot(property_url)
+                if self.http_fetcher is not None:
+                    self.http_fetcher.refresh_cookies(self.driver)
+                return snapshot
+
+            # Scrape all the data from the new tab
+            property_data = self.extract_complete_property_data()
+            if property_data is not None and is_empty_record(property_data):
+                raise PageNotScrapable(EMPTY, property_url)
+
+            # The browser may have just cleared a challenge; share its fresh cookies
+            if property_data and self.http_fetcher is not None:
+                self.http_fetcher.refresh_cookies(self.driver)
+
+            return property_data
+
+        except PageNotScrapable as e:
+            if e.page_type not in DEAD_PAGE_TYPES:
+                self.capture_debug(e.page_type, url=property_url, error=e)
+            raise
+        except Exception as e:
+            if self.concurrency is not None and isinstance(e, TimeoutException):
+                self.concurrency.record(outcome=TIMEOUT)
+            # Captured before the tab closes so the screenshot shows the failing page
+            self.capture_debug('property_error', url=property_url, error=e)
+            raise
+
+        finally:
+            # CRITICAL: This block will run whether the 'try' succeeds or fails.
+            # It ensures we always clean up our tabs.
+            
+            # Close the current (property) tab
+            self.driver.close()
+            
+            # Switch focus back to the original "home base" tab
+            self.driver.switch_to.window(original_window)
+            
+            # A brief pause to ensure stability
+            time.sleep(random.uniform(0.5, 1.5))
+
+    def capture_snapshot(self, property_url):
+        """Hydrate the open listing (scroll, expand) and capture its rendered HTML for the parse pool"""
+        started = time.time()
+        result = None
+        try:
+            result = self.driver.execute_async_script(HYDRATE_SCRIPT)
+        except Exception as e:
+            print(f"  - Hydration script failed ({e}), snapshotting as-is")
+        if not result:
+            result = [self.driver.page_source, self.driver.current_url, self.driver.title]
+        html, url, title = result
+        snapshot = PageSnapshot(property_url, html, url, title)
+        snapshot.api_fields = self.capture_api_fields()
+        print(f"  📸 Captured {len(html) / 1e6:.1f} MB snapshot in {time.time() - started:.1f}s")
+        return snapshot
+
+    def queue_parse(self, snapshot):
+        self.parse_pool.wait_for_slot([future for _, future in self.pending_parses])
+        self.pending_parses.append((snapshot, self.parse_pool.submit(snapshot, self.field_groups)))
+
+    def parses_pending(self):
+        return len(self.pending_parses)
+
+    def collect_parsed(self, wait=False):
+        """Take finished records from the parse pool (all of them if wait); returns how many were kept.
+        A snapshot that parsed to nothing goes to the retry queue like any failed page."""
+        scraped = 0
+        still_pending = []
+        for snapshot, future in self.pending_parses:
+            if not wait and not future.done():
+                still_pending.append((snapshot, future))
+                continue
+            property_url = snapshot.requested_url
+            try:
+                property_data, timings, skipped, errors = future.result()
+            except Exception as e:
+                property_data, timings, skipped, errors = None, {}, {}, {'parse': repr(e)}
+
+            for group, seconds in timings.items():
+                self.extractor_timings.setdefault(group, []).append(seconds)
+            for group, skips in skipped.items():
+                self.skipped_groups[group] = self.skipped_groups.get(group, 0) + skips
+            for group, error in errors.items():
+                self.capture_debug(f"extractor_{group}", url=snapshot.url, error=error, html=snapshot.html,
+                                   driver=StaticPageDriver(snapshot.html, snapshot.url))
+
+            ok = bool(property_data) and not is_empty_record(property_data)
+            self.parse_pool.record(timings, ok)
+            if not ok:
+                delay = self.retry_queue.add(property_url, PageNotScrapable(EMPTY, property_url))
+                retry_note = f"retrying in ~{delay:.0f}s" if delay is not None else "giving up on it"
+                print(f"  ❌ Snapshot of {property_url} parsed to an empty record ({retry_note})")
+                continue
+            if property_url in self.scraped_ids:
+                continue
+            self.on_property_scraped(property_url, property_data)
+            scraped += 1
+            print(f"  ✅ Parsed {property_url} ({sum(timings.values()):.1f}s in a worker)")
+        self.pending_parses = still_pending
+        return scraped
+
+    def scrape_single_property(self, property_url):
+        """Scrape one detail page outside the search-results loop (HTTP first when enabled)"""
+        if self.fetch_mode == 'http':
+            property_data = self.scrape_property_via_http(property_url)
+            if property_data:
+                return property_data
+        self.home_window = self.driver.current_window_handle
+        property_data = self.scrape_property_guarded(property_url)
+        if isinstance(property_data, PageSnapshot):
+            # Nothing to overlap with here, so just wait for the worker
+            property_data = self.parse_pool.submit(property_data, self.field_groups).result()[0]
+        return property_data
+
+    def collect_property_links(self, search_url, max_links=50):
+        """Page through search results collecting homedetails URLs without scraping them"""
+        print(f"Collecting up to {max_links} property links from search results...")
+
+        self.driver.get(search_url)
+        time.sleep(random.uniform(3.5, 5.5))
+
+        links = []
+        while len(links) < max_links:
+            try:
+                WebDriverWait(self.driver, 15).until(
+                    EC.presence_of_element_located((By.XPATH, '/html/body/div[1]/div/div[2]/div/div/div[1]/div[1]/ul'))
+                )
+            except:
+                print("❌ Search results failed to load. Stopping.")
+                break
+
+            self.scroll_to_load_all_properties()
+            if not self.results_settled:
+                time.sleep(random.uniform(2,4))
+
+            for property_url in self.get_all_links(self.get_property_count()):
+                if property_url not in links and property_url not in self.scraped_ids:
+                    links.append(property_url)
+
+            if len(links) >= max_links or not self.go_to_next_page():
+                break
+            time.sleep(random.uniform(2.5, 3.5))
+
+        print(f"Collected {min(len(links), max_links)} property links")
+        return links[:max_links]
+
+    def on_property_scraped(self, property_url, property_data):
+        """Keep a successfully scraped record and hand it to any downstream stages"""
+        self.all_properties_data.append(property_data)
+        self.retry_queue.succeeded(property_url)
+        self.scraped_ids.add(property_url)
+        if property_data.get('zpid') is not None:
+            # Covers redirects where the page's listing differs from the link's
+            self.scraped_ids.add(property_data['zpid'])
+
+        if self.image_pipeline is not None:
+            self.image_pipeline.submit(property_data.get('image_url'))
+        if self.metrics is not None:
+            self.metrics.record_property()
+
+    def scrape_property_via_http(self, property_url):
+        """Fetch a detail page without the browser and parse it offline.
+        Returns None when the page must be rendered in Chrome instead."""
+        try:
+            if self.http_fetcher is None:
+                self.http_fetcher = HttpPageFetcher.from_driver(self.driver)
+
+            status, html = self.http_fetcher.fetch(property_url)
+            page_type = classify_page(html, status=status)
+            if status != 200 or page_type not in SCRAPABLE_PAGE_TYPES:
+                print(f"  - HTTP fetch returned a {page_type} page ({status}), falling back to browser")
+                if page_type not in DEAD_PAGE_TYPES:
+                    self.capture_debug(f"http_{page_type}", url=property_url, html=html)
+                self.fetch_stats['browser_fallback'] += 1
+                return None
+
+            page = self.from_page_source(html, property_url)
+            page.field_groups = self.field_groups
+            page.region_cache = self.region_cache
+            page.region_cache_stats = self.region_cache_stats
+            # No strategy tuner: static timings aren't comparable with the browser's, and XPaths
+            # the static engine can't evaluate would be recorded as misses for the browser too
+            property_data = page.extract_complete_property_data()
+            missing = [field for field in HTTP_REQUIRED_FIELDS
+                       if not property_data or property_data.get(field) == 'N/A']
+            if missing:
+                print(f"  - HTTP page missing {', '.join(missing)}, falling back to browser")
+                self.fetch_stats['browser_fallback'] += 1
+                return None
+
+            self.fetch_stats['http'] += 1
+            for group, timings in page.extractor_timings.items():
+                self.extractor_timings.setdefault(group, []).extend(timings)
+            for group, skips in page.skipped_groups.items():
+                self.skipped_groups[group] = self.skipped_groups.get(group, 0) + skips
+            return property_data
+
+        except Exception as e:
+            print(f"  - HTTP fetch error for {property_url}: {e}, falling back to browser")
+            self.fetch_stats['browser_fallback'] += 1
+            return None
+
     def get_all_links(self, property_count):
         print("We are now inside the get_all_links function.")
         all_property_links = []
@@ -221,9 +879,9 @@ class MultiPropertyZillowScraper:
                 )
                 
                 # 3. Now that we know the link exists, get the URL.
-                property_url = link_element.get_attribute('href')
+                property_url = canonical_url(link_element.get_attribute('href'))
                 
-                if property_url:
+                if property_url and property_url not in all_property_links:
                     all_property_links.append(property_url)
                 
             except Exception as e:
@@ -234,6 +892,42 @@ class MultiPropertyZillowScraper:
         return all_property_links
 
     def scroll_to_load_all_properties(self):
+        """Load every result card on the page; returns the number of list items.
+
+        Sets results_settled when the in-page observer confirmed that every
+        card has hydrated, so callers can skip their extra settle sleep.
+        """
+        self.results_settled = False
+        if getattr(self.driver, 'is_static', False):
+            return self.get_property_count()
+        if self.lazy_load_mode == 'observer':
+            result = self.wait_for_results_hydrated()
+            if result is not None:
+                return result
+            self.lazy_load_stats['fallback'] += 1
+        return self.scroll_in_fixed_steps()
+
+    def wait_for_results_hydrated(self):
+        """Event-driven lazy-load completion; None if the script can't run here"""
+        started = time.time()
+        try:
+            self.driver.set_script_timeout(self.lazy_load_ceiling + 5)
+            result = self.driver.execute_async_script(LAZY_LOAD_SCRIPT, RESULTS_LIST_XPATH,
+                                                      int(self.lazy_load_ceiling * 1000), 600)
+        except Exception as e:
+            print(f"  ⚠️ In-page lazy-load wait failed ({e}), falling back to fixed scrolling")
+            return None
+        if not result or result.get('status') == 'no_list':
+            return None
+
+        self.lazy_load_stats[result['status']] += 1
+        self.lazy_load_stats['seconds'] += time.time() - started
+        self.results_settled = result['status'] == 'complete'
+        print(f"  Results {'hydrated' if self.results_settled else 'still loading at the ceiling'}: "
+              f"{result['count']} cards, {result['pending']} without links, {result['ms'] / 1000:.1f}s")
+        return result['count']
+
+    def scroll_in_fixed_steps(self):
         """Scroll down to load all properties via lazy loading"""
         try:
             print("  Scrolling to load all properties...")
@@ -347,13 +1041,23 @@ class MultiPropertyZillowScraper:
                 self.archived_data.extend(self.all_properties_data[:-100])
                 self.all_properties_data = self.all_properties_data[-100:]
     
+    def current_zpid(self):
+        """Listing ID of the open page: from the URL, else from the page's own markup"""
+        zpid = zpid_from_url(self.driver.current_url)
+        if zpid is None:
+            zpid = zpid_from_page(self.driver.page_source)
+        return zpid
+
     def extract_complete_property_data(self):
         """Extract all property data from current property page - optimized version"""
         try:
             print("Starting property data extraction...")
+            self.page_timings = {}
+            self.page_errors = {}
             
             property_data = {
-                'url': self.driver.current_url,
+                'url': canonical_url(self.driver.current_url),
+                'zpid': self.current_zpid(),
                 'image_url': 'N/A',
                 'scraped_at': datetime.now().isoformat(),
                 
@@ -393,46 +1097,36 @@ class MultiPropertyZillowScraper:
                 'property_history': 'N/A'
             }
 
-            try:
-                self.extract_property_image_url(property_data)
-                print('- Property Image URL Scraping done')
-            except Exception as e:
-                print(f"  - Error in image URL: {e}")
-            try:
-                self.extract_price_and_basic_info(property_data)
-                print('- Basic Information Scraping Done')
-            except Exception as e:
-                print(f"  - Error in basic info: {e}")
-            try:
-                self.extract_property_features_detailed(property_data)
-                print('- Property Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_neighborhood_scores_detailed(property_data)
-                print('- Neighbourhood Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_schools_detailed(property_data)
-                print('- School Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_environmental_risks(property_data)
-                print('- Environmental Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_market_data_detailed(property_data)
-                print('- Market Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
-            try:
-                self.extract_nearby_cities(property_data)
-                print('- Nearby Cities Features Scraping done')
-            except Exception as e:
-                print(f"  - Error in features: {e}")
+            api_fields = self.api_fields if self.api_fields is not None else self.capture_api_fields()
+            self.api_fields = None
+            property_data.update(api_fields)
+            api_covered = covered_groups(api_fields)
+
+            for group, extractor_name, done_message in FIELD_GROUPS:
+                if group not in self.field_groups:
+                    # Skipping the extractor also skips its scrolls and waits
+                    self.skipped_groups[group] = self.skipped_groups.get(group, 0) + 1
+                    continue
+                if group in api_covered:
+                    self.api_groups[group] = self.api_groups.get(group, 0) + 1
+                    print(f"  - {group}: taken from the page's API responses")
+                    continue
+                started = time.time()
+                error = None
+                try:
+                    getattr(self, extractor_name)(property_data)
+                    print(done_message)
+                except Exception as e:
+                    print(f"  - Error in {group}: {e}")
+                    error = e
+                self.page_timings[group] = time.time() - started
+                self.extractor_timings.setdefault(group, []).append(self.page_timings[group])
+                if error is not None:
+                    self.page_errors[group] = repr(error)
+                    self.capture_debug(f"extractor_{group}", error=error)
+
+            # Extractors reset the fields they own; the structured values win over the DOM's
+            property_data.update(api_fields)
             
             print("Property data extraction completed!")
             return property_data
@@ -441,6 +1135,20 @@ class MultiPropertyZillowScraper:
             print(f"Error in extraction: {e}")
             return None
     
+    def capture_api_fields(self):
+        """Record fields from the JSON responses the open page loaded ({} without network capture)"""
+        if self.network_capture is None or getattr(self.driver, 'is_static', False):
+            return {}
+        try:
+            payloads = self.network_capture.collect(self.driver)
+            fields = listing_fields(payloads, zpid_from_url(self.driver.current_url))
+        except Exception as e:
+            print(f"  - Could not decode API responses: {e}")
+            return {}
+        self.network_capture.stats['fields'] += len(fields)
+        self.network_capture.stats['groups_skipped'] += len(covered_groups(fields) & self.field_groups)
+        return fields
+
     def extract_property_image_url(self, property_data):
         """Extract first property image URL - SAFE approach"""
         try:
@@ -458,26 +1166,30 @@ class MultiPropertyZillowScraper:
                 # Fallback selectors
                 '.media-stream img:first-child',
                 '.photo-carousel img:first-child',
-                'picture img',
                 
                 # Generic selectors (last resort)
+                'picture img',
                 'section img:first-child',
                 'main img:first-child'
             ]
             
-            for selector in image_selectors:
+            # Generic selectors can pick up any image on the page, so they stay behind the specific ones
+            for selector in self.tuned('image', image_selectors, generic_tail=3):
+                started = time.time()
+                image_url = None
                 try:
                     image_element = self.driver.find_element(By.CSS_SELECTOR, selector)
                     image_url = image_element.get_attribute('src')
-                    
-                    # Validate URL
-                    if image_url and self.is_valid_zillow_image_url(image_url):
-                        property_data['image_url'] = image_url
-                        print(f"    ✅ Found image URL: {image_url[:50]}...")
-                        return
-                        
                 except Exception:
-                    continue
+                    pass
+
+                # Validate URL
+                found = bool(image_url) and self.is_valid_zillow_image_url(image_url)
+                self.record_strategy('image', selector, found, started)
+                if found:
+                    property_data['image_url'] = image_url
+                    print(f"    ✅ Found image URL: {image_url[:50]}...")
+                    return
             
             # Strategy 2: Search page source for image URLs (backup)
             try:
@@ -541,14 +1253,17 @@ class MultiPropertyZillowScraper:
     def extract_price_advanced(self, property_data):
         price_strategies = [
             ('CSS', 'span[data-testid="price"]'),
-            ('CSS', '.notranslate'),
-            ('CSS', 'h3 span'),
             ('CSS', 'span.Text-c11n-8-100-1__sc-aiai24-0'),
             ('XPATH', "//span[contains(@class, 'Text') and contains(text(), '$')]"),
             ('XPATH', "//h3//span[contains(text(), '$')]"),
+            # Generic: these also match non-price text, so they stay last
+            ('CSS', '.notranslate'),
+            ('CSS', 'h3 span'),
         ]
         
-        for strategy_type, selector in price_strategies:
+        for strategy_type, selector in self.tuned('price', price_strategies, generic_tail=2):
+            started = time.time()
+            found = False
             try:
                 if strategy_type == 'CSS':
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
@@ -560,9 +1275,13 @@ class MultiPropertyZillowScraper:
                     price_match = re.match(r'^\$[\d,]+(?:\.\d{2})?$', text)
                     if price_match:
                         property_data['price'] = text
-                        return
+                        found = True
+                        break
             except:
-                continue
+                pass
+            self.record_strategy('price', (strategy_type, selector), found, started)
+            if found:
+                return
     
     def extract_basic_info_advanced(self, property_data):
         # Reset values
@@ -745,8 +1464,11 @@ class MultiPropertyZillowScraper:
                 r'Property\s*size[:\s]*([\d,.]+)\s*(sq\s*ft|sqft|square\s*feet|acres)'
             ]
             
-            for pattern in lot_patterns:
+            # Only the two labelled patterns may swap; each later one is looser than the last
+            for pattern in self.tuned('lot_size', lot_patterns, generic_tail=len(lot_patterns) - 2):
+                started = time.time()
                 lot_match = re.search(pattern, page_text, re.I)
+                self.record_strategy('lot_size', pattern, lot_match is not None, started)
                 if lot_match:
                     if len(lot_match.groups()) == 2:
                         size = lot_match.group(1)
@@ -774,14 +1496,14 @@ class MultiPropertyZillowScraper:
         try:
             print("  - Scrolling to middle of page...")
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(random.uniform(1, 2))
+            self.pause(1, 2)
             
             print("  - Looking for expandable buttons...")
             expandable_buttons = self.driver.find_elements(By.XPATH, "//button[contains(text(), 'Show more')]")
             for button in expandable_buttons:
                 try:
                     self.driver.execute_script("arguments[0].click();", button)
-                    time.sleep(0.5)
+                    self.pause(0.5)
                 except:
                     pass
 
@@ -833,10 +1555,10 @@ class MultiPropertyZillowScraper:
                             break
                         target_set.add(match.lower())
             
-            # Convert sets back to lists
-            property_data['interior_features'] = list(interior_features)
-            property_data['other_rooms'] = list(other_rooms)
-            property_data['appliances'] = list(appliances)
+            # Sorted: set order changes between processes (string hash randomization)
+            property_data['interior_features'] = sorted(interior_features)
+            property_data['other_rooms'] = sorted(other_rooms)
+            property_data['appliances'] = sorted(appliances)
             
             # Utilities extraction - compile patterns once and search once
             utilities = {}
@@ -916,7 +1638,7 @@ class MultiPropertyZillowScraper:
             
             # Quick scroll to scores section (around 60-70% down the page)
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.65);")
-            time.sleep(random.uniform(1.5, 2))  # Wait for content to load
+            self.pause(1.5, 2)  # Wait for content to load
             
             # Strategy 1: Use the specific container you found
             try:
@@ -931,13 +1653,16 @@ class MultiPropertyZillowScraper:
                 ]
                 
                 scores_container = None
-                for selector in container_selectors:
+                # The last two match the parent container too, so they stay last
+                for selector in self.tuned('scores_container', container_selectors, generic_tail=2):
+                    started = time.time()
                     try:
                         scores_container = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        if scores_container:
-                            break
                     except:
-                        continue
+                        scores_container = None
+                    self.record_strategy('scores_container', selector, scores_container is not None, started)
+                    if scores_container:
+                        break
                 
                 if scores_container:
                     container_text = scores_container.text
@@ -1074,7 +1799,7 @@ class MultiPropertyZillowScraper:
             
             # Quick scroll to schools area
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.6);")
-            time.sleep(1)
+            self.pause(1)
             
             # Get page source once for faster processing
             page_source = self.driver.page_source
@@ -1155,7 +1880,7 @@ class MultiPropertyZillowScraper:
     def extract_environmental_risks(self, property_data):
         try:
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(2.5, 3.5))
+            self.pause(2.5, 3.5)
             
             property_data['flood_risk'] = 'N/A'
             property_data['fire_risk'] = 'N/A'
@@ -1166,7 +1891,7 @@ class MultiPropertyZillowScraper:
             try:
                 climate_section = self.driver.find_element(By.XPATH, "//*[contains(text(), 'Climate risks')]")
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", climate_section)
-                time.sleep(random.uniform(2, 3))
+                self.pause(2, 3)
             except:
                 pass
             
@@ -1237,9 +1962,25 @@ class MultiPropertyZillowScraper:
             pass
     
     def extract_nearby_cities(self, property_data):
+        # Region-level fields: fill from the cache when another listing in the ZIP already had them
+        key = region_key(property_data.get('address')) if self.region_cache is not None else None
+        if key:
+            cached = self.region_cache.get(key)
+            if cached is not None:
+                property_data.update(cached)
+                self.region_cache_stats['hits'] += 1
+                return
+            self.region_cache_stats['misses'] += 1
+
+        self.extract_nearby_cities_from_page(property_data)
+
+        if key and (property_data.get('nearby_cities') or property_data.get('region', 'N/A') != 'N/A'):
+            self.region_cache.put(key, property_data)
+
+    def extract_nearby_cities_from_page(self, property_data):
         try:
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(1.5, 2.5))
+            self.pause(1.5, 2.5)
             
             property_data['nearby_cities'] = []
             property_data['region'] = 'N/A'
@@ -1285,7 +2026,7 @@ class MultiPropertyZillowScraper:
             
             if nearby_cities_elements:
                 self.driver.execute_script("arguments[0].scrollIntoView();", nearby_cities_elements[0])
-                time.sleep(2)
+                self.pause(2)
                 
                 container = nearby_cities_elements[0].find_element(By.XPATH, "./../..")
                 city_links = container.find_elements(By.XPATH, ".//a[contains(text(), 'Real estate')]")
@@ -1320,8 +2061,8 @@ class MultiPropertyZillowScraper:
         except:
             pass
     
-    def save_all_properties(self, filename_prefix="massachusetts_properties"):
-        """Save all scraped properties to JSON and CSV"""
+    def save_all_properties(self, filename_prefix="massachusetts_properties", typed=False):
+        """Save all scraped properties to JSON and CSV (plus a typed CSV when typed=True)"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         if self.all_properties_data:
@@ -1342,9 +2083,14 @@ class MultiPropertyZillowScraper:
             print(f"\n📁 All properties saved:")
             print(f"   • {json_filename} (Full Structured Data)")
             print(f"   • {csv_filename} (flattened)")
+
+            if typed:
+                typed_filename = f"{filename_prefix}_{timestamp}_typed.csv"
+                normalize_properties(df).to_csv(typed_filename, index=False)
+                print(f"   • {typed_filename} (typed columns)")
             print(f"   • Total properties: {len(self.all_properties_data)}")
             
-            return csv_filename
+            return json_filename, csv_filename
         else:
             print("No properties data to save")
             return None, None